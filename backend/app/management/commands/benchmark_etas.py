@@ -0,0 +1,65 @@
+import random
+import time
+from datetime import timedelta
+
+from app.utils.eta_calculator import (
+    batch_beverage_ready_times,
+    batch_food_ready_times,
+    calculate_beverage_eta_multibartender,
+    calculate_food_eta,
+    round_to_nearest_five,
+)
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+def _per_order(food_counts, bev_counts, now, scheduler):
+    for num_food, num_bev in zip(food_counts, bev_counts):
+        if num_food > 0:
+            now + timedelta(minutes=round_to_nearest_five(calculate_food_eta(num_food)))
+        if num_bev > 0:
+            _, finish_dt, idx = calculate_beverage_eta_multibartender(num_bev, now, scheduler)
+            finish_dt = finish_dt.replace(second=0, microsecond=0)
+            scheduler.add_order_to_bartender(idx, finish_dt - timedelta(minutes=num_bev), num_bev)
+
+
+def _batch(food_counts, bev_counts, now, scheduler):
+    batch_food_ready_times(food_counts, now)
+    batch_beverage_ready_times(bev_counts, now, scheduler)
+
+
+class Command(BaseCommand):
+    help = "Measures ETA throughput for a synthetic pending queue, order by order vs. batched."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--bartenders", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        size = options["orders"]
+        bartenders = options["bartenders"]
+        food_counts = [rng.choice([0, 0, 1, 2, 3]) for _ in range(size)]
+        bev_counts = [rng.choice([0, 1, 2, 3, 4]) for _ in range(size)]
+        now = timezone.now().replace(second=0, microsecond=0)
+
+        runs = [
+            ("per-order, scan", _per_order, False),
+            ("batch, scan", _batch, False),
+            ("batch, heap", _batch, True),
+        ]
+        self.stdout.write(f"{size} orders, {bartenders} bartenders, best of {options['repeat']}")
+        for label, run, use_heap in runs:
+            best = None
+            for _ in range(options["repeat"]):
+                scheduler = MultiBartenderScheduler(bartenders, use_heap=use_heap)
+                scheduler.reset(now)
+                started = time.perf_counter()
+                run(food_counts, bev_counts, now, scheduler)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            rate = size / best if best else float("inf")
+            self.stdout.write(f"  {label:<16} {best * 1000:9.1f} ms  {rate:12,.0f} orders/s")
@@ -0,0 +1,17 @@
+import json
+
+from app.utils.notification_outbox import notification_dispatcher
+from app.utils.promotion_fanout import promotion_fanout
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends every due push notification in the outbox and runs queued or abandoned "
+        "promotion deliveries (retries and anything left by a restart)."
+    )
+
+    def handle(self, *args, **options):
+        counts = notification_dispatcher.dispatch_due()
+        deliveries = promotion_fanout.run_pending()
+        self.stdout.write(json.dumps({"notifications": counts, "promotion_deliveries": deliveries}))
@@ -0,0 +1,13 @@
+from app.utils.order_completion import rebuild_customer_affinity
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Recomputes the customer/restaurant affinity index from completed orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, default=None, help="Only rebuild this restaurant")
+
+    def handle(self, *args, **options):
+        count = rebuild_customer_affinity(options["restaurant"])
+        self.stdout.write(f"Rebuilt {count} affinity rows")
@@ -0,0 +1,17 @@
+from datetime import date
+
+from app.utils.sales_rollup import rebuild_daily_sales
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Backfills the per-restaurant daily sales rollup from completed orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, default=None, help="Only rebuild this restaurant")
+        parser.add_argument("--since", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+        parser.add_argument("--until", type=date.fromisoformat, default=None, help="Last day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_sales(options["restaurant"], options["since"], options["until"])
+        self.stdout.write(f"Rebuilt {count} daily sales rows")
@@ -0,0 +1,13 @@
+from app.utils.item_sales import rebuild_item_sales
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-item daily sales table from the order lines of completed orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, default=None, help="Only rebuild this restaurant")
+
+    def handle(self, *args, **options):
+        count = rebuild_item_sales(options["restaurant"])
+        self.stdout.write(f"Rebuilt {count} item sales rows")
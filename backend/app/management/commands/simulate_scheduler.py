@@ -0,0 +1,58 @@
+import json
+
+from app.utils.scheduler_simulation import (
+    happy_hour_arrivals,
+    poisson_arrivals,
+    recorded_arrivals,
+    simulate,
+    simulate_against_database,
+    simulate_service,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays synthetic or recorded order arrivals against the bartender scheduler and "
+        "reports ETA latency percentiles, queue length and ETA error. "
+        "Run with DB_ENGINE=sqlite to work offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pattern", choices=["poisson", "happy-hour", "recorded"], default="poisson")
+        parser.add_argument("--rate", type=float, default=1.0, help="Orders per minute")
+        parser.add_argument("--peak-rate", type=float, default=4.0, help="Orders per minute during happy hour")
+        parser.add_argument("--peak-start", type=float, default=60.0, help="Minutes from start")
+        parser.add_argument("--peak-minutes", type=float, default=60.0)
+        parser.add_argument("--minutes", type=float, default=180.0)
+        parser.add_argument("--bartenders", type=int, default=1)
+        parser.add_argument("--restaurant", type=int, help="Restaurant to replay with --pattern recorded")
+        parser.add_argument("--noise", type=float, default=0.2, help="Service time noise for synthetic orders")
+        parser.add_argument("--db", action="store_true", help="Go through recalculate_pending_etas and the database")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        start = timezone.now().replace(second=0, microsecond=0)
+        pattern = options["pattern"]
+
+        if pattern == "recorded":
+            if options["restaurant"] is None:
+                raise CommandError("--restaurant is required with --pattern recorded")
+            arrivals = recorded_arrivals(options["restaurant"])
+        elif pattern == "happy-hour":
+            arrivals = happy_hour_arrivals(
+                options["rate"], options["peak_rate"], options["minutes"],
+                options["peak_start"], options["peak_minutes"], start, seed=options["seed"],
+            )
+        else:
+            arrivals = poisson_arrivals(options["rate"], options["minutes"], start, seed=options["seed"])
+
+        arrivals = simulate_service(arrivals, options["bartenders"], options["noise"], seed=options["seed"])
+        if options["db"]:
+            report = simulate_against_database(arrivals, options["bartenders"])
+        else:
+            report = simulate(arrivals, options["bartenders"])
+
+        report["pattern"] = pattern
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,23 @@
+from app.models import Restaurant
+from app.utils.prep_time_model import prep_time_models
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains every restaurant's prep-time model from its completed orders and persists it. "
+        "Run periodically; request handlers only read the stored models."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, default=None, help="Only train this restaurant")
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.order_by("id").values_list("id", flat=True)
+        if options["restaurant"] is not None:
+            restaurants = restaurants.filter(id=options["restaurant"])
+        count = 0
+        for restaurant_id in restaurants:
+            prep_time_models.retrain(restaurant_id)
+            count += 1
+        self.stdout.write(f"Trained {count} prep-time models")
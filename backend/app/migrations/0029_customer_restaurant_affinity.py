@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_affinity(apps, schema_editor):
+    # Same grouped query as app.utils.order_completion.rebuild_customer_affinity,
+    # so ordered_within_days promotions reach existing customers straight away
+    CustomerRestaurantAffinity = apps.get_model("app", "CustomerRestaurantAffinity")
+    Order = apps.get_model("app", "Order")
+    completed_at = Coalesce("completion_time", "updated_at")
+    orders = Order.objects.filter(status__in=["completed", "picked_up"])
+    rows = orders.values("customer_id", "restaurant_id").annotate(
+        order_count=Count("id"),
+        total_spent=Sum("total_price"),
+        first_order_at=Min(completed_at),
+        last_order_at=Max(completed_at),
+    )
+    CustomerRestaurantAffinity.objects.bulk_create(
+        [CustomerRestaurantAffinity(**row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0028_promotion_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotionnotification',
+            name='ordered_within_days',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.CreateModel(
+            name='CustomerRestaurantAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_order_at', models.DateTimeField()),
+                ('last_order_at', models.DateTimeField()),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='restaurant_affinities', to='app.customer')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_affinities', to='app.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['restaurant', '-last_order_at'], name='affinity_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'restaurant'), name='unique_customer_restaurant_affinity')],
+            },
+        ),
+        migrations.RunPython(backfill_affinity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def register_existing_tokens(apps, schema_editor):
+    Customer = apps.get_model("app", "Customer")
+    DeviceToken = apps.get_model("app", "DeviceToken")
+    devices = {}
+    # A token shared by several customers belongs to the one who saved it last
+    customers = Customer.objects.exclude(fcm_token__isnull=True).exclude(fcm_token="").order_by("updated_at")
+    for customer_id, token, updated_at in customers.values_list("id", "fcm_token", "updated_at").iterator():
+        devices[token] = DeviceToken(customer_id=customer_id, token=token, last_seen_at=updated_at)
+    DeviceToken.objects.bulk_create(devices.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0029_customer_restaurant_affinity'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='promotiondelivery',
+            old_name='last_customer_id',
+            new_name='last_device_id',
+        ),
+        migrations.CreateModel(
+            name='DeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=255, unique=True)),
+                ('active', models.BooleanField(default=True)),
+                ('failure_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='devices', to='app.customer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', 'active'], name='device_customer_active_idx')],
+            },
+        ),
+        migrations.RunPython(register_existing_tokens, migrations.RunPython.noop),
+    ]
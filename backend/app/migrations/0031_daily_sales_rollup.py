@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:49
+
+import app.models.stats_models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0030_device_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_sales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('worker_ids', models.JSONField(default=list)),
+                ('hourly_orders', models.JSONField(default=app.models.stats_models._empty_hours)),
+                ('hourly_sales', models.JSONField(default=app.models.stats_models._empty_hourly_sales)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='app.restaurant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'date'), name='unique_daily_sales_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_unit_prices(apps, schema_editor):
+    # The price paid for older lines is unknown; the current menu price is the best estimate
+    Item = apps.get_model("app", "Item")
+    OrderItem = apps.get_model("app", "OrderItem")
+    OrderItem.objects.filter(unit_price__isnull=True).update(
+        unit_price=Subquery(Item.objects.filter(pk=OuterRef("item_id")).values("price")[:1])
+    )
+
+
+def backfill_item_sales(apps, schema_editor):
+    # Same grouping as app.utils.item_sales.rebuild_item_sales, so existing
+    # restaurants keep their item statistics without a manual rebuild
+    ItemDailySales = apps.get_model("app", "ItemDailySales")
+    OrderItem = apps.get_model("app", "OrderItem")
+    lines = OrderItem.objects.filter(order__status__in=["completed", "picked_up"]).annotate(
+        day=TruncDate(Coalesce("order__start_time", "order__completion_time", "order__updated_at"))
+    )
+    revenue = ExpressionWrapper(
+        F("quantity") * Coalesce("unit_price", "item__price"), output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+    rows = {}
+    for row in lines.values("item_id", "order__restaurant_id", "day").annotate(
+        units=Sum("quantity"), orders=Count("order", distinct=True), revenue=Sum(revenue)
+    ):
+        rows[(row["item_id"], row["day"])] = ItemDailySales(
+            item_id=row["item_id"],
+            restaurant_id=row["order__restaurant_id"],
+            date=row["day"],
+            units=row["units"],
+            orders=row["orders"],
+            revenue=row["revenue"],
+        )
+    for row in lines.filter(order__review__isnull=False).values("item_id", "day").annotate(
+        rating_sum=Sum("order__review__rating"), rating_count=Count("id")
+    ):
+        daily = rows[(row["item_id"], row["day"])]
+        daily.rating_sum, daily.rating_count = row["rating_sum"], row["rating_count"]
+    ItemDailySales.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0031_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_unit_prices, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ItemDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='app.item')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_daily_sales', to='app.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['restaurant', 'date'], name='item_sales_restaurant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'date'), name='unique_item_daily_sales')],
+            },
+        ),
+        migrations.RunPython(backfill_item_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0032_item_daily_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrepTimeEstimate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_base', models.FloatField()),
+                ('food_per_item', models.FloatField()),
+                ('bev_per_item', models.FloatField()),
+                ('item_minutes', models.JSONField(default=dict)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('trained_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='prep_time_estimate', to='app.restaurant')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_first_completed_at(apps, schema_editor):
+    # Orders that completed before the field existed have already been counted by the rollups
+    Order = apps.get_model("app", "Order")
+    Order.objects.filter(status__in=["completed", "picked_up"], first_completed_at__isnull=True).update(
+        first_completed_at=Coalesce("completion_time", "updated_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0033_prep_time_estimate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='first_completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_first_completed_at, migrations.RunPython.noop),
+    ]
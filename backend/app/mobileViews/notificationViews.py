@@ -1,6 +1,7 @@
 import json
 
 from app.models.customer_models import Customer
+from app.utils.device_tokens import register_device_token
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -21,6 +22,11 @@ def save_fcm_token(request):
             status=404,
         )
 
-    customer.fcm_token = fcm_token
-    customer.save()
+    if fcm_token:
+        register_device_token(customer, fcm_token)
+    else:
+        # An empty token unregisters the customer: stop pushing to all their devices
+        customer.devices.update(active=False)
+        customer.fcm_token = fcm_token
+        customer.save()
     return JsonResponse({"message": "Token saved successfully"})
@@ -1,7 +1,10 @@
 import base64
 import json
+import threading
+from datetime import datetime, timedelta, timezone
 
 import requests
+from app.utils.http_client import outbound_http
 from django.conf import settings
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
@@ -19,50 +22,149 @@ def get_fcm_credentials():
     )
 
 
-def send_fcm_httpv1(device_token, title, body, data=None):
-    credentials = get_fcm_credentials()
-    credentials.refresh(Request())
-
-    access_token = credentials.token
-    project_id = credentials.project_id
+def _utcnow():
+    # google-auth keeps token expiry as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FcmCredentialCache:
+    """
+    Process-wide FCM service account credentials and access token.
+
+    The service account JSON is decoded once per FIREBASE_CREDENTIALS_JSON
+    value and the OAuth token is reused until shortly before it expires.
+    Inside the refresh_ahead window the current token is still handed out
+    while one background thread fetches the next; only a token inside the
+    refresh_margin (or already expired) is refreshed inline.
+    """
+
+    # google-auth leaves expiry unset for some credential types; Google tokens
+    # last an hour
+    DEFAULT_LIFETIME = timedelta(minutes=55)
+
+    def __init__(self, refresh_margin=300, refresh_ahead=600, clock=_utcnow):
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.refresh_ahead = timedelta(seconds=refresh_ahead)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._background = None
+        self.clear()
+
+    def clear(self):
+        self._source = None
+        self._credentials = None
+        self._expiry = None
+        self.refreshes = 0
+        self.background_refreshes = 0
+        self.hits = 0
+
+    def invalidate(self):
+        """Forces the next send to fetch a new token, e.g. after FCM answered 401."""
+        with self._lock:
+            self._expiry = None
+
+    def _load(self):
+        source = settings.FIREBASE_CREDENTIALS_JSON
+        if self._credentials is None or source != self._source:
+            self._credentials = get_fcm_credentials()
+            self._source = source
+            self._expiry = None
+
+    def _expiry_of(self, credentials):
+        return getattr(credentials, "expiry", None) or self._clock() + self.DEFAULT_LIFETIME
+
+    def _refresh(self):
+        self._credentials.refresh(Request(session=outbound_http.session))
+        self.refreshes += 1
+        self._expiry = self._expiry_of(self._credentials)
+
+    def token(self):
+        """
+        :return: (access_token, project_id) valid for at least refresh_margin
+        """
+        with self._lock:
+            self._load()
+            now = self._clock()
+            if self._expiry is None or self._expiry - now <= self.refresh_margin:
+                self._refresh()
+                return self._credentials.token, self._credentials.project_id
+
+            self.hits += 1
+            current = self._credentials.token, self._credentials.project_id
+            if self._expiry - now <= self.refresh_ahead:
+                self._refresh_in_background()
+            return current
+
+    def _refresh_in_background(self):
+        # Called with the lock held
+        if self._background is not None and self._background.is_alive():
+            return
+        credentials = self._credentials
+
+        def refresh():
+            # Senders keep using the current token while this one is fetched
+            try:
+                credentials.refresh(Request(session=outbound_http.session))
+            except Exception:
+                # The next inline refresh retries and surfaces the error
+                return
+            with self._lock:
+                if self._credentials is credentials:
+                    self.refreshes += 1
+                    self.background_refreshes += 1
+                    self._expiry = self._expiry_of(credentials)
+
+        self._background = threading.Thread(target=refresh, name="fcm-token-refresh", daemon=True)
+        self._background.start()
+
+
+fcm_credentials = FcmCredentialCache(
+    refresh_margin=getattr(settings, "FCM_TOKEN_REFRESH_MARGIN", 300),
+    refresh_ahead=getattr(settings, "FCM_TOKEN_REFRESH_AHEAD", 600),
+)
+
+
+class FcmSendError(Exception):
+    """
+    FCM rejected a message or could not be reached.
+
+    permanent is True when retrying cannot help (unknown or invalid token).
+    """
+
+    def __init__(self, message, status_code=None, permanent=False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.permanent = permanent
+
+
+# Rejections that will fail the same way on every retry
+FCM_PERMANENT_ERRORS = {"UNREGISTERED", "INVALID_ARGUMENT", "SENDER_ID_MISMATCH", "NOT_FOUND"}
+
+
+def _fcm_error_code(response):
+    try:
+        error = response.json().get("error", {})
+    except ValueError:
+        return None
+    for detail in error.get("details", []):
+        if detail.get("errorCode"):
+            return detail["errorCode"]
+    return error.get("status")
+
+
+def send_fcm_message(device_token, title, body, data=None):
+    """
+    Sends one message carrying both the visible notification and the data
+    payload the app uses to refresh the order, instead of two separate sends.
+
+    :raises FcmSendError: when FCM cannot be reached or rejects the message
+    """
+    access_token, project_id = fcm_credentials.token()
 
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Content-Type': 'application/json; UTF-8',
     }
-
-    payload = {
-        "message": {
-            "token": device_token,
-            "data": {
-                "type": "ORDER_UPDATE",
-                "order_id": data.get("order_id", ""),
-                "title": title,
-                "body": body
-            }
-        }
-    }
-
-    response = requests.post(
-        f'https://fcm.googleapis.com/v1/projects/{project_id}/messages:send',
-        headers=headers,
-        json=payload
-    )
-
-    return response
-
-
-def send_notification_to_device(device_token, title, body, data=None):
-    credentials = get_fcm_credentials()
-    credentials.refresh(Request())
-    access_token = credentials.token
-    project_id = credentials.project_id
-
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json; UTF-8',
-    }
-
     payload = {
         "message": {
             "token": device_token,
@@ -70,13 +172,27 @@ def send_notification_to_device(device_token, title, body, data=None):
                 "title": title,
                 "body": body,
             },
-            "data": data or {}
+            "data": {key: str(value) for key, value in (data or {}).items()},
         }
     }
 
-    response = requests.post(
-        f'https://fcm.googleapis.com/v1/projects/{project_id}/messages:send',
-        headers=headers,
-        json=payload
-    )
+    try:
+        response = outbound_http.post(
+            f'{settings.FCM_BASE_URL}/v1/projects/{project_id}/messages:send',
+            headers=headers,
+            json=payload,
+        )
+    except requests.RequestException as exc:
+        raise FcmSendError(f"FCM unreachable: {exc}") from exc
+
+    if response.status_code >= 400:
+        if response.status_code == 401:
+            # Token revoked or expired early; the retry fetches a new one
+            fcm_credentials.invalidate()
+        code = _fcm_error_code(response)
+        raise FcmSendError(
+            f"FCM returned {response.status_code} {code or ''}".strip(),
+            status_code=response.status_code,
+            permanent=code in FCM_PERMANENT_ERRORS,
+        )
     return response
@@ -1,8 +1,12 @@
+from .affinity_models import CustomerRestaurantAffinity
 from .customer_models import Customer, CustomUser
+from .notification_models import DeviceToken, NotificationOutbox
 from .order_models import Order, OrderItem
-from .promotion_models import PromotionNotification
+from .promotion_models import PromotionDelivery, PromotionNotification
 from .restaurant_models import Ingredient, Item, Restaurant
 from .review_models import Review
+from .scheduler_models import PrepTimeEstimate, SchedulerState
+from .stats_models import DailySalesRollup, ItemDailySales
 from .worker_models import Worker
 
 
@@ -17,4 +21,12 @@ __all__ = [
     "Worker",
     "Review",
     "PromotionNotification",
+    "PromotionDelivery",
+    "CustomerRestaurantAffinity",
+    "DailySalesRollup",
+    "ItemDailySales",
+    "SchedulerState",
+    "PrepTimeEstimate",
+    "NotificationOutbox",
+    "DeviceToken",
 ]
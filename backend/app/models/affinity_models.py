@@ -0,0 +1,33 @@
+from django.db import models
+
+from .customer_models import Customer
+from .restaurant_models import Restaurant
+
+
+class CustomerRestaurantAffinity(models.Model):
+    """
+    How often and how recently a customer ordered from a restaurant, kept up
+    to date as orders complete so promotion audiences are one indexed lookup.
+    """
+
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name="restaurant_affinities"
+    )
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name="customer_affinities"
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_order_at = models.DateTimeField()
+    last_order_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["customer", "restaurant"], name="unique_customer_restaurant_affinity"),
+        ]
+        indexes = [
+            models.Index(fields=["restaurant", "-last_order_at"], name="affinity_recent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.user.username} @ {self.restaurant.name}: {self.order_count} orders"
@@ -0,0 +1,67 @@
+from django.db import models
+from django.utils import timezone
+
+from .customer_models import Customer
+
+
+class NotificationOutbox(models.Model):
+    """
+    A push notification waiting to be sent, written in the same transaction as
+    the change it reports so nothing is lost if the process dies before FCM
+    answers. dedup_key makes enqueueing the same notice twice a no-op.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    device_token = models.CharField(max_length=255)
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="notification_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {self.device_token[:12]} ({self.status})"
+
+
+class DeviceToken(models.Model):
+    """
+    A customer's device registered for push notifications. Tokens FCM
+    reports as unregistered or invalid are deactivated instead of being
+    retried on every send.
+    """
+
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, related_name="devices"
+    )
+    token = models.CharField(max_length=255, unique=True)
+    active = models.BooleanField(default=True)
+    failure_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["customer", "active"], name="device_customer_active_idx"),
+        ]
+
+    def __str__(self):
+        state = "active" if self.active else "inactive"
+        return f"{self.token[:12]} for {self.customer.user.username} ({state})"
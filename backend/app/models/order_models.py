@@ -5,6 +5,21 @@ from .restaurant_models import Ingredient, Item, Restaurant
 from .worker_models import Worker
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_details(self):
+        """
+        Loads everything OrderSerializer reads (customer user, restaurant,
+        worker, items and their unwanted ingredients) in a fixed number of
+        queries, however many orders are returned.
+        """
+        return self.select_related("customer__user", "restaurant", "worker").prefetch_related(
+            models.Prefetch(
+                "order_items",
+                queryset=OrderItem.objects.select_related("item").prefetch_related("unwanted_ingredients"),
+            )
+        )
+
+
 class Order(models.Model):
     customer = models.ForeignKey(
         Customer, on_delete=models.CASCADE, related_name="orders"
@@ -16,12 +31,19 @@ class Order(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     worker = models.ForeignKey(Worker, on_delete=models.SET_NULL, null=True, blank=True, related_name="orders")
     completion_time = models.DateTimeField(null=True, blank=True)
+    # Set once, the first time the order reaches a completed status; the sales rollups count it only then
+    first_completed_at = models.DateTimeField(null=True, blank=True)
 
     estimated_food_ready_time = models.DateTimeField(null=True, blank=True)
     estimated_beverage_ready_time = models.DateTimeField(null=True, blank=True)
 
     reviewed = models.BooleanField(default=False)
 
+    # Bumped on every save (and by ETA bulk updates) for delta syncs of order boards
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Statuses of an order that has been made; prep times and sales count only these
+    COMPLETED_STATUSES = ["completed", "picked_up"]
     status = models.CharField(max_length=50, default="pending")
     food_status = models.CharField(
         max_length=50,
@@ -43,6 +65,15 @@ class Order(models.Model):
         default="pending",
     )
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The active orders board filters by restaurant and status, newest first
+            models.Index(fields=["restaurant", "status", "-start_time"], name="order_board_idx"),
+            models.Index(fields=["restaurant", "updated_at"], name="order_board_sync_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.customer.user.username} at {self.restaurant.name}"
 
@@ -56,6 +87,8 @@ class OrderItem(models.Model):
     )
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Item price when the order was placed; later menu price changes do not affect it
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     unwanted_ingredients = models.ManyToManyField(
         Ingredient, blank=True, related_name="excluded_from_order_items"
     )
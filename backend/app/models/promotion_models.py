@@ -1,5 +1,6 @@
 # app/models/promotion_models.py
 
+from django.core.validators import MinValueValidator
 from django.db import models
 
 from .restaurant_models import Restaurant
@@ -13,6 +14,41 @@ class PromotionNotification(models.Model):
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     sent = models.BooleanField(default=False)
+    # Only customers whose last order here is this recent; everyone with a device when empty
+    ordered_within_days = models.PositiveIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1)]
+    )
 
     def __str__(self):
         return f"{self.title} - {self.restaurant.name}"
+
+
+class PromotionDelivery(models.Model):
+    """
+    One send of a promotion to its audience. Progress is saved after every
+    chunk of recipients, with last_device_id as the resume point.
+    """
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    promotion = models.ForeignKey(
+        PromotionNotification, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_device_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Delivery {self.id} of {self.promotion.title} ({self.status})"
@@ -0,0 +1,38 @@
+from django.db import models
+
+from .restaurant_models import Restaurant
+
+
+class SchedulerState(models.Model):
+    """Latest bartender timeline snapshot for a restaurant, shared by all workers."""
+
+    restaurant = models.OneToOneField(
+        Restaurant, on_delete=models.CASCADE, related_name="scheduler_state"
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    state = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Scheduler state v{self.version} for {self.restaurant.name}"
+
+
+class PrepTimeEstimate(models.Model):
+    """
+    Latest trained prep-time model for a restaurant, written by
+    `manage.py train_prep_time_models` and read by every worker process.
+    """
+
+    restaurant = models.OneToOneField(
+        Restaurant, on_delete=models.CASCADE, related_name="prep_time_estimate"
+    )
+    food_base = models.FloatField()
+    food_per_item = models.FloatField()
+    bev_per_item = models.FloatField()
+    # Per-unit minutes keyed by item id (as a string, JSON object keys)
+    item_minutes = models.JSONField(default=dict)
+    samples = models.PositiveIntegerField(default=0)
+    trained_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Prep times for {self.restaurant.name} ({self.samples} orders)"
@@ -0,0 +1,77 @@
+from django.db import models
+
+from .restaurant_models import Item, Restaurant
+
+
+def _empty_hours():
+    return [0] * 24
+
+
+def _empty_hourly_sales():
+    return ["0.00"] * 24
+
+
+class DailySalesRollup(models.Model):
+    """
+    Completed orders of one restaurant day (by start_time), maintained as
+    orders complete so the dashboard reads one row. Hourly sales are kept as
+    decimal strings to stay exact in JSON.
+    """
+
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    date = models.DateField()
+    total_orders = models.PositiveIntegerField(default=0)
+    total_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    worker_ids = models.JSONField(default=list)
+    hourly_orders = models.JSONField(default=_empty_hours)
+    hourly_sales = models.JSONField(default=_empty_hourly_sales)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["restaurant", "date"], name="unique_daily_sales_rollup"),
+        ]
+
+    @property
+    def active_workers(self):
+        return len(self.worker_ids)
+
+    def __str__(self):
+        return f"{self.restaurant.name} {self.date}: {self.total_orders} orders"
+
+
+class ItemDailySales(models.Model):
+    """
+    Units, revenue and ratings of one menu item on one day, built from the
+    order lines of completed orders at the price each line was sold for.
+    Ratings are summed per order line, so avg = rating_sum / rating_count.
+    """
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="daily_sales")
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name="item_daily_sales"
+    )
+    date = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "date"], name="unique_item_daily_sales"),
+        ]
+        indexes = [
+            # Restaurant-wide top-N over a date range
+            models.Index(fields=["restaurant", "date"], name="item_sales_restaurant_idx"),
+        ]
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    def __str__(self):
+        return f"{self.item.name} {self.date}: {self.units} sold"
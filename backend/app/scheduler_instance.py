@@ -1,15 +1,88 @@
 # app/scheduler_instance.py
 
-# Dictionary to hold scheduler instances keyed by restaurant id
-restaurant_schedulers = {}
+from django.conf import settings
 
 
-def get_restaurant_scheduler(restaurant_id, num_bartenders=1):
+# Backend holding scheduler instances keyed by restaurant id, see SCHEDULER_STATE_BACKEND
+_state_backend = None
+
+
+def get_scheduler_state_backend():
+    """
+    Returns the configured scheduler state backend:
+      - "memory"   (default) schedulers live in this process only
+      - "file"     JSON snapshots in SCHEDULER_STATE_DIR, shared by all workers on the host
+      - "database" snapshots in the SchedulerState table, shared by every worker
+    """
+    global _state_backend
+    if _state_backend is None:
+        from app.utils.scheduler_state import (
+            DatabaseSchedulerState,
+            FileSchedulerState,
+            InMemorySchedulerState,
+        )
+
+        backend = getattr(settings, "SCHEDULER_STATE_BACKEND", "memory")
+        if backend == "file":
+            _state_backend = FileSchedulerState(settings.SCHEDULER_STATE_DIR)
+        elif backend == "database":
+            _state_backend = DatabaseSchedulerState()
+        elif backend == "memory":
+            _state_backend = InMemorySchedulerState()
+        else:
+            raise ValueError(f"Unknown SCHEDULER_STATE_BACKEND '{backend}'")
+    return _state_backend
+
+
+def count_restaurant_bartenders(restaurant_id):
+    """
+    Number of bartender Worker rows for the restaurant, at least 1 so orders
+    can always be scheduled.
+    """
+    from app.models.worker_models import Worker
+
+    return max(1, Worker.objects.filter(restaurant_id=restaurant_id, role="bartender").count())
+
+
+def get_restaurant_scheduler(restaurant_id, num_bartenders=None):
     """
     Retrieve the scheduler instance for the given restaurant.
-    If one doesn't exist, create it with the default number of bartenders.
+    If one doesn't exist, create it sized to the restaurant's bartenders.
+
+    The stored scheduler caches the bartender count; worker changes update it
+    through refresh_restaurant_bartenders. Passing num_bartenders overrides it.
     """
-    if restaurant_id not in restaurant_schedulers:
+    backend = get_scheduler_state_backend()
+    scheduler = backend.load(restaurant_id)
+    if scheduler is None:
         from app.utils.multi_bartender_scheduler import MultiBartenderScheduler
-        restaurant_schedulers[restaurant_id] = MultiBartenderScheduler(num_bartenders=num_bartenders)
-    return restaurant_schedulers[restaurant_id]
+        if num_bartenders is None:
+            num_bartenders = count_restaurant_bartenders(restaurant_id)
+        scheduler = MultiBartenderScheduler(num_bartenders=num_bartenders)
+        backend.save(restaurant_id, scheduler)
+    elif num_bartenders is not None and scheduler.num_bartenders != num_bartenders:
+        scheduler.resize(num_bartenders)
+        backend.save(restaurant_id, scheduler)
+    return scheduler
+
+
+def refresh_restaurant_bartenders(restaurant_id):
+    """
+    Re-count the restaurant's bartenders after workers were added, removed or
+    changed role, and resize its scheduler in place if the count changed.
+    Returns True when the scheduler was resized.
+    """
+    count = count_restaurant_bartenders(restaurant_id)
+    scheduler = get_restaurant_scheduler(restaurant_id)
+    if scheduler.num_bartenders == count:
+        return False
+    scheduler.resize(count)
+    save_restaurant_scheduler(restaurant_id, scheduler)
+    return True
+
+
+def save_restaurant_scheduler(restaurant_id, scheduler):
+    """
+    Publish a scheduler after its bookings changed so other workers see it.
+    """
+    get_scheduler_state_backend().save(restaurant_id, scheduler)
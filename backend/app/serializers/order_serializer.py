@@ -1,4 +1,6 @@
 from app.utils.eta_calculator import round_to_nearest_five
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 
@@ -7,12 +9,74 @@ from ..models.order_models import Order, OrderItem
 from ..models.restaurant_models import Ingredient, Item, Restaurant
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that can resolve ids from objects loaded up front
+    with prefetch(), one query for a whole list instead of one per id.
+    """
+
+    def __init__(self, **kwargs):
+        self._prefetched = None
+        super().__init__(**kwargs)
+
+    def prefetch(self, pks):
+        to_python = self.get_queryset().model._meta.pk.to_python
+        valid = set()
+        for pk in pks:
+            try:
+                valid.add(to_python(pk))
+            except (TypeError, ValueError, ValidationError):
+                continue  # Reported by to_internal_value
+        self._prefetched = self.get_queryset().in_bulk(valid)
+
+    def clear_prefetched(self):
+        self._prefetched = None
+
+    def to_internal_value(self, data):
+        if self._prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, ValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = self._prefetched.get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    """Validates all order lines with one query for items and one for ingredients."""
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        lines = [line for line in data if isinstance(line, dict)]
+        item_field = self.child.fields["item_id"]
+        ingredient_field = self.child.fields["unwanted_ingredients"].child_relation
+        item_field.prefetch(line.get("item_id") for line in lines)
+        ingredient_field.prefetch(
+            pk
+            for line in lines
+            if isinstance(line.get("unwanted_ingredients"), list)
+            for pk in line["unwanted_ingredients"]
+        )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            item_field.clear_prefetched()
+            ingredient_field.clear_prefetched()
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
-    item_id = serializers.PrimaryKeyRelatedField(
+    item_id = PrefetchedPrimaryKeyRelatedField(
         queryset=Item.objects.all(), source="item", write_only=True
     )
     item_name = serializers.CharField(source="item.name", read_only=True)
-    unwanted_ingredients = serializers.PrimaryKeyRelatedField(
+    unwanted_ingredients = PrefetchedPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), many=True, required=False
     )
     unwanted_ingredient_names = serializers.SerializerMethodField()
@@ -28,6 +92,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "unwanted_ingredient_names",
             "category",
         ]
+        list_serializer_class = OrderItemListSerializer
 
     def get_unwanted_ingredient_names(self, obj):
         return [ing.name for ing in obj.unwanted_ingredients.all()]
@@ -108,10 +173,29 @@ class OrderSerializer(serializers.ModelSerializer):
         return obj.worker.name if obj.worker else None
 
     def create(self, validated_data):
+        """
+        Saves the order, its items and their unwanted ingredients in one
+        transaction with a constant number of queries. The total is computed
+        from the item prices loaded during validation.
+        """
         order_items_data = validated_data.pop("order_items")
-        order = Order.objects.create(**validated_data)
-        for item_data in order_items_data:
-            unwanted_ingredients = item_data.pop("unwanted_ingredients", [])
-            order_item = OrderItem.objects.create(order=order, **item_data)
-            order_item.unwanted_ingredients.set(unwanted_ingredients)
+        validated_data["total_price"] = sum(
+            line["item"].price * line.get("quantity", 1) for line in order_items_data
+        )
+
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+            order_items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order, item=line["item"], quantity=line.get("quantity", 1), unit_price=line["item"].price
+                )
+                for line in order_items_data
+            ])
+
+            Unwanted = OrderItem.unwanted_ingredients.through
+            Unwanted.objects.bulk_create([
+                Unwanted(orderitem=order_item, ingredient=ingredient)
+                for order_item, line in zip(order_items, order_items_data)
+                for ingredient in dict.fromkeys(line.get("unwanted_ingredients", []))
+            ])
         return order
@@ -1,4 +1,4 @@
-from app.models import PromotionNotification
+from app.models import PromotionDelivery, PromotionNotification
 from rest_framework import serializers
 
 
@@ -6,3 +6,20 @@ class PromotionNotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = PromotionNotification
         fields = '__all__'
+
+
+class PromotionDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PromotionDelivery
+        fields = [
+            "id",
+            "promotion",
+            "status",
+            "total_recipients",
+            "sent_count",
+            "failed_count",
+            "last_error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
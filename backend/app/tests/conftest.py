@@ -1,4 +1,7 @@
+import json
+import threading
 from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from app.models.customer_models import Customer, CustomUser
@@ -8,6 +11,29 @@ from app.models.worker_models import Worker
 from rest_framework.test import APIClient
 
 
+@pytest.fixture(autouse=True)
+def reset_fcm_credentials():
+    """Every test starts without a cached FCM token."""
+    from app.mobileViews.utils import fcm_credentials
+
+    fcm_credentials.clear()
+    yield
+    fcm_credentials.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_eta_caches():
+    """Every test starts without cached prep-time models or ETA quotes."""
+    from app.utils.eta_quote_cache import eta_quote_cache
+    from app.utils.prep_time_model import prep_time_models
+
+    prep_time_models.clear()
+    eta_quote_cache.clear()
+    yield
+    prep_time_models.clear()
+    eta_quote_cache.clear()
+
+
 @pytest.fixture
 def api_client(db):
     return APIClient()
@@ -165,3 +191,73 @@ def new_item_payload():
         "item_image_url": "http://example.com/test.png",
         "available": True
     }
+
+
+class FakeFcmServer:
+    """
+    Local stand-in for the FCM v1 endpoint. Records every request and answers
+    with queued (status, body) responses, or 200 once the queue is empty.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open like the real endpoint
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                fake.requests.append({
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "json": json.loads(self.rfile.read(length) or b"{}"),
+                })
+                status, body = fake.responses.pop(0) if fake.responses else (
+                    200, {"name": f"messages/{len(fake.requests)}"}
+                )
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def respond(self, status, body=None):
+        self.responses.append((status, body or {}))
+
+    def close(self):
+        from app.utils.http_client import outbound_http
+
+        # Drop pooled keep-alive connections so nothing reaches the old server
+        outbound_http.close()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_fcm(settings, monkeypatch):
+    """Points FCM sends at a local FakeFcmServer with dummy credentials."""
+    from app.mobileViews import utils
+
+    class DummyCredentials:
+        token = "test-token"
+        project_id = "test-project"
+
+        def refresh(self, request):
+            pass
+
+    server = FakeFcmServer()
+    settings.FCM_BASE_URL = server.url
+    monkeypatch.setattr(utils, "get_fcm_credentials", lambda: DummyCredentials())
+    yield server
+    server.close()
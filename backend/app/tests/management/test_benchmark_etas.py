@@ -0,0 +1,12 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_etas_reports_every_mode():
+    out = StringIO()
+    call_command("benchmark_etas", orders=200, bartenders=3, repeat=1, stdout=out)
+    output = out.getvalue()
+    assert "200 orders, 3 bartenders" in output
+    for label in ("per-order, scan", "batch, scan", "batch, heap"):
+        assert label in output
@@ -0,0 +1,37 @@
+import json
+from io import StringIO
+
+import pytest
+from app.models.notification_models import NotificationOutbox
+from app.models.promotion_models import PromotionDelivery, PromotionNotification
+from app.utils.device_tokens import register_device_token
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_dispatch_notifications_drains_outbox(fake_fcm):
+    NotificationOutbox.objects.create(device_token="device-1", title="t", body="b")
+    NotificationOutbox.objects.create(device_token="device-2", title="t", body="b", status="sent")
+
+    out = StringIO()
+    call_command("dispatch_notifications", stdout=out)
+
+    assert json.loads(out.getvalue()) == {
+        "notifications": {"sent": 1, "pending": 0, "failed": 0},
+        "promotion_deliveries": 0,
+    }
+    assert [request["json"]["message"]["token"] for request in fake_fcm.requests] == ["device-1"]
+
+
+@pytest.mark.django_db
+def test_dispatch_notifications_runs_queued_promotions(fake_fcm, restaurant, customer):
+    register_device_token(customer, "device-1")
+    promotion = PromotionNotification.objects.create(restaurant=restaurant, title="Promo", body="b")
+    delivery = PromotionDelivery.objects.create(promotion=promotion)
+
+    out = StringIO()
+    call_command("dispatch_notifications", stdout=out)
+
+    assert json.loads(out.getvalue())["promotion_deliveries"] == 1
+    delivery.refresh_from_db()
+    assert delivery.status == "completed" and delivery.sent_count == 1
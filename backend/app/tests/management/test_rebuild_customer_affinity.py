@@ -0,0 +1,16 @@
+from io import StringIO
+
+import pytest
+from app.models import CustomerRestaurantAffinity, Order
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_rebuild_customer_affinity_backfills(customer, restaurant):
+    Order.objects.create(customer=customer, restaurant=restaurant, total_price=4, status="completed")
+
+    out = StringIO()
+    call_command("rebuild_customer_affinity", restaurant=restaurant.id, stdout=out)
+
+    assert "Rebuilt 1 affinity rows" in out.getvalue()
+    assert CustomerRestaurantAffinity.objects.get().order_count == 1
@@ -0,0 +1,24 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from app.models import DailySalesRollup, Order
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_rebuild_daily_sales_backfills_range(customer, restaurant):
+    start = timezone.now().replace(hour=12)
+    for days_ago in (0, 3):
+        Order.objects.create(
+            customer=customer, restaurant=restaurant, total_price=4, status="completed",
+            start_time=start - timedelta(days=days_ago),
+        )
+
+    out = StringIO()
+    since = (start - timedelta(days=1)).date().isoformat()
+    call_command("rebuild_daily_sales", restaurant=restaurant.id, since=since, stdout=out)
+
+    assert "Rebuilt 1 daily sales rows" in out.getvalue()
+    assert list(DailySalesRollup.objects.values_list("date", flat=True)) == [start.date()]
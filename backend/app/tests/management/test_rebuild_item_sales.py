@@ -0,0 +1,20 @@
+from io import StringIO
+
+import pytest
+from app.models import ItemDailySales, OrderItem
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_rebuild_item_sales_backfills(order, burger_item, restaurant):
+    OrderItem.objects.create(order=order, item=burger_item, quantity=2, unit_price=burger_item.price)
+    order.status = "completed"
+    order.start_time = timezone.now()
+    order.save()
+
+    out = StringIO()
+    call_command("rebuild_item_sales", restaurant=restaurant.id, stdout=out)
+
+    assert "Rebuilt 1 item sales rows" in out.getvalue()
+    assert ItemDailySales.objects.get().units == 2
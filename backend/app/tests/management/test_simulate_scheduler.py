@@ -0,0 +1,21 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def test_simulate_scheduler_reports_json():
+    out = StringIO()
+    call_command("simulate_scheduler", pattern="happy-hour", minutes=60, bartenders=2, stdout=out)
+    report = json.loads(out.getvalue())
+    assert report["pattern"] == "happy-hour"
+    assert report["mode"] == "memory"
+    assert report["orders"] > 0
+    assert set(report["latency_ms"]) == {"p50", "p95", "p99"}
+
+
+def test_recorded_pattern_requires_restaurant():
+    with pytest.raises(CommandError):
+        call_command("simulate_scheduler", pattern="recorded", stdout=StringIO())
@@ -35,6 +35,32 @@ def test_save_fcm_token_success(api_client, customer):
     # Confirm it was persisted
     customer.refresh_from_db()
     assert customer.fcm_token == "token123"
+    assert list(customer.devices.values_list("token", "active")) == [("token123", True)]
+
+
+@pytest.mark.django_db
+def test_save_fcm_token_registers_each_device(api_client, customer):
+    api_client.force_authenticate(user=customer.user)
+    for token in ("phone", "tablet", "phone"):
+        payload = {"customer_id": customer.id, "fcm_token": token}
+        api_client.post(URL, data=json.dumps(payload), content_type="application/json")
+
+    assert sorted(customer.devices.values_list("token", flat=True)) == ["phone", "tablet"]
+    customer.refresh_from_db()
+    assert customer.fcm_token == "phone"
+
+
+@pytest.mark.django_db
+def test_empty_fcm_token_deactivates_every_device(api_client, customer):
+    api_client.force_authenticate(user=customer.user)
+    for token in ("phone", "tablet", ""):
+        payload = {"customer_id": customer.id, "fcm_token": token}
+        resp = api_client.post(URL, data=json.dumps(payload), content_type="application/json")
+        assert resp.status_code == status.HTTP_200_OK
+
+    assert not customer.devices.filter(active=True).exists()
+    customer.refresh_from_db()
+    assert not customer.fcm_token
 
 
 @pytest.mark.django_db
@@ -1,7 +1,8 @@
 import base64
 import json
+from datetime import datetime, timedelta
 
-import requests
+import pytest
 from app.mobileViews import utils
 from django.conf import settings
 
@@ -28,86 +29,105 @@ def test_get_fcm_credentials_decodes_and_constructs(monkeypatch):
     assert 'firebase.messaging' in captured['scopes'][0]
 
 
-def test_send_fcm_httpv1_posts_correct_payload(monkeypatch):
-    # Prepare fake credentials
-    class DummyCreds:
-        def __init__(self):
-            self.token = 'tok_abc'
-            self.project_id = 'proj_456'
+class ExpiringCreds:
+    """Counts refreshes; every refresh yields a new token valid for an hour."""
 
-        def refresh(self, transport):
-            pass
+    project_id = 'proj_cache'
 
-    monkeypatch.setattr(utils, 'get_fcm_credentials', lambda: DummyCreds())
+    def __init__(self, clock):
+        self.clock = clock
+        self.refresh_calls = 0
+        self.token = None
+        self.expiry = None
 
-    # Monkeypatch requests.post
-    calls = {}
+    def refresh(self, transport):
+        self.refresh_calls += 1
+        self.token = f'tok_{self.refresh_calls}'
+        self.expiry = self.clock() + timedelta(hours=1)
 
-    def fake_post(url, headers=None, json=None):
-        calls['url'] = url
-        calls['headers'] = headers
-        calls['json'] = json
 
-        class Resp:
-            status_code = 202
+def make_cache(monkeypatch, loads=None):
+    now = [datetime(2026, 1, 1, 12, 0)]
+    creds = ExpiringCreds(lambda: now[0])
 
-            def json(self_inner):
-                return {'result': 'ok'}
+    def load():
+        if loads is not None:
+            loads.append(1)
+        return creds
 
-        return Resp()
+    monkeypatch.setattr(utils, 'get_fcm_credentials', load)
+    cache = utils.FcmCredentialCache(refresh_margin=300, refresh_ahead=600, clock=lambda: now[0])
+    return cache, creds, now
 
-    monkeypatch.setattr(requests, 'post', fake_post)
 
-    resp = utils.send_fcm_httpv1('device123', 'Title', 'Body', data={'order_id': '42'})
-    assert resp.status_code == 202
-    assert resp.json() == {'result': 'ok'}
+def test_credential_cache_reuses_token_until_near_expiry(monkeypatch):
+    loads = []
+    cache, creds, now = make_cache(monkeypatch, loads)
 
-    # Check URL and headers
-    assert calls['url'] == 'https://fcm.googleapis.com/v1/projects/proj_456/messages:send'
-    assert 'Authorization' in calls['headers'] and 'Bearer tok_abc' in calls['headers']['Authorization']
-    # Verify payload structure
-    assert calls['json']['message']['token'] == 'device123'
-    data_field = calls['json']['message']['data']
-    assert data_field['type'] == 'ORDER_UPDATE'
-    assert data_field['order_id'] == '42'
-    assert data_field['title'] == 'Title'
-    assert data_field['body'] == 'Body'
+    assert cache.token() == ('tok_1', 'proj_cache')
+    now[0] += timedelta(minutes=40)
+    assert cache.token() == ('tok_1', 'proj_cache')
+    assert (cache.refreshes, cache.hits, len(loads)) == (1, 1, 1)
 
+    # Less than the margin left: refreshed inline
+    now[0] += timedelta(minutes=16)
+    assert cache.token() == ('tok_2', 'proj_cache')
+    assert cache.refreshes == 2 and len(loads) == 1
 
-def test_send_notification_to_device_posts_notification(monkeypatch):
-    class DummyCreds:
-        def __init__(self):
-            self.token = 'tok_xyz'
-            self.project_id = 'proj_789'
 
-        def refresh(self, transport):
-            pass
+def test_credential_cache_refreshes_ahead_in_background(monkeypatch):
+    cache, creds, now = make_cache(monkeypatch)
+    cache.token()
+
+    now[0] += timedelta(minutes=52)
+    assert cache.token() == ('tok_1', 'proj_cache')
+    cache._background.join(timeout=5)
+    assert cache.background_refreshes == 1
+
+    assert cache.token() == ('tok_2', 'proj_cache')
+    assert cache.refreshes == 2
+
 
-    monkeypatch.setattr(utils, 'get_fcm_credentials', lambda: DummyCreds())
+def test_credential_cache_reloads_when_setting_changes(monkeypatch):
+    loads = []
+    cache, creds, now = make_cache(monkeypatch, loads)
+    cache.token()
+    monkeypatch.setattr(settings, 'FIREBASE_CREDENTIALS_JSON', 'rotated')
+    cache.token()
+    assert len(loads) == 2 and cache.refreshes == 2
 
-    calls = {}
 
-    def fake_post(url, headers=None, json=None):
-        calls['url'] = url
-        calls['headers'] = headers
-        calls['json'] = json
+def test_credential_cache_invalidate_forces_refresh(monkeypatch):
+    cache, creds, now = make_cache(monkeypatch)
+    cache.token()
+    cache.invalidate()
+    assert cache.token() == ('tok_2', 'proj_cache')
 
-        class Resp:
-            status_code = 200
 
-            def json(self_inner):
-                return {'delivered': True}
+def test_send_fcm_message_reuses_cached_token(monkeypatch, fake_fcm):
+    refreshes = []
+
+    class Creds:
+        token = 'tok_once'
+        project_id = 'proj'
+        expiry = None
+
+        def refresh(self, transport):
+            refreshes.append(1)
+
+    monkeypatch.setattr(utils, 'get_fcm_credentials', lambda: Creds())
+    for _ in range(3):
+        utils.send_fcm_message('dev', 'Title', 'Body')
 
-        return Resp()
+    assert len(refreshes) == 1
+    assert [r['headers']['Authorization'] for r in fake_fcm.requests] == ['Bearer tok_once'] * 3
 
-    monkeypatch.setattr(requests, 'post', fake_post)
 
-    resp = utils.send_notification_to_device('dev456', 'Notif', 'Hello', data={'key': 'val'})
-    assert resp.status_code == 200
-    assert resp.json() == {'delivered': True}
+def test_send_fcm_message_drops_token_on_401(monkeypatch, fake_fcm):
+    fake_fcm.respond(401, {'error': {'status': 'UNAUTHENTICATED'}})
+    with pytest.raises(utils.FcmSendError) as excinfo:
+        utils.send_fcm_message('dev', 'Title', 'Body')
+    assert not excinfo.value.permanent
 
-    assert calls['url'] == 'https://fcm.googleapis.com/v1/projects/proj_789/messages:send'
-    payload = calls['json']['message']
-    assert payload['token'] == 'dev456'
-    assert 'notification' in payload and payload['notification']['title'] == 'Notif'
-    assert payload['data'] == {'key': 'val'}
+    utils.send_fcm_message('dev', 'Title', 'Body')
+    assert utils.fcm_credentials.refreshes == 2
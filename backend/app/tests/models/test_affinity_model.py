@@ -0,0 +1,20 @@
+import pytest
+from app.models.affinity_models import CustomerRestaurantAffinity
+from django.db import IntegrityError
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_affinity_defaults_str_and_uniqueness(customer, restaurant):
+    now = timezone.now()
+    affinity = CustomerRestaurantAffinity.objects.create(
+        customer=customer, restaurant=restaurant, first_order_at=now, last_order_at=now
+    )
+    assert affinity.order_count == 0
+    assert affinity.total_spent == 0
+    assert str(affinity) == f"{customer.user.username} @ {restaurant.name}: 0 orders"
+
+    with pytest.raises(IntegrityError):
+        CustomerRestaurantAffinity.objects.create(
+            customer=customer, restaurant=restaurant, first_order_at=now, last_order_at=now
+        )
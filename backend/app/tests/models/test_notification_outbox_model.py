@@ -0,0 +1,20 @@
+import pytest
+from app.models.notification_models import DeviceToken, NotificationOutbox
+
+
+@pytest.mark.django_db
+def test_notification_outbox_defaults_and_str():
+    entry = NotificationOutbox.objects.create(device_token="abcdefghijklmnop", title="Hi", body="there")
+    assert entry.status == "pending"
+    assert entry.attempts == 0
+    assert entry.data == {}
+    assert entry.dedup_key is None
+    assert str(entry) == "Hi -> abcdefghijkl (pending)"
+
+
+@pytest.mark.django_db
+def test_device_token_defaults_and_str(customer):
+    device = DeviceToken.objects.create(customer=customer, token="abcdefghijklmnop")
+    assert device.active is True
+    assert device.failure_count == 0
+    assert str(device) == f"abcdefghijkl for {customer.user.username} (active)"
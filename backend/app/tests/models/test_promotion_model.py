@@ -1,5 +1,5 @@
 import pytest
-from app.models.promotion_models import PromotionNotification
+from app.models.promotion_models import PromotionDelivery, PromotionNotification
 from django.utils import timezone
 
 
@@ -21,3 +21,14 @@ def test_promotion_defaults_and_str(restaurant_with_user):
     assert before <= promo.created_at <= after
     # __str__ returns 'title - restaurant name'
     assert str(promo) == f"Test Promo - {restaurant.name}"
+
+
+@pytest.mark.django_db
+def test_promotion_delivery_defaults_and_str(restaurant_with_user):
+    restaurant, _ = restaurant_with_user
+    promo = PromotionNotification.objects.create(restaurant=restaurant, title="Test Promo", body="b")
+    delivery = PromotionDelivery.objects.create(promotion=promo)
+
+    assert delivery.status == "queued"
+    assert (delivery.total_recipients, delivery.sent_count, delivery.failed_count) == (0, 0, 0)
+    assert str(delivery) == f"Delivery {delivery.id} of Test Promo (queued)"
@@ -0,0 +1,10 @@
+import pytest
+from app.models.scheduler_models import SchedulerState
+
+
+@pytest.mark.django_db
+def test_scheduler_state_defaults_and_str(restaurant):
+    state = SchedulerState.objects.create(restaurant=restaurant)
+    assert state.version == 0
+    assert state.state == {}
+    assert str(state) == f"Scheduler state v0 for {restaurant.name}"
@@ -0,0 +1,24 @@
+import pytest
+from app.models.stats_models import DailySalesRollup, ItemDailySales
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_daily_sales_rollup_defaults_and_str(restaurant):
+    today = timezone.now().date()
+    rollup = DailySalesRollup.objects.create(restaurant=restaurant, date=today)
+    assert rollup.total_orders == 0
+    assert rollup.active_workers == 0
+    assert rollup.hourly_orders == [0] * 24
+    assert rollup.hourly_sales == ["0.00"] * 24
+    assert str(rollup) == f"{restaurant.name} {today}: 0 orders"
+
+
+@pytest.mark.django_db
+def test_item_daily_sales_avg_rating_and_str(burger_item, restaurant):
+    today = timezone.now().date()
+    row = ItemDailySales.objects.create(item=burger_item, restaurant=restaurant, date=today, units=3)
+    assert row.avg_rating is None
+    row.rating_sum, row.rating_count = 9, 2
+    assert row.avg_rating == 4.5
+    assert str(row) == f"Burger {today}: 3 sold"
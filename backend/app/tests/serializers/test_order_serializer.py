@@ -75,8 +75,8 @@ def test_order_serializer_create(customer, restaurant):
     assert data["reviewed"] is False
     assert data.get("worker_name") is None
 
-    # Total price should be a string
-    assert data["total_price"] == Decimal("0.00")
+    # Total price is computed from the item prices on create
+    assert data["total_price"] == Decimal("9.99")
 
 
 @pytest.mark.django_db
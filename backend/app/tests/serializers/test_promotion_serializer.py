@@ -17,7 +17,7 @@ def test_promotion_serializer_serializes_all_fields(restaurant_with_user):
     data = serializer.data
 
     # All model fields should appear in serialized data
-    expected_keys = {"id", "restaurant", "title", "body", "created_at", "sent"}
+    expected_keys = {"id", "restaurant", "title", "body", "created_at", "sent", "ordered_within_days"}
     assert set(data.keys()) == expected_keys
     # Values match
     assert data["restaurant"] == restaurant.id
@@ -1,3 +1,4 @@
+import random
 from datetime import timedelta
 
 import pytest
@@ -88,3 +89,52 @@ def test_internal_state_after_adding_orders(scheduler):
         (now, now + timedelta(minutes=10)),
         (now + timedelta(minutes=15), now + timedelta(minutes=20)),
     ]
+
+
+def test_prunes_intervals_that_ended_before_now(scheduler):
+    now = timezone.now()
+    scheduler.add_order(now - timedelta(minutes=30), 10)
+    scheduler.add_order(now + timedelta(minutes=5), 5)
+    scheduler.find_free_slot(now, 5)
+    assert scheduler.busy_intervals == [
+        (now + timedelta(minutes=5), now + timedelta(minutes=10)),
+    ]
+
+
+def test_gap_after_expired_interval_allows_exact_fit(scheduler):
+    now = timezone.now()
+    # An interval that already finished still counts as "before" the next gap
+    scheduler.add_order(now - timedelta(minutes=20), 10)
+    scheduler.add_order(now + timedelta(minutes=5), 5)
+    assert scheduler.find_free_slot(now, 5) == now
+
+
+def test_matches_linear_scan_on_random_schedules():
+    def linear_free_slot(intervals, now_dt, required):
+        slot_start = now_dt
+        first_gap = True
+        for busy_start, busy_end in sorted(intervals):
+            if slot_start < busy_start:
+                gap = (busy_start - slot_start).total_seconds() / 60
+                if (first_gap and gap > required) or (not first_gap and gap >= required):
+                    return slot_start
+            if slot_start < busy_end:
+                slot_start = busy_end
+            first_gap = False
+        return slot_start
+
+    rng = random.Random(42)
+    base = timezone.now().replace(second=0, microsecond=0)
+    for _ in range(50):
+        scheduler = BartenderScheduler()
+        intervals = []
+        for _ in range(rng.randint(0, 40)):
+            start = base + timedelta(minutes=rng.randint(0, 120))
+            duration = rng.randint(1, 8)
+            scheduler.add_order(start, duration)
+            intervals.append((start, start + timedelta(minutes=duration)))
+        # Queries move forward in time, like the real request stream
+        for offset in sorted(rng.randint(0, 20) for _ in range(5)):
+            now = base + timedelta(minutes=offset)
+            required = rng.randint(0, 10)
+            assert scheduler.find_free_slot(now, required) == linear_free_slot(intervals, now, required)
@@ -0,0 +1,62 @@
+import pytest
+from app.mobileViews.utils import FcmSendError
+from app.models import Customer, CustomUser, DeviceToken
+from app.utils.device_tokens import (
+    deactivate_device_tokens,
+    record_send_outcomes,
+    register_device_token,
+)
+
+
+@pytest.mark.django_db
+def test_register_adds_devices_and_mirrors_latest(customer):
+    register_device_token(customer, "phone")
+    register_device_token(customer, "tablet")
+
+    assert sorted(customer.devices.values_list("token", flat=True)) == ["phone", "tablet"]
+    customer.refresh_from_db()
+    assert customer.fcm_token == "tablet"
+
+
+@pytest.mark.django_db
+def test_register_moves_token_to_new_account_and_revives_it(customer):
+    register_device_token(customer, "phone")
+    deactivate_device_tokens(["phone"], "UNREGISTERED")
+    other = Customer.objects.create(user=CustomUser.objects.create_user(username="o", email="o@x.com", password="p"))
+
+    device = register_device_token(other, "phone")
+
+    assert DeviceToken.objects.count() == 1
+    assert (device.customer_id, device.active, device.failure_count) == (other.id, True, 0)
+
+
+@pytest.mark.django_db
+def test_deactivate_clears_mirrored_token(customer):
+    register_device_token(customer, "phone")
+    assert deactivate_device_tokens(["phone"], "FCM returned 404 UNREGISTERED") == 1
+
+    device = DeviceToken.objects.get()
+    assert not device.active and device.failure_count == 1 and "UNREGISTERED" in device.last_error
+    customer.refresh_from_db()
+    assert customer.fcm_token is None
+    assert deactivate_device_tokens(["phone"]) == 0
+
+
+@pytest.mark.django_db
+def test_send_outcomes_only_deactivate_dead_tokens(customer):
+    for token in ("ok", "dead", "flaky"):
+        register_device_token(customer, token)
+    DeviceToken.objects.filter(token="ok").update(failure_count=2)
+
+    record_send_outcomes(
+        delivered=["ok"],
+        errors=[
+            ("dead", FcmSendError("FCM returned 404 UNREGISTERED", 404, permanent=True)),
+            ("flaky", FcmSendError("FCM returned 503", 503)),
+        ],
+    )
+
+    devices = {device.token: device for device in DeviceToken.objects.all()}
+    assert (devices["ok"].active, devices["ok"].failure_count) == (True, 0)
+    assert (devices["dead"].active, devices["dead"].failure_count) == (False, 1)
+    assert (devices["flaky"].active, devices["flaky"].failure_count) == (True, 1)
@@ -1,8 +1,11 @@
 # app/tests/utils/test_eta_calculator.py
 
+from datetime import timedelta
 
 import pytest
 from app.utils.eta_calculator import (
+    batch_beverage_ready_times,
+    batch_food_ready_times,
     calculate_beverage_eta_multibartender,
     calculate_food_eta,
     round_to_nearest_five,
@@ -62,3 +65,25 @@ def test_calculate_beverage_eta_multibartender_with_overlapping_orders(multi_sch
     beverage_eta, finish_dt, bartender_idx = calculate_beverage_eta_multibartender(2, now, multi_scheduler)
     assert beverage_eta == 12
     assert bartender_idx == 0
+
+
+def test_batch_food_ready_times_matches_single_order():
+    now = timezone.now().replace(second=0, microsecond=0)
+    ready = batch_food_ready_times([0, 1, 3], now)
+    assert ready[0] is None
+    assert ready[1] == now + timedelta(minutes=round_to_nearest_five(calculate_food_eta(1)))
+    assert ready[2] == now + timedelta(minutes=25)
+
+
+def test_batch_beverage_ready_times_books_in_queue_order():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scheduler = MultiBartenderScheduler(num_bartenders=2)
+    results = batch_beverage_ready_times([3, 0, 3, 2], now, scheduler)
+
+    assert results[1] is None
+    assert [r[0] for r in (results[0], results[2], results[3])] == [
+        now + timedelta(minutes=3),
+        now + timedelta(minutes=3),
+        now + timedelta(minutes=5),
+    ]
+    assert results[3][1] == 0
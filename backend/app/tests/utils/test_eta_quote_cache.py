@@ -0,0 +1,44 @@
+import pytest
+from app.utils import eta_quote_cache as cache_module
+from app.utils.eta_quote_cache import EtaQuoteCache
+
+
+@pytest.fixture
+def cache():
+    return EtaQuoteCache(ttl_seconds=30, max_entries=2)
+
+
+def test_miss_then_hit(cache):
+    key = cache.make_key(1, 2, 3, "bucket", 0)
+    assert cache.get(key) is None
+    cache.set(key, {"food_eta_minutes": 20})
+    assert cache.get(key) == {"food_eta_minutes": 20}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    key = cache.make_key(1, 0, 1, "bucket", 0)
+    cache.set(key, {"beverage_eta_minutes": 5})
+    now = cache_module.time.monotonic()
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now + 31)
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_only_affects_one_restaurant(cache):
+    key_a = cache.make_key(1, 1, 0, "bucket", 0)
+    key_b = cache.make_key(2, 1, 0, "bucket", 0)
+    cache.set(key_a, "a")
+    cache.set(key_b, "b")
+
+    cache.invalidate(1)
+    assert cache.get(cache.make_key(1, 1, 0, "bucket", 0)) is None
+    assert cache.get(cache.make_key(2, 1, 0, "bucket", 0)) == "b"
+
+
+def test_oldest_entries_evicted(cache):
+    for food in range(3):
+        cache.set(cache.make_key(1, food, 0, "bucket", 0), food)
+    assert cache.get(cache.make_key(1, 0, 0, "bucket", 0)) is None
+    assert cache.get(cache.make_key(1, 2, 0, "bucket", 0)) == 2
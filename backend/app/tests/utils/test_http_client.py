@@ -0,0 +1,62 @@
+import pytest
+import requests
+from app.mobileViews.utils import send_fcm_message
+from app.utils.http_client import OutboundHttp, outbound_http
+
+
+def test_fcm_sends_reuse_one_pooled_connection(fake_fcm):
+    for _ in range(3):
+        send_fcm_message("device-1", "Title", "Body")
+
+    assert outbound_http.host_stats(fake_fcm.url) == {"requests": 3, "connections": 1, "reused": 2}
+
+
+def test_default_timeout_applies_unless_overridden(monkeypatch):
+    client = OutboundHttp(connect_timeout=1, read_timeout=7)
+    calls = []
+    monkeypatch.setattr(client.session, "request", lambda method, url, **kwargs: calls.append(kwargs["timeout"]))
+
+    client.get("https://example.com/")
+    client.post("https://example.com/", timeout=2)
+    assert calls == [(1, 7), 2]
+
+
+def test_session_is_rebuilt_after_fork(monkeypatch):
+    client = OutboundHttp()
+    first = client.session
+    assert client.session is first
+
+    monkeypatch.setattr("app.utils.http_client.os.getpid", lambda: -1)
+    assert client.session is not first
+
+
+def test_pool_limits_are_applied():
+    client = OutboundHttp(pool_hosts=3, pool_maxsize=7)
+    adapter = client.session.get_adapter("https://fcm.googleapis.com")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+    assert adapter._pool_block is True
+    assert client.stats() == {}
+
+
+def test_pool_size_is_a_hard_limit(fake_fcm):
+    client = OutboundHttp(pool_maxsize=1, pool_timeout=0.2)
+    # An unread streamed response keeps the only connection checked out
+    held = client.post(f"{fake_fcm.url}/held", json={}, stream=True)
+
+    with pytest.raises(requests.ConnectionError):
+        client.post(f"{fake_fcm.url}/extra", json={})
+    held.close()
+    assert client.post(f"{fake_fcm.url}/after", json={}).status_code == 200
+    assert client.host_stats(fake_fcm.url)["connections"] == 1
+    client.close()
+
+
+def test_closing_the_pool_opens_fresh_connections(fake_fcm):
+    send_fcm_message("device-1", "Title", "Body")
+    outbound_http.close()
+    assert outbound_http.stats() == {}
+
+    send_fcm_message("device-1", "Title", "Body")
+    assert outbound_http.host_stats(fake_fcm.url)["connections"] == 1
+    assert len(fake_fcm.requests) == 2
@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from app.models import Item, ItemDailySales, Order, OrderItem, Review
+from app.utils.item_sales import (
+    increment_times_ordered,
+    item_statistics,
+    item_trend,
+    rebuild_item_sales,
+    record_item_rating,
+    record_item_sales,
+)
+
+
+DAY = datetime(2026, 4, 10, 19, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def beer(restaurant):
+    return Item.objects.create(restaurant=restaurant, name="Beer", price=Decimal("6.00"), category="Drinks")
+
+
+def sold_order(customer, restaurant, lines, start=DAY, status="completed"):
+    order = Order.objects.create(customer=customer, restaurant=restaurant, status=status, start_time=start)
+    for item, quantity in lines:
+        OrderItem.objects.create(order=order, item=item, quantity=quantity, unit_price=item.price)
+    return order
+
+
+@pytest.fixture
+def history(customer, restaurant, burger_item, beer):
+    first = sold_order(customer, restaurant, [(burger_item, 1), (beer, 2)])
+    # The burger got more expensive; earlier lines keep their price
+    burger_item.price = Decimal("12.00")
+    burger_item.save()
+    second = sold_order(customer, restaurant, [(burger_item, 2), (beer, 1), (beer, 1)], start=DAY + timedelta(days=1))
+    return first, second
+
+
+@pytest.mark.django_db
+def test_record_item_sales_uses_line_prices(history, burger_item, beer, restaurant):
+    for order in history:
+        record_item_sales(order)
+
+    burger = {row.date: row for row in ItemDailySales.objects.filter(item=burger_item)}
+    assert burger[date(2026, 4, 10)].revenue == Decimal("9.99")
+    assert (burger[date(2026, 4, 11)].units, burger[date(2026, 4, 11)].revenue) == (2, Decimal("24.00"))
+    beer_day = ItemDailySales.objects.get(item=beer, date=date(2026, 4, 11))
+    assert (beer_day.units, beer_day.orders, beer_day.revenue) == (2, 1, Decimal("12.00"))
+
+
+@pytest.mark.django_db
+def test_first_row_of_the_day_includes_earlier_orders(customer, restaurant, burger_item, beer):
+    # Completed before the item rows were deployed
+    earlier = sold_order(customer, restaurant, [(burger_item, 2), (beer, 1)])
+    Review.objects.create(order=earlier, rating=5)
+    record_item_sales(sold_order(customer, restaurant, [(burger_item, 1)], start=DAY + timedelta(hours=1)))
+
+    burger = ItemDailySales.objects.get(item=burger_item, date=DAY.date())
+    assert (burger.units, burger.orders, burger.revenue, burger.avg_rating) == (3, 2, Decimal("29.97"), 5)
+    assert not ItemDailySales.objects.filter(item=beer).exists()
+
+
+@pytest.mark.django_db
+def test_ratings_are_added_per_order_line(history, beer):
+    for order in history:
+        record_item_sales(order)
+    record_item_rating(Review.objects.create(order=history[1], rating=4))
+
+    beer_day = ItemDailySales.objects.get(item=beer, date=date(2026, 4, 11))
+    assert (beer_day.rating_sum, beer_day.rating_count) == (8, 2)
+
+
+@pytest.mark.django_db
+def test_item_statistics_ranks_in_one_query(history, restaurant, burger_item, beer, django_assert_num_queries):
+    for order in history:
+        record_item_sales(order)
+    Review.objects.create(order=history[0], rating=2)
+    record_item_rating(history[0].review)
+    unsold = Item.objects.create(restaurant=restaurant, name="Wings", price=8, category="Food")
+
+    with django_assert_num_queries(1):
+        stats = item_statistics(restaurant.id)
+    assert [row["name"] for row in stats] == ["Beer", "Burger", "Wings"]
+    assert stats[0] == {
+        "id": beer.id, "name": "Beer", "price": Decimal("6.00"), "times_ordered": 0,
+        "units_sold": 4, "orders": 2, "sales": Decimal("24.00"), "avg_rating": 2.0,
+    }
+    assert stats[2]["id"] == unsold.id and stats[2]["units_sold"] == 0 and stats[2]["avg_rating"] is None
+
+    by_revenue = item_statistics(restaurant.id, sort="revenue", limit=1)
+    assert [row["name"] for row in by_revenue] == ["Burger"]
+    first_day = item_statistics(restaurant.id, until=date(2026, 4, 10))
+    assert [(row["name"], row["units_sold"]) for row in first_day] == [("Beer", 2), ("Burger", 1), ("Wings", 0)]
+
+
+@pytest.mark.django_db
+def test_item_trend_is_ordered_by_day(history, burger_item):
+    for order in reversed(history):
+        record_item_sales(order)
+    trend = item_trend(burger_item.id)
+    assert [(row["date"], row["units_sold"]) for row in trend] == [(date(2026, 4, 10), 1), (date(2026, 4, 11), 2)]
+    assert item_trend(burger_item.id, since=date(2026, 4, 11))[0]["sales"] == Decimal("24.00")
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental(history, customer, restaurant, burger_item):
+    for order in history:
+        record_item_sales(order)
+    record_item_rating(Review.objects.create(order=history[1], rating=5))
+    incremental = sorted(ItemDailySales.objects.values_list(
+        "item_id", "date", "units", "orders", "revenue", "rating_sum", "rating_count"
+    ))
+    sold_order(customer, restaurant, [(burger_item, 5)], status="cancelled")
+
+    assert rebuild_item_sales(restaurant.id) == 4
+    rebuilt = sorted(ItemDailySales.objects.values_list(
+        "item_id", "date", "units", "orders", "revenue", "rating_sum", "rating_count"
+    ))
+    assert rebuilt == incremental
+
+
+@pytest.mark.django_db
+def test_increment_times_ordered_is_one_statement(customer, restaurant, burger_item, beer, django_assert_num_queries):
+    order = sold_order(customer, restaurant, [(burger_item, 2), (beer, 1), (beer, 3)])
+    Item.objects.filter(id=beer.id).update(times_ordered=10)
+
+    with django_assert_num_queries(1):
+        assert increment_times_ordered(order) == 2
+
+    assert Item.objects.get(id=burger_item.id).times_ordered == 2
+    assert Item.objects.get(id=beer.id).times_ordered == 14
@@ -1,9 +1,10 @@
 # app/tests/utils/test_multi_bartender_scheduler.py
 
+import random
 from datetime import timedelta
 
 import pytest
-from app.utils.multi_bartender_scheduler import MultiBartenderScheduler
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler, PlannedOrder
 from django.utils import timezone
 
 
@@ -73,3 +74,110 @@ def test_exact_fit_slot(multi_scheduler):
     free_start, bartender_index = multi_scheduler.find_best_free_slot(now, 5)
     assert free_start == now
     assert bartender_index == 1
+
+
+def _greedy_assign(scheduler, now, durations):
+    assignments = []
+    for duration in durations:
+        start, idx = scheduler.find_best_free_slot(now, duration)
+        scheduler.add_order_to_bartender(idx, start, duration)
+        assignments.append((start, idx))
+    return assignments
+
+
+def test_heap_mode_enabled_for_large_pools():
+    assert MultiBartenderScheduler(num_bartenders=12).use_heap
+    assert not MultiBartenderScheduler(num_bartenders=2).use_heap
+
+
+def test_heap_mode_matches_scan_mode():
+    rng = random.Random(7)
+    now = timezone.now().replace(second=0, microsecond=0)
+    durations = [rng.randint(1, 6) for _ in range(200)]
+
+    scan = MultiBartenderScheduler(num_bartenders=12, use_heap=False)
+    heap = MultiBartenderScheduler(num_bartenders=12, use_heap=True)
+
+    assert heap.assign_orders(now, durations) == _greedy_assign(scan, now, durations)
+
+
+def test_heap_mode_tracks_later_queries():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scan = MultiBartenderScheduler(num_bartenders=3, use_heap=False)
+    heap = MultiBartenderScheduler(num_bartenders=3, use_heap=True)
+    for scheduler in (scan, heap):
+        scheduler.assign_orders(now, [4, 2, 6, 3])
+
+    later = now + timedelta(minutes=3)
+    assert heap.find_best_free_slot(later, 2) == scan.find_best_free_slot(later, 2)
+
+
+def test_heap_mode_falls_back_when_booking_leaves_gap():
+    now = timezone.now()
+    heap = MultiBartenderScheduler(num_bartenders=2, use_heap=True)
+    heap.find_best_free_slot(now, 5)
+    heap.add_order_to_bartender(0, now + timedelta(minutes=20), 5)
+    heap.add_order_to_bartender(1, now, 30)
+
+    # Bartender 0 is free until now+20, which only the full scan can see
+    assert heap.find_best_free_slot(now, 5) == (now, 0)
+
+
+def test_reset_clears_bookings(multi_scheduler):
+    now = timezone.now()
+    multi_scheduler.assign_orders(now, [5, 5, 5])
+    multi_scheduler.reset()
+    assert all(not s.busy_intervals for s in multi_scheduler.schedulers)
+    assert multi_scheduler.find_best_free_slot(now, 5) == (now, 0)
+
+
+def _plan(scheduler, now, durations):
+    scheduler.reset(now)
+    scheduler.planned_orders = [
+        PlannedOrder(order_id, 0, duration, None, slot + timedelta(minutes=duration), idx, slot)
+        for order_id, (duration, (slot, idx)) in enumerate(zip(durations, scheduler.assign_orders(now, durations)))
+    ]
+
+
+def test_resize_shrink_keeps_orders_before_removed_bartender():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scheduler = MultiBartenderScheduler(num_bartenders=3)
+    _plan(scheduler, now, [5, 5, 5, 5])
+
+    scheduler.resize(2)
+    assert scheduler.num_bartenders == 2
+    # The third order was booked on bartender 2, so planning restarts there
+    assert [p.order_id for p in scheduler.planned_orders] == [0, 1]
+    assert scheduler.find_best_free_slot(now, 5) == (now + timedelta(minutes=5), 0)
+
+
+def test_resize_grow_replans_from_first_waiting_order():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scheduler = MultiBartenderScheduler(num_bartenders=1)
+    _plan(scheduler, now, [5, 5, 5])
+    version = scheduler.version
+
+    scheduler.resize(2)
+    assert scheduler.num_bartenders == 2
+    assert [p.order_id for p in scheduler.planned_orders] == [0]
+    assert scheduler.find_best_free_slot(now, 5) == (now, 1)
+    assert scheduler.version > version
+
+
+def test_resize_switches_between_scan_and_heap_mode():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scheduler = MultiBartenderScheduler(num_bartenders=2)
+    scan = MultiBartenderScheduler(num_bartenders=2, use_heap=False)
+    for pool in (scheduler, scan):
+        _plan(pool, now, [5] * 12)
+        pool.resize(MultiBartenderScheduler.HEAP_MIN_BARTENDERS)
+    assert scheduler.use_heap and not scan.use_heap
+    assert scheduler.assign_orders(now, [3] * 15) == scan.assign_orders(now, [3] * 15)
+
+    scheduler.resize(3)
+    assert not scheduler.use_heap
+    # An explicit choice survives resizes and snapshots
+    pinned = MultiBartenderScheduler(num_bartenders=2, use_heap=True)
+    pinned.resize(4)
+    assert pinned.use_heap
+    assert MultiBartenderScheduler.from_snapshot(scheduler.snapshot())._auto_heap
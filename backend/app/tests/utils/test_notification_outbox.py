@@ -0,0 +1,189 @@
+import time
+from datetime import timedelta
+
+import pytest
+from app.models.notification_models import NotificationOutbox
+from app.utils.device_tokens import deactivate_device_tokens, register_device_token
+from app.utils.notification_outbox import (
+    claim_due,
+    enqueue_notification,
+    enqueue_order_update,
+    notification_dispatcher,
+    retry_delay,
+)
+from django.utils import timezone
+
+
+@pytest.fixture
+def manual_dispatch(settings):
+    settings.NOTIFICATION_DISPATCH_MODE = "manual"
+    settings.NOTIFICATION_RETRY_BASE_SECONDS = 5
+    settings.NOTIFICATION_MAX_ATTEMPTS = 3
+
+
+@pytest.mark.django_db
+def test_enqueue_dedups_on_key(manual_dispatch):
+    first, created = enqueue_notification("tok", "Hi", "there", dedup_key="k1")
+    again, created_again = enqueue_notification("tok", "Hi", "there", dedup_key="k1")
+    assert created and not created_again
+    assert first.pk == again.pk
+    assert NotificationOutbox.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_order_update_is_queued_once_per_status(order, manual_dispatch):
+    device = register_device_token(order.customer, "device-1")
+
+    enqueue_order_update(order)
+    enqueue_order_update(order)
+    order.status = "in_progress"
+    enqueue_order_update(order)
+
+    entries = list(NotificationOutbox.objects.order_by("id"))
+    assert [entry.dedup_key for entry in entries] == [
+        f"order:{order.id}:pending:{device.id}",
+        f"order:{order.id}:in_progress:{device.id}",
+    ]
+    assert entries[1].body == f"Your order #{order.id} is now in_progress"
+
+
+@pytest.mark.django_db
+def test_order_update_goes_to_each_active_device(order, manual_dispatch):
+    assert enqueue_order_update(order) == []
+
+    register_device_token(order.customer, "phone")
+    register_device_token(order.customer, "tablet")
+    register_device_token(order.customer, "old-phone")
+    deactivate_device_tokens(["old-phone"])
+    enqueue_order_update(order)
+
+    assert sorted(NotificationOutbox.objects.values_list("device_token", flat=True)) == ["phone", "tablet"]
+
+
+@pytest.mark.django_db
+def test_dispatch_sends_one_combined_message(fake_fcm, manual_dispatch):
+    enqueue_notification("device-1", "Order Update", "ready", data={"order_id": 7}, dedup_key="k")
+
+    assert notification_dispatcher.dispatch_due() == {"sent": 1, "pending": 0, "failed": 0}
+
+    assert len(fake_fcm.requests) == 1
+    sent = fake_fcm.requests[0]
+    assert sent["path"] == "/v1/projects/test-project/messages:send"
+    assert sent["headers"]["Authorization"] == "Bearer test-token"
+    message = sent["json"]["message"]
+    assert message["token"] == "device-1"
+    assert message["notification"] == {"title": "Order Update", "body": "ready"}
+    assert message["data"] == {"order_id": "7"}
+
+    entry = NotificationOutbox.objects.get()
+    assert entry.status == "sent" and entry.attempts == 1 and entry.sent_at is not None
+
+
+@pytest.mark.django_db
+def test_transient_errors_retry_with_backoff(fake_fcm, manual_dispatch):
+    fake_fcm.respond(503, {"error": {"status": "UNAVAILABLE"}})
+    fake_fcm.respond(429, {"error": {"status": "RESOURCE_EXHAUSTED"}})
+    enqueue_notification("device-1", "t", "b")
+    now = timezone.now()
+
+    assert notification_dispatcher.dispatch_due(now)["pending"] == 1
+    entry = NotificationOutbox.objects.get()
+    assert entry.next_attempt_at == now + timedelta(seconds=5)
+    assert "503" in entry.last_error
+
+    # Not due yet
+    assert notification_dispatcher.dispatch_due(now + timedelta(seconds=4))["pending"] == 0
+
+    later = now + timedelta(seconds=5)
+    assert notification_dispatcher.dispatch_due(later)["pending"] == 1
+    assert NotificationOutbox.objects.get().next_attempt_at == later + timedelta(seconds=10)
+
+    assert notification_dispatcher.dispatch_due(later + timedelta(seconds=10))["sent"] == 1
+    assert len(fake_fcm.requests) == 3
+
+
+@pytest.mark.django_db
+def test_gives_up_after_max_attempts(fake_fcm, manual_dispatch):
+    for _ in range(3):
+        fake_fcm.respond(500)
+    enqueue_notification("device-1", "t", "b")
+    now = timezone.now()
+    for step in range(3):
+        notification_dispatcher.dispatch_due(now + timedelta(hours=step))
+
+    entry = NotificationOutbox.objects.get()
+    assert entry.status == "failed" and entry.attempts == 3
+    assert notification_dispatcher.dispatch_due(now + timedelta(days=1))["failed"] == 0
+
+
+@pytest.mark.django_db
+def test_unregistered_token_fails_without_retry(fake_fcm, manual_dispatch):
+    fake_fcm.respond(404, {"error": {"status": "NOT_FOUND", "details": [{"errorCode": "UNREGISTERED"}]}})
+    enqueue_notification("stale", "t", "b")
+
+    assert notification_dispatcher.dispatch_due()["failed"] == 1
+    entry = NotificationOutbox.objects.get()
+    assert entry.status == "failed" and "UNREGISTERED" in entry.last_error
+
+
+@pytest.mark.django_db
+def test_unreachable_fcm_is_retried(manual_dispatch, fake_fcm):
+    fake_fcm.close()
+    enqueue_notification("device-1", "t", "b")
+    assert notification_dispatcher.dispatch_due()["pending"] == 1
+    assert "unreachable" in NotificationOutbox.objects.get().last_error
+
+
+@pytest.mark.django_db
+def test_abandoned_sends_are_reclaimed_after_lease(manual_dispatch):
+    enqueue_notification("device-1", "t", "b")
+    now = timezone.now()
+    assert len(claim_due(now, 10)) == 1
+    assert claim_due(now, 10) == []
+
+    reclaimed = claim_due(now + timedelta(minutes=3), 10)
+    assert [entry.attempts for entry in reclaimed] == [2]
+
+
+def test_retry_delay_is_capped(settings):
+    settings.NOTIFICATION_RETRY_BASE_SECONDS = 5
+    settings.NOTIFICATION_RETRY_MAX_SECONDS = 60
+    assert [retry_delay(n).total_seconds() for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 40, 60]
+
+
+@pytest.mark.django_db
+def test_eager_mode_sends_on_commit(fake_fcm, settings, django_capture_on_commit_callbacks):
+    settings.NOTIFICATION_DISPATCH_MODE = "eager"
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        enqueue_notification("device-1", "t", "b")
+    assert fake_fcm.requests == []
+
+    for callback in callbacks:
+        callback()
+    assert len(fake_fcm.requests) == 1
+    assert NotificationOutbox.objects.get().status == "sent"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_thread_mode_sends_in_background(fake_fcm, settings):
+    settings.NOTIFICATION_DISPATCH_MODE = "thread"
+    enqueue_notification("device-1", "t", "b")
+
+    deadline = time.monotonic() + 5
+    while NotificationOutbox.objects.get().status != "sent" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert NotificationOutbox.objects.get().status == "sent"
+    assert len(fake_fcm.requests) == 1
+
+
+@pytest.mark.django_db
+def test_unregistered_token_is_deactivated(order, fake_fcm, manual_dispatch):
+    register_device_token(order.customer, "stale")
+    enqueue_order_update(order)
+    fake_fcm.respond(404, {"error": {"status": "NOT_FOUND", "details": [{"errorCode": "UNREGISTERED"}]}})
+
+    notification_dispatcher.dispatch_due()
+
+    assert order.customer.devices.get().active is False
+    order.status = "in_progress"
+    assert enqueue_order_update(order) == []
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from app.models import (
+    CustomerRestaurantAffinity,
+    DailySalesRollup,
+    ItemDailySales,
+    Order,
+    OrderItem,
+)
+from app.utils.order_completion import (
+    is_completion,
+    on_order_completed,
+    rebuild_customer_affinity,
+)
+from django.utils import timezone
+
+
+def test_is_completion_only_on_first_completed_status():
+    assert is_completion("in_progress", "completed")
+    assert is_completion("pending", "picked_up")
+    assert not is_completion("completed", "picked_up")
+    assert not is_completion("pending", "in_progress")
+
+
+@pytest.mark.django_db
+def test_affinity_is_updated_incrementally(customer, restaurant):
+    now = timezone.now()
+    first, second, late = [
+        Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal(price))
+        for price in ["12.50", "7.25", "1.00"]
+    ]
+
+    on_order_completed(first, now - timedelta(days=3))
+    on_order_completed(second, now)
+    # A late-recorded older order does not move last_order_at back
+    on_order_completed(late, now - timedelta(days=10))
+
+    affinity = CustomerRestaurantAffinity.objects.get(customer=customer, restaurant=restaurant)
+    assert affinity.order_count == 3
+    assert affinity.total_spent == Decimal("20.75")
+    assert affinity.first_order_at == now - timedelta(days=3)
+    assert affinity.last_order_at == now
+
+
+@pytest.mark.django_db
+def test_an_order_is_only_counted_once(customer, restaurant, burger_item):
+    order = Order.objects.create(
+        customer=customer, restaurant=restaurant, total_price=Decimal("9.99"), status="completed",
+        start_time=timezone.now(),
+    )
+    OrderItem.objects.create(order=order, item=burger_item, quantity=1, unit_price=burger_item.price)
+    completed_at = timezone.now()
+
+    assert on_order_completed(order, completed_at)
+    # Sent back to the bar and completed again
+    assert not on_order_completed(Order.objects.get(pk=order.pk))
+
+    order.refresh_from_db()
+    assert order.first_completed_at == completed_at
+    assert CustomerRestaurantAffinity.objects.get().order_count == 1
+    assert DailySalesRollup.objects.get().total_orders == 1
+    assert ItemDailySales.objects.get().units == 1
+    burger_item.refresh_from_db()
+    assert burger_item.times_ordered == 1
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_completed_orders(customer, restaurant):
+    now = timezone.now()
+    for price, status in [("10.00", "completed"), ("5.00", "picked_up"), ("99.00", "pending")]:
+        Order.objects.create(
+            customer=customer, restaurant=restaurant, total_price=Decimal(price), status=status, completion_time=now
+        )
+
+    assert rebuild_customer_affinity() == 1
+    affinity = CustomerRestaurantAffinity.objects.get()
+    assert (affinity.order_count, affinity.total_spent, affinity.last_order_at) == (2, Decimal("15.00"), now)
+
+    # Rebuilding replaces rather than adds
+    assert rebuild_customer_affinity(restaurant.id) == 1
+    assert CustomerRestaurantAffinity.objects.get().order_count == 2
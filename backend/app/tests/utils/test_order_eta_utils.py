@@ -2,7 +2,13 @@ from datetime import timedelta
 
 from app.models.order_models import Order, OrderItem
 from app.models.restaurant_models import Item
+from app.models.worker_models import Worker
+from app.scheduler_instance import (
+    get_restaurant_scheduler,
+    refresh_restaurant_bartenders,
+)
 from app.utils.order_eta_utils import recalculate_pending_etas
+from app.utils.prep_time_model import PrepTimeModel, prep_time_models
 from django.utils import timezone
 
 
@@ -62,6 +68,16 @@ def test_multiple_orders_beverage_sequential(restaurant, customer):
     assert o2.estimated_beverage_ready_time == expected2
 
 
+def test_recalculate_plans_from_the_given_now(restaurant, customer):
+    then = timezone.now().replace(second=0, microsecond=0) - timedelta(days=2)
+    order = make_order(restaurant, customer, bev_qty=2)
+
+    recalculate_pending_etas(restaurant.id, num_bartenders=1, now=then + timedelta(seconds=40))
+    order.refresh_from_db()
+
+    assert order.estimated_beverage_ready_time == then + timedelta(minutes=2)
+
+
 def test_multiple_orders_with_two_bartenders(restaurant, customer):
     now = timezone.now().replace(second=0, microsecond=0)
     o1 = make_order(restaurant, customer, bev_qty=3)
@@ -107,3 +123,113 @@ def test_beverage_only_order(restaurant, customer):
     assert (order.estimated_beverage_ready_time - now).seconds // 60 == 4
     # no food
     assert order.estimated_food_ready_time is None
+
+
+def test_new_order_only_updates_itself(restaurant, customer):
+    o1 = make_order(restaurant, customer, food_qty=1, bev_qty=2)
+    o2 = make_order(restaurant, customer, bev_qty=3)
+    recalculate_pending_etas(restaurant.id, num_bartenders=1)
+
+    o3 = make_order(restaurant, customer, bev_qty=1)
+    updated = recalculate_pending_etas(restaurant.id, num_bartenders=1, changed_order_id=o3.id)
+
+    assert [o.id for o in updated] == [o3.id]
+    o2.refresh_from_db()
+    o3.refresh_from_db()
+    assert o3.estimated_beverage_ready_time == o2.estimated_beverage_ready_time + timedelta(minutes=1)
+    assert o1.id not in [o.id for o in updated]
+
+
+def test_removed_order_shifts_later_orders(restaurant, customer):
+    now = timezone.now().replace(second=0, microsecond=0)
+    o1 = make_order(restaurant, customer, bev_qty=2)
+    o2 = make_order(restaurant, customer, bev_qty=2)
+    o3 = make_order(restaurant, customer, bev_qty=2)
+    recalculate_pending_etas(restaurant.id, num_bartenders=1)
+
+    o2.status = "cancelled"
+    o2.save()
+    recalculate_pending_etas(restaurant.id, num_bartenders=1, changed_order_id=o2.id, verify=True)
+
+    o1.refresh_from_db()
+    o3.refresh_from_db()
+    assert o1.estimated_beverage_ready_time == now + timedelta(minutes=2)
+    assert o3.estimated_beverage_ready_time == now + timedelta(minutes=4)
+
+
+def test_externally_changed_eta_is_recomputed(restaurant, customer):
+    now = timezone.now().replace(second=0, microsecond=0)
+    order = make_order(restaurant, customer, bev_qty=3)
+    recalculate_pending_etas(restaurant.id, num_bartenders=1)
+
+    Order.objects.filter(pk=order.pk).update(estimated_beverage_ready_time=None)
+    recalculate_pending_etas(restaurant.id, num_bartenders=1, verify=True)
+
+    order.refresh_from_db()
+    assert order.estimated_beverage_ready_time == now + timedelta(minutes=3)
+
+
+def test_query_count_does_not_grow_with_queue(restaurant, customer, django_assert_max_num_queries):
+    for _ in range(15):
+        make_order(restaurant, customer, food_qty=1, bev_qty=1)
+
+    # The persisted prep-time model is read once per TTL, outside the per-request path
+    prep_time_models.get(restaurant.id)
+
+    # Orders, their items and one bulk update
+    with django_assert_max_num_queries(3):
+        recalculate_pending_etas(restaurant.id, num_bartenders=2)
+
+
+def test_bartender_count_comes_from_workers(restaurant, customer):
+    for pin in ("1111", "2222"):
+        Worker.objects.create(restaurant=restaurant, name="Bar", pin=pin, role="bartender")
+    o1 = make_order(restaurant, customer, bev_qty=4)
+    o2 = make_order(restaurant, customer, bev_qty=4)
+
+    recalculate_pending_etas(restaurant.id)
+
+    o1.refresh_from_db()
+    o2.refresh_from_db()
+    # Two bartenders make both orders at the same time
+    assert o1.estimated_beverage_ready_time == o2.estimated_beverage_ready_time
+
+
+def test_resizing_matches_full_rebuild(restaurant, customer):
+    orders = [make_order(restaurant, customer, bev_qty=qty) for qty in (3, 2, 4, 1, 2)]
+    recalculate_pending_etas(restaurant.id, num_bartenders=3)
+
+    for count in (1, 2, 4):
+        Worker.objects.filter(restaurant=restaurant, role="bartender").delete()
+        for pin in range(count):
+            Worker.objects.create(restaurant=restaurant, name="Bar", pin=str(pin), role="bartender")
+        assert refresh_restaurant_bartenders(restaurant.id)
+        recalculate_pending_etas(restaurant.id, verify=True)
+
+    assert get_restaurant_scheduler(restaurant.id).num_bartenders == 4
+    for order in orders:
+        order.refresh_from_db()
+        assert order.estimated_beverage_ready_time is not None
+
+
+def test_learned_prep_times_drive_etas(restaurant, customer):
+    order = make_order(restaurant, customer, food_qty=2, bev_qty=2)
+    drink_id = order.order_items.get(item__category="beverage").item_id
+    prep_time_models.set(restaurant.id, PrepTimeModel(food_base=30, food_per_item=5, item_minutes={drink_id: 2.5}))
+    now = timezone.now().replace(second=0, microsecond=0)
+
+    recalculate_pending_etas(restaurant.id, num_bartenders=1)
+
+    order.refresh_from_db()
+    assert order.estimated_food_ready_time == now + timedelta(minutes=40)
+    assert order.estimated_beverage_ready_time == now + timedelta(minutes=5)
+
+
+def test_eta_changes_bump_updated_at(restaurant, customer):
+    order = make_order(restaurant, customer, bev_qty=2)
+    Order.objects.filter(id=order.id).update(updated_at=timezone.now() - timedelta(hours=1))
+
+    recalculate_pending_etas(restaurant.id, num_bartenders=1)
+
+    order.refresh_from_db()
+    assert order.updated_at > timezone.now() - timedelta(minutes=1)
@@ -0,0 +1,66 @@
+import queue
+import threading
+
+import pytest
+from app.models.order_models import Order
+from app.utils.order_events import (
+    OrderEventBroker,
+    customer_channel,
+    order_event_broker,
+    publish_order_events,
+    restaurant_channel,
+)
+
+
+def test_broker_delivers_events_published_from_other_threads():
+    broker = OrderEventBroker()
+    subscription = broker.subscribe("restaurant:1")
+    publisher = threading.Thread(target=broker.publish, args=("restaurant:1", {"type": "order.status"}))
+    publisher.start()
+
+    assert subscription.get(timeout=1) == {"type": "order.status"}
+    publisher.join()
+    broker.unsubscribe(subscription)
+    assert broker.subscriber_count() == 0
+
+
+def test_broker_drops_events_for_slow_listeners():
+    broker = OrderEventBroker(max_pending=2)
+    subscription = broker.subscribe("customer:1")
+    for idx in range(5):
+        broker.publish("customer:1", {"n": idx})
+
+    assert subscription.dropped == 3
+    assert [subscription.get(timeout=0), subscription.get(timeout=0)] == [{"n": 0}, {"n": 1}]
+    with pytest.raises(queue.Empty):
+        subscription.get(timeout=0)
+
+
+def test_events_are_published_on_commit(order, monkeypatch, django_capture_on_commit_callbacks):
+    published = []
+    monkeypatch.setattr(order_event_broker, "publish", lambda channel, event: published.append((channel, event)))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_order_events([order], "order.status")
+        assert published == []
+
+    channels = [channel for channel, _ in published]
+    assert channels == [restaurant_channel(order.restaurant_id), customer_channel(order.customer_id)]
+    assert published[0][1]["status"] == order.status
+
+
+def test_status_update_publishes_event(api_client, restaurant_with_user, customer, monkeypatch,
+                                       django_capture_on_commit_callbacks):
+    restaurant, user = restaurant_with_user
+    order = Order.objects.create(customer=customer, restaurant=restaurant)
+    published = []
+    monkeypatch.setattr(order_event_broker, "publish", lambda channel, event: published.append((channel, event)))
+    api_client.force_authenticate(user=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.patch(f"/orders/{restaurant.id}/{order.id}/cancelled/")
+    assert response.status_code == 200
+
+    assert (restaurant_channel(order.restaurant_id), "order.status") in [
+        (channel, event["type"]) for channel, event in published
+    ]
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from app.models.order_models import Order, OrderItem
+from app.models.restaurant_models import Item
+from app.models.scheduler_models import PrepTimeEstimate
+from app.utils.eta_calculator import calculate_food_eta
+from app.utils.prep_time_model import (
+    PrepTimeModel,
+    PrepTimeModels,
+    load_prep_time_model,
+    save_prep_time_model,
+    train_prep_time_model,
+)
+from django.core.management import call_command
+from django.utils import timezone
+
+
+def completed_order(restaurant, customer, minutes, lines):
+    start = timezone.now() - timedelta(hours=2)
+    order = Order.objects.create(
+        restaurant=restaurant,
+        customer=customer,
+        status="completed",
+        start_time=start,
+        completion_time=start + timedelta(minutes=minutes),
+    )
+    OrderItem.objects.bulk_create([OrderItem(order=order, item=item, quantity=qty) for item, qty in lines])
+    return order
+
+
+@pytest.fixture
+def menu(restaurant):
+    return {
+        "burger": Item.objects.create(restaurant=restaurant, name="Burger", price=10, category="food"),
+        "ribs": Item.objects.create(restaurant=restaurant, name="Ribs", price=20, category="food"),
+        "beer": Item.objects.create(restaurant=restaurant, name="Beer", price=5, category="beverage"),
+    }
+
+
+def test_default_model_matches_fixed_formula():
+    model = PrepTimeModel()
+    assert model.food_minutes([(1, 3)]) == calculate_food_eta(3)
+    assert model.beverage_minutes([(2, 4)]) == 4
+    assert model.beverage_minutes([]) == 0
+
+
+def test_too_little_history_keeps_defaults(restaurant, customer, menu):
+    completed_order(restaurant, customer, 60, [(menu["burger"], 1)])
+    model = train_prep_time_model(restaurant.id, min_samples=5)
+    assert (model.food_base, model.food_per_item, model.bev_per_item) == (15, 2, 1)
+
+
+def test_learns_food_base_and_per_item_minutes(restaurant, customer, menu):
+    for qty in (1, 2, 3, 4) * 3:
+        completed_order(restaurant, customer, 10 + 3 * qty, [(menu["burger"], qty)])
+
+    model = train_prep_time_model(restaurant.id, min_samples=5)
+    assert model.food_base == pytest.approx(10)
+    assert model.food_per_item == pytest.approx(3)
+    assert model.food_minutes([(menu["burger"].id, 2)]) == pytest.approx(16)
+
+
+def test_learns_beverages_and_slow_items(restaurant, customer, menu):
+    for qty in (1, 2, 3) * 4:
+        completed_order(restaurant, customer, 10 + 2 * qty, [(menu["burger"], qty)])
+        completed_order(restaurant, customer, 10 + 6 * qty, [(menu["ribs"], qty)])
+        completed_order(restaurant, customer, 3 * qty, [(menu["beer"], qty)])
+
+    model = train_prep_time_model(restaurant.id, min_samples=5)
+    assert model.bev_per_item == pytest.approx(3)
+    assert model.beverage_minutes([(menu["beer"].id, 2)]) == 6
+    assert model.item_minutes[menu["ribs"].id] > model.item_minutes[menu["burger"].id]
+
+
+def test_training_uses_two_aggregate_queries(restaurant, customer, menu, django_assert_num_queries):
+    for qty in range(1, 30):
+        completed_order(restaurant, customer, 15 + qty, [(menu["burger"], qty), (menu["beer"], 1)])
+
+    with django_assert_num_queries(2):
+        train_prep_time_model(restaurant.id)
+
+
+def test_models_are_cached_until_ttl(restaurant, django_assert_num_queries):
+    models = PrepTimeModels(ttl_seconds=60)
+    first = models.get(restaurant.id)
+    with django_assert_num_queries(0):
+        assert models.get(restaurant.id) is first
+    assert models.refreshes == 1
+
+    models.ttl_seconds = -1
+    models.refresh(restaurant.id)
+    assert models.get(restaurant.id) is not first
+
+
+def test_get_never_trains_on_the_request_path(restaurant, customer, menu, django_assert_num_queries):
+    for qty in (1, 2, 3, 4) * 3:
+        completed_order(restaurant, customer, 10 + 3 * qty, [(menu["burger"], qty)])
+    models = PrepTimeModels(ttl_seconds=60)
+
+    # Untrained restaurants get the default model from one lookup
+    with django_assert_num_queries(1):
+        assert models.get(restaurant.id).food_base == 15
+
+    trained = train_prep_time_model(restaurant.id, min_samples=5)
+    save_prep_time_model(restaurant.id, trained)
+    # Other processes pick the new model up once their cached copy expires
+    models.clear()
+    with django_assert_num_queries(1):
+        loaded = models.get(restaurant.id)
+    assert loaded.food_base == pytest.approx(10)
+    assert loaded.item_minutes == pytest.approx(trained.item_minutes)
+
+
+def test_train_command_persists_models(restaurant, customer, menu):
+    for qty in range(1, 30):
+        completed_order(restaurant, customer, 15 + qty, [(menu["burger"], qty)])
+    out = StringIO()
+    call_command("train_prep_time_models", stdout=out)
+
+    assert "Trained 1 prep-time models" in out.getvalue()
+    estimate = PrepTimeEstimate.objects.get(restaurant=restaurant)
+    assert estimate.samples == 29
+    assert load_prep_time_model(restaurant.id).food_per_item == pytest.approx(estimate.food_per_item)
@@ -0,0 +1,162 @@
+import time
+from datetime import timedelta
+
+import pytest
+from app.models.affinity_models import CustomerRestaurantAffinity
+from app.models.customer_models import Customer, CustomUser
+from app.models.notification_models import DeviceToken
+from app.models.promotion_models import PromotionDelivery, PromotionNotification
+from app.models.restaurant_models import Restaurant
+from app.utils.device_tokens import register_device_token
+from app.utils.promotion_fanout import (
+    PromotionFanout,
+    RateLimiter,
+    promotion_recipients,
+)
+from django.utils import timezone
+
+
+def make_customers(count, start=0):
+    customers = []
+    for n in range(start, start + count):
+        user = CustomUser.objects.create_user(username=f"c{n}", email=f"c{n}@example.com", password="pw")
+        customer = Customer.objects.create(user=user)
+        register_device_token(customer, f"token-{n}")
+        customers.append(customer)
+    return customers
+
+
+@pytest.fixture
+def promotion(restaurant):
+    return PromotionNotification.objects.create(restaurant=restaurant, title="Happy hour", body="Half price")
+
+
+@pytest.mark.django_db
+def test_delivery_streams_recipients_in_chunks(promotion, fake_fcm):
+    make_customers(7)
+    Customer.objects.create(user=CustomUser.objects.create_user(username="none", email="n@example.com", password="pw"))
+    fanout = PromotionFanout(chunk_size=3, concurrency=4, rate=0)
+    delivery = PromotionDelivery.objects.create(promotion=promotion)
+
+    assert fanout.run(delivery.id) is True
+
+    delivery.refresh_from_db()
+    assert delivery.status == "completed"
+    assert (delivery.total_recipients, delivery.sent_count, delivery.failed_count) == (7, 7, 0)
+    assert delivery.finished_at is not None
+    promotion.refresh_from_db()
+    assert promotion.sent is True
+
+    tokens = sorted(request["json"]["message"]["token"] for request in fake_fcm.requests)
+    assert tokens == sorted(f"token-{n}" for n in range(7))
+    message = fake_fcm.requests[0]["json"]["message"]
+    assert message["notification"] == {"title": "Happy hour", "body": "Half price"}
+    assert message["data"] == {"type": "PROMOTION", "promotion_id": str(promotion.id)}
+
+
+@pytest.mark.django_db
+def test_failed_sends_are_counted(promotion, fake_fcm):
+    make_customers(3)
+    fake_fcm.respond(404, {"error": {"details": [{"errorCode": "UNREGISTERED"}]}})
+    fanout = PromotionFanout(chunk_size=10, concurrency=1, rate=0)
+    delivery = PromotionDelivery.objects.create(promotion=promotion)
+
+    fanout.run(delivery.id)
+
+    delivery.refresh_from_db()
+    assert (delivery.sent_count, delivery.failed_count) == (2, 1)
+    assert "UNREGISTERED" in delivery.last_error
+
+
+@pytest.mark.django_db
+def test_abandoned_delivery_resumes_after_last_chunk(promotion, fake_fcm):
+    customers = make_customers(5)
+    delivery = PromotionDelivery.objects.create(
+        promotion=promotion, status="running", total_recipients=5, sent_count=2, last_device_id=customers[1].devices.get().id
+    )
+    fanout = PromotionFanout(chunk_size=2, concurrency=2, rate=0)
+
+    # Still owned by the worker that is running it
+    assert fanout.run(delivery.id) is False
+
+    PromotionDelivery.objects.filter(id=delivery.id).update(updated_at=timezone.now() - timedelta(minutes=11))
+    assert fanout.run_pending() == 1
+
+    delivery.refresh_from_db()
+    assert (delivery.status, delivery.sent_count) == ("completed", 5)
+    assert sorted(request["json"]["message"]["token"] for request in fake_fcm.requests) == [
+        "token-2", "token-3", "token-4"
+    ]
+
+
+@pytest.mark.django_db
+def test_completed_delivery_is_not_run_again(promotion):
+    delivery = PromotionDelivery.objects.create(promotion=promotion, status="completed")
+    assert PromotionFanout().run(delivery.id) is False
+
+
+@pytest.mark.django_db
+def test_recipients_are_loaded_in_chunks(promotion, monkeypatch, django_assert_max_num_queries):
+    make_customers(30)
+    monkeypatch.setattr("app.utils.promotion_fanout.send_fcm_message", lambda *args: None)
+    fanout = PromotionFanout(chunk_size=10, concurrency=2, rate=0)
+    delivery = PromotionDelivery.objects.create(promotion=promotion)
+
+    # claim, load, count, save total, read rows, 3 x (device health + progress), finish, mark sent
+    with django_assert_max_num_queries(13):
+        fanout.run(delivery.id)
+    delivery.refresh_from_db()
+    assert delivery.sent_count == 30
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+    assert time.monotonic() - started >= 5 / 50 - 0.01
+
+
+@pytest.mark.django_db
+def test_recent_customer_audience_uses_affinity(promotion, restaurant, fake_fcm):
+    recent, lapsed, elsewhere, _ = make_customers(4)
+    now = timezone.now()
+    other_restaurant = Restaurant.objects.create(
+        user=CustomUser.objects.create_user(username="o", email="o@example.com", password="pw"), name="Other"
+    )
+    for customer, place, days_ago in [
+        (recent, restaurant, 2),
+        (lapsed, restaurant, 45),
+        (elsewhere, other_restaurant, 1),
+    ]:
+        when = now - timedelta(days=days_ago)
+        CustomerRestaurantAffinity.objects.create(
+            customer=customer, restaurant=place, order_count=1, first_order_at=when, last_order_at=when
+        )
+    promotion.ordered_within_days = 30
+    promotion.save()
+
+    assert [device.customer_id for device in promotion_recipients(promotion)] == [recent.id]
+
+    delivery = PromotionDelivery.objects.create(promotion=promotion)
+    PromotionFanout(rate=0).run(delivery.id)
+    delivery.refresh_from_db()
+    assert (delivery.total_recipients, delivery.sent_count) == (1, 1)
+    assert [request["json"]["message"]["token"] for request in fake_fcm.requests] == [recent.fcm_token]
+
+
+@pytest.mark.django_db
+def test_dead_tokens_are_skipped_by_later_deliveries(promotion, fake_fcm):
+    make_customers(3)
+    fake_fcm.respond(400, {"error": {"status": "INVALID_ARGUMENT"}})
+    fanout = PromotionFanout(chunk_size=10, concurrency=1, rate=0)
+
+    fanout.run(PromotionDelivery.objects.create(promotion=promotion).id)
+    assert DeviceToken.objects.filter(active=False).count() == 1
+
+    fake_fcm.requests.clear()
+    second = PromotionDelivery.objects.create(promotion=promotion)
+    fanout.run(second.id)
+    second.refresh_from_db()
+    assert (second.total_recipients, second.sent_count, second.failed_count) == (2, 2, 0)
+    assert len(fake_fcm.requests) == 2
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from app.models import DailySalesRollup, Order, Worker
+from app.utils.sales_rollup import (
+    daily_sales,
+    live_daily_sales,
+    rebuild_daily_sales,
+    record_daily_sales,
+    sales_series,
+)
+
+
+DAY = datetime(2026, 3, 14, tzinfo=dt_timezone.utc)
+
+
+def completed_order(customer, restaurant, price, hour, worker=None, status="completed", day=DAY, record=False):
+    order = Order.objects.create(
+        customer=customer,
+        restaurant=restaurant,
+        total_price=Decimal(price),
+        status=status,
+        worker=worker,
+        start_time=day + timedelta(hours=hour, minutes=10),
+    )
+    if record:
+        # As on_order_completed does when the order completes
+        record_daily_sales(order)
+    return order
+
+
+def orders_of_the_day(customer, restaurant, worker, record):
+    other = Worker.objects.create(restaurant=restaurant, name="Other", pin="2222", role="bartender")
+    return [
+        completed_order(customer, restaurant, "15.50", 9, worker, record=record),
+        completed_order(customer, restaurant, "10.00", 9, worker, status="picked_up", record=record),
+        completed_order(customer, restaurant, "4.25", 18, other, record=record),
+        completed_order(customer, restaurant, "3.00", 20, record=record),
+    ]
+
+
+@pytest.fixture
+def day_of_orders(customer, restaurant, worker):
+    return orders_of_the_day(customer, restaurant, worker, record=False)
+
+
+@pytest.fixture
+def recorded_day(customer, restaurant, worker):
+    return orders_of_the_day(customer, restaurant, worker, record=True)
+
+
+@pytest.mark.django_db
+def test_record_daily_sales_accumulates(recorded_day, restaurant):
+    rollup = DailySalesRollup.objects.get(restaurant=restaurant, date=DAY.date())
+    assert rollup.total_orders == 4
+    assert rollup.total_sales == Decimal("32.75")
+    assert rollup.active_workers == 2
+    assert rollup.hourly_orders[9] == 2 and rollup.hourly_sales[9] == "25.50"
+    assert rollup.hourly_orders[18] == 1 and rollup.hourly_sales[20] == "3.00"
+
+
+@pytest.mark.django_db
+def test_first_row_of_the_day_includes_earlier_orders(day_of_orders, customer, restaurant):
+    # The morning's orders completed before the rollup was deployed
+    completed_order(customer, restaurant, "5.00", 21, record=True)
+
+    rollup = DailySalesRollup.objects.get(restaurant=restaurant, date=DAY.date())
+    assert (rollup.total_orders, rollup.total_sales, rollup.active_workers) == (5, Decimal("37.75"), 2)
+    assert daily_sales(restaurant.id, DAY.date(), hourly=True) == live_daily_sales(restaurant.id, DAY.date(), hourly=True)
+
+
+@pytest.mark.django_db
+def test_unstarted_orders_are_not_counted(customer, restaurant):
+    order = Order.objects.create(customer=customer, restaurant=restaurant, total_price=5, status="completed")
+    record_daily_sales(order)
+    assert not DailySalesRollup.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rollup_read_is_one_query_and_matches_live(recorded_day, restaurant, django_assert_num_queries):
+    live = live_daily_sales(restaurant.id, DAY.date(), hourly=True)
+
+    with django_assert_num_queries(1):
+        summary = daily_sales(restaurant.id, DAY.date(), hourly=True)
+    assert summary == live
+    assert summary["avg_order_value"] == Decimal("8.19")
+    assert summary["hourly"][9] == {"hour": 9, "orders": 2, "sales": Decimal("25.50")}
+
+
+@pytest.mark.django_db
+def test_missing_rollup_falls_back_to_live_aggregate(day_of_orders, restaurant, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        summary = daily_sales(restaurant.id, DAY.date())
+    assert (summary["total_orders"], summary["total_sales"], summary["active_workers"]) == (4, Decimal("32.75"), 2)
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental_rollup(recorded_day, customer, restaurant):
+    incremental = DailySalesRollup.objects.get()
+    completed_order(customer, restaurant, "8.00", 12, day=DAY + timedelta(days=1))
+    completed_order(customer, restaurant, "99.00", 12, status="cancelled")
+
+    assert rebuild_daily_sales(restaurant.id) == 2
+    rebuilt = DailySalesRollup.objects.get(date=DAY.date())
+    assert (rebuilt.total_orders, rebuilt.total_sales) == (incremental.total_orders, incremental.total_sales)
+    assert sorted(rebuilt.worker_ids) == sorted(incremental.worker_ids)
+    assert rebuilt.hourly_orders == incremental.hourly_orders
+    assert [Decimal(s) for s in rebuilt.hourly_sales] == [Decimal(s) for s in incremental.hourly_sales]
+
+
+@pytest.mark.django_db
+def test_rebuild_only_replaces_requested_days(day_of_orders, customer, restaurant):
+    next_day = DAY + timedelta(days=1)
+    completed_order(customer, restaurant, "8.00", 12, day=next_day)
+    rebuild_daily_sales()
+    DailySalesRollup.objects.filter(date=DAY.date()).update(total_orders=0)
+
+    assert rebuild_daily_sales(since=next_day.date(), until=next_day.date()) == 1
+    assert DailySalesRollup.objects.get(date=DAY.date()).total_orders == 0
+
+
+def period(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+@pytest.mark.django_db
+def test_sales_series_rolls_hours_up_and_fills_gaps(recorded_day, customer, restaurant, django_assert_num_queries):
+    completed_order(customer, restaurant, "7.00", 1, day=DAY + timedelta(days=20), record=True)
+    start, end = DAY, DAY + timedelta(days=21)
+
+    with django_assert_num_queries(2):
+        days = sales_series(restaurant.id, start, end, "day")
+    assert len(days) == 21
+    assert days[0] == {"period": period(2026, 3, 14), "total_sales": "32.75"}
+    assert days[1] == {"period": period(2026, 3, 15), "total_sales": "0.00"}
+    assert days[20]["total_sales"] == "7.00"
+
+    hours = sales_series(restaurant.id, DAY + timedelta(hours=8, minutes=30), DAY + timedelta(hours=11), "hour")
+    assert [(h["period"].hour, h["total_sales"]) for h in hours] == [(8, "0.00"), (9, "25.50"), (10, "0.00")]
+
+    weeks = sales_series(restaurant.id, start, end, "week")
+    assert weeks[0] == {"period": period(2026, 3, 9), "total_sales": "32.75"}
+    assert [w["total_sales"] for w in weeks] == ["32.75", "0.00", "0.00", "7.00"]
+
+    months = sales_series(restaurant.id, period(2026, 1, 1), period(2027, 1, 1), "month")
+    assert [m["period"].month for m in months] == list(range(1, 13))
+    assert (months[2]["total_sales"], months[3]["total_sales"], months[11]["total_sales"]) == ("32.75", "7.00", "0.00")
+
+
+@pytest.mark.django_db
+def test_sales_series_aggregates_days_without_a_rollup_row(day_of_orders, customer, restaurant):
+    # Orders from before the rollup existed, plus one recorded day
+    completed_order(customer, restaurant, "7.00", 1, day=DAY + timedelta(days=1), record=True)
+    assert DailySalesRollup.objects.count() == 1
+
+    days = sales_series(restaurant.id, DAY, DAY + timedelta(days=2), "day")
+    assert [d["total_sales"] for d in days] == ["32.75", "7.00"]
+    hours = sales_series(restaurant.id, DAY + timedelta(hours=9), DAY + timedelta(hours=10), "hour")
+    assert hours == [{"period": period(2026, 3, 14, 9), "total_sales": "25.50"}]
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from app.models import Order, OrderItem
+from app.utils.scheduler_simulation import (
+    SimulatedOrder,
+    happy_hour_arrivals,
+    percentile,
+    poisson_arrivals,
+    recorded_arrivals,
+    simulate,
+    simulate_against_database,
+    simulate_service,
+)
+from django.utils import timezone
+
+
+START = timezone.now().replace(hour=18, minute=0, second=0, microsecond=0)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_poisson_arrivals_are_reproducible_and_in_window():
+    first = poisson_arrivals(2, 60, START, seed=7)
+    assert first == poisson_arrivals(2, 60, START, seed=7)
+    assert all(START <= o.arrival < START + timedelta(minutes=60) for o in first)
+    assert all(o.num_food + o.num_bev > 0 for o in first)
+
+
+def test_happy_hour_is_busier_during_the_peak():
+    arrivals = happy_hour_arrivals(0.5, 5, 120, 60, 30, START, seed=1)
+    peak = [o for o in arrivals if START + timedelta(minutes=60) <= o.arrival < START + timedelta(minutes=90)]
+    before = [o for o in arrivals if o.arrival < START + timedelta(minutes=30)]
+    assert len(peak) > 2 * len(before)
+
+
+def test_simulate_reports_latency_queue_and_error():
+    arrivals = simulate_service(poisson_arrivals(1, 60, START, seed=3), num_bartenders=2, seed=3)
+    report = simulate(arrivals, num_bartenders=2)
+    assert report["orders"] == len(arrivals)
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert report["queue_length"]["max"] >= 1
+    assert report["eta_error_minutes"]["mean"] is not None
+
+
+def test_simulate_without_noise_has_small_beverage_error():
+    arrivals = [SimulatedOrder(START + timedelta(minutes=i * 10), 0, 2, None) for i in range(5)]
+    report = simulate(simulate_service(arrivals, 1, service_noise=0), num_bartenders=1)
+    # ETAs are floored to the minute, so they can only be off by a minute
+    assert report["eta_error_minutes"]["p95_abs"] <= 1
+
+
+@pytest.mark.django_db
+def test_recorded_arrivals_use_completed_orders(order, order_item, burger_item):
+    order.status = "completed"
+    order.start_time = START
+    order.completion_time = START + timedelta(minutes=20)
+    order.save()
+    OrderItem.objects.create(order=order, item=burger_item, quantity=2)
+
+    arrivals = recorded_arrivals(order.restaurant.id)
+    assert len(arrivals) == 1
+    assert arrivals[0].arrival == START
+    assert arrivals[0].completion == START + timedelta(minutes=20)
+    assert arrivals[0].num_food + arrivals[0].num_bev == order_item.quantity + 2
+
+
+@pytest.mark.django_db
+def test_database_simulation_rolls_back():
+    arrivals = simulate_service(poisson_arrivals(1, 20, START, seed=5), num_bartenders=1, seed=5)
+    count = Order.objects.count()
+    report = simulate_against_database(arrivals, num_bartenders=1)
+    assert report["mode"] == "database"
+    assert report["orders"] == len(arrivals)
+    assert Order.objects.count() == count
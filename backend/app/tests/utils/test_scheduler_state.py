@@ -0,0 +1,91 @@
+import os
+from datetime import timedelta
+
+import pytest
+from app import scheduler_instance
+from app.models.scheduler_models import SchedulerState
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler, PlannedOrder
+from app.utils.scheduler_state import DatabaseSchedulerState, FileSchedulerState
+from django.utils import timezone
+
+
+@pytest.fixture
+def busy_scheduler():
+    now = timezone.now().replace(second=0, microsecond=0)
+    scheduler = MultiBartenderScheduler(num_bartenders=2)
+    scheduler.reset(now)
+    scheduler.assign_orders(now, [3, 2, 4])
+    scheduler.planned_orders = [PlannedOrder(1, 0, 3, None, now + timedelta(minutes=3), 0, now)]
+    return scheduler
+
+
+def test_snapshot_round_trip(busy_scheduler):
+    restored = MultiBartenderScheduler.from_snapshot(busy_scheduler.snapshot())
+
+    assert restored.num_bartenders == 2
+    assert restored.planned_at == busy_scheduler.planned_at
+    assert restored.planned_orders == busy_scheduler.planned_orders
+    assert [s.busy_intervals for s in restored.schedulers] == [
+        s.busy_intervals for s in busy_scheduler.schedulers
+    ]
+    now = busy_scheduler.planned_at
+    assert restored.find_best_free_slot(now, 2) == busy_scheduler.find_best_free_slot(now, 2)
+
+
+def test_file_backend_shares_state_between_processes(tmp_path, busy_scheduler):
+    writer = FileSchedulerState(str(tmp_path))
+    reader = FileSchedulerState(str(tmp_path))
+    assert reader.load(7) is None
+
+    writer.save(7, busy_scheduler)
+    loaded = reader.load(7)
+    assert loaded.planned_orders == busy_scheduler.planned_orders
+    # Unchanged file: the process-local copy is reused
+    assert reader.load(7) is loaded
+
+
+def test_file_backend_sees_writes_within_one_timestamp_tick(tmp_path, busy_scheduler):
+    writer = FileSchedulerState(str(tmp_path))
+    reader = FileSchedulerState(str(tmp_path))
+    writer.save(7, busy_scheduler)
+    first = os.stat(writer._path(7))
+    assert reader.load(7).planned_orders == busy_scheduler.planned_orders
+
+    # Same payload size, and a filesystem clock that has not moved on
+    busy_scheduler.planned_orders = [busy_scheduler.planned_orders[0]._replace(order_id=2)]
+    writer.save(7, busy_scheduler)
+    os.utime(writer._path(7), ns=(first.st_atime_ns, first.st_mtime_ns))
+    assert os.stat(writer._path(7)).st_size == first.st_size
+
+    assert reader.load(7).planned_orders[0].order_id == 2
+
+
+@pytest.mark.django_db
+def test_database_backend_versions_snapshots(restaurant, busy_scheduler):
+    backend = DatabaseSchedulerState()
+    backend.save(restaurant.id, busy_scheduler)
+    backend.save(restaurant.id, busy_scheduler)
+    assert SchedulerState.objects.get(restaurant=restaurant).version == 2
+
+    other_worker = DatabaseSchedulerState()
+    loaded = other_worker.load(restaurant.id)
+    assert loaded.planned_orders == busy_scheduler.planned_orders
+    assert other_worker.load(restaurant.id) is loaded
+
+
+def test_backend_selected_from_settings(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler_instance, "_state_backend", None)
+    settings.SCHEDULER_STATE_BACKEND = "file"
+    settings.SCHEDULER_STATE_DIR = str(tmp_path)
+
+    scheduler = scheduler_instance.get_restaurant_scheduler(42, num_bartenders=3)
+    assert isinstance(scheduler_instance.get_scheduler_state_backend(), FileSchedulerState)
+    assert scheduler.num_bartenders == 3
+    assert (tmp_path / "restaurant_42.json").exists()
+
+
+def test_unknown_backend_rejected(settings, monkeypatch):
+    monkeypatch.setattr(scheduler_instance, "_state_backend", None)
+    settings.SCHEDULER_STATE_BACKEND = "redis"
+    with pytest.raises(ValueError):
+        scheduler_instance.get_scheduler_state_backend()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from app.models import Order, Worker
+from app.utils.worker_stats import bartender_statistics
+from django.db import connection
+
+
+START = datetime(2026, 5, 2, 18, 0, tzinfo=dt_timezone.utc)
+
+
+def timed_order(customer, restaurant, worker, minutes, price="10.00", status="completed", start=START):
+    return Order.objects.create(
+        customer=customer,
+        restaurant=restaurant,
+        worker=worker,
+        total_price=Decimal(price),
+        status=status,
+        start_time=start,
+        completion_time=start + timedelta(minutes=minutes),
+    )
+
+
+@pytest.mark.django_db
+def test_bartender_statistics_is_one_grouped_query(customer, restaurant, worker, django_assert_num_queries):
+    idle = Worker.objects.create(restaurant=restaurant, name="Idle", pin="3333", role="manager")
+    for minutes in (1, 2, 3, 4, 10):
+        timed_order(customer, restaurant, worker, minutes)
+    timed_order(customer, restaurant, worker, 60, status="cancelled")
+    Order.objects.create(customer=customer, restaurant=restaurant, worker=worker, total_price=7, status="completed")
+
+    # Without percentile_cont the percentiles take a second query
+    with django_assert_num_queries(1 if connection.vendor == "postgresql" else 2):
+        stats = bartender_statistics(restaurant.id)
+
+    busy, quiet = stats
+    assert busy["worker_name"] == worker.name
+    assert busy["total_orders"] == 5
+    assert busy["total_sales"] == 50.0
+    assert busy["average_time_seconds"] == 240
+    assert (busy["fastest_time_seconds"], busy["slowest_time_seconds"]) == (60, 600)
+    assert busy["p50_time_seconds"] == 180
+    assert busy["p90_time_seconds"] == pytest.approx(456)
+    assert quiet == {
+        "worker_name": idle.name,
+        "role": "manager",
+        "total_orders": 0,
+        "average_time_seconds": None,
+        "fastest_time_seconds": None,
+        "slowest_time_seconds": None,
+        "p50_time_seconds": None,
+        "p90_time_seconds": None,
+        "total_sales": 0.0,
+    }
+
+
+@pytest.mark.django_db
+def test_bartender_statistics_date_range(customer, restaurant, worker):
+    timed_order(customer, restaurant, worker, 2, start=START - timedelta(days=3))
+    timed_order(customer, restaurant, worker, 4, price="6.00")
+
+    [stats] = bartender_statistics(restaurant.id, since=START.date())
+    assert (stats["total_orders"], stats["total_sales"], stats["p50_time_seconds"]) == (1, 6.0, 240)
+
+    [stats] = bartender_statistics(restaurant.id, until=(START - timedelta(days=1)).date())
+    assert (stats["total_orders"], stats["average_time_seconds"]) == (1, 120)
+
+
+@pytest.mark.django_db
+def test_percentiles_without_percentile_cont(customer, restaurant, worker, monkeypatch):
+    for minutes in (1, 2, 3, 4, 10):
+        timed_order(customer, restaurant, worker, minutes)
+    timed_order(customer, restaurant, worker, 60, start=START - timedelta(days=3))
+    Worker.objects.create(restaurant=restaurant, name="Idle", pin="3333", role="manager")
+    in_database = bartender_statistics(restaurant.id, since=START.date())
+
+    monkeypatch.setattr(connection, "vendor", "sqlite")
+    in_python = bartender_statistics(restaurant.id, since=START.date())
+
+    assert in_python == in_database
+    assert (in_python[0]["p50_time_seconds"], in_python[1]["p90_time_seconds"]) == (180, None)
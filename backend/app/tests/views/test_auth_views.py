@@ -213,3 +213,32 @@ def test_login_user_invalid_method(client):
     resp = client.get("/login_user/")
     assert resp.status_code == 400
     assert resp.json().get("error") == "Invalid request"
+
+
+# ------------------------------------------------------------------
+# POST /validate_restaurant/
+# ------------------------------------------------------------------
+def test_validate_business_uses_shared_http_pool(client, settings, monkeypatch):
+    settings.GOOGLE_PLACES_API_KEY = "key"
+    calls = []
+
+    class Resp:
+        def json(self):
+            return {
+                "status": "OK",
+                "candidates": [{"place_id": "p1", "formatted_address": "123 Main St, Town"}],
+            }
+
+    def fake_get(url, **kwargs):
+        calls.append((url, kwargs))
+        return Resp()
+
+    monkeypatch.setattr("app.views.auth_views.outbound_http.get", fake_get)
+    resp = client.post(
+        "/validate_restaurant/",
+        data=json.dumps({"name": "Testaurant", "address": "123 Main St"}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"valid": True, "place_id": "p1"}
+    assert calls[0][1]["params"]["input"] == "Testaurant, 123 Main St"
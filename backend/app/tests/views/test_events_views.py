@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+import requests
+from app.utils.order_events import order_event_broker, restaurant_channel
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def _next_message(raw):
+    """Reads one SSE message (up to the blank line) off the socket as it arrives."""
+    message = b""
+    while not message.endswith(b"\n\n"):
+        byte = raw.read(1)
+        assert byte, "stream closed"
+        message += byte
+    return message
+
+
+def _wait_until(predicate, timeout=2):
+    pause = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        pause.wait(0.01)
+    raise AssertionError("condition not reached in time")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_restaurant_stream_receives_order_events_over_wsgi(live_server, restaurant_with_user, settings):
+    # live_server is a threaded WSGI server, like the runserver the app is deployed with
+    settings.ORDER_EVENTS_KEEPALIVE = 0.2
+    restaurant, user = restaurant_with_user
+    token = str(AccessToken.for_user(user))
+    channel = restaurant_channel(restaurant.id)
+
+    with requests.get(f"{live_server.url}/order/events/?token={token}", stream=True, timeout=5) as response:
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/event-stream"
+        assert _next_message(response.raw) == b": connected\n\n"
+        assert _next_message(response.raw) == b": keep-alive\n\n"
+
+        _wait_until(lambda: order_event_broker.subscriber_count(channel) == 1)
+        order_event_broker.publish(channel, {"type": "order.status", "order_id": 7})
+        event = _next_message(response.raw)
+        while event == b": keep-alive\n\n":
+            event = _next_message(response.raw)
+
+    assert event.startswith(b"event: order.status\n")
+    assert b'"order_id": 7' in event
+    # The next keep-alive fails to write to the closed client, which ends the stream
+    _wait_until(lambda: order_event_broker.subscriber_count(channel) == 0)
+
+
+@pytest.mark.django_db
+def test_stream_unsubscribes_when_closed(client, restaurant_with_user):
+    restaurant, user = restaurant_with_user
+    response = client.get(f"/order/events/?token={AccessToken.for_user(user)}")
+    chunks = iter(response.streaming_content)
+    assert next(chunks) == b": connected\n\n"
+    assert order_event_broker.subscriber_count(restaurant_channel(restaurant.id)) == 1
+
+    response.close()
+    assert order_event_broker.subscriber_count(restaurant_channel(restaurant.id)) == 0
+
+
+@pytest.mark.django_db
+def test_stream_requires_authentication(client):
+    assert client.get("/order/events/").status_code == 401
+    assert client.get("/order/events/?token=garbage").status_code == 401
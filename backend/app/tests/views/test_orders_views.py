@@ -3,12 +3,16 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 import pytest
-from dateutil.parser import isoparse
-
 from app.models import Worker
+from app.models.affinity_models import CustomerRestaurantAffinity
 from app.models.customer_models import CustomUser
+from app.models.notification_models import NotificationOutbox
 from app.models.order_models import Order, OrderItem
 from app.models.restaurant_models import Item
+from app.utils.device_tokens import register_device_token
+from dateutil.parser import isoparse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
@@ -19,16 +23,9 @@ def api_client():
 
 
 @pytest.fixture(autouse=True)
-def patch_fcm(monkeypatch):
-    # Stub out FCM notifications
-    monkeypatch.setattr(
-        "app.views.orders_views.send_fcm_httpv1",
-        lambda *args, **kwargs: None
-    )
-    monkeypatch.setattr(
-        "app.views.orders_views.send_notification_to_device",
-        lambda *args, **kwargs: None
-    )
+def patch_fcm(settings):
+    # Leave queued FCM notifications in the outbox
+    settings.NOTIFICATION_DISPATCH_MODE = "manual"
 
 
 # ------------------------------------------------------------------
@@ -253,6 +250,138 @@ def test_retrieve_active_orders_success(api_client, restaurant_with_user, custom
     assert data.get("next_offset") is None or isinstance(data["next_offset"], int)
 
 
+def _create_orders_with_items(customer, restaurant, items, ingredients, count):
+    orders = Order.objects.bulk_create(
+        [Order(customer=customer, restaurant=restaurant, status="pending") for _ in range(count)]
+    )
+    order_items = OrderItem.objects.bulk_create(
+        [OrderItem(order=o, item=item, quantity=1) for o in orders for item in items]
+    )
+    Unwanted = OrderItem.unwanted_ingredients.through
+    Unwanted.objects.bulk_create(
+        [Unwanted(orderitem=oi, ingredient=ing) for oi in order_items for ing in ingredients]
+    )
+
+
+@pytest.mark.django_db
+def test_order_listings_use_constant_queries(api_client, restaurant_with_user, customer, burger_item, ingredients):
+    restaurant, user = restaurant_with_user
+    drink = Item.objects.create(restaurant=restaurant, name="Cola", price=Decimal("2.00"), category="beverage")
+
+    def count_queries(client_user, url):
+        api_client.force_authenticate(user=client_user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = api_client.get(url)
+        assert resp.status_code == 200
+        return len(ctx.captured_queries)
+
+    _create_orders_with_items(customer, restaurant, [burger_item, drink], ingredients, 1)
+    single = (
+        count_queries(user, "/retrieve/orders/?limit=500"),
+        count_queries(customer.user, "/order/customer/"),
+    )
+
+    _create_orders_with_items(customer, restaurant, [burger_item, drink], ingredients, 499)
+    many = (
+        count_queries(user, "/retrieve/orders/?limit=500"),
+        count_queries(customer.user, "/order/customer/"),
+    )
+    assert many == single
+
+
+@pytest.mark.django_db
+def test_retrieve_active_orders_cursor_pages(api_client, restaurant_with_user, customer):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    now = timezone.now()
+    started = [
+        Order.objects.create(customer=customer, restaurant=restaurant, status="in_progress",
+                             start_time=now - timedelta(minutes=i % 3))
+        for i in range(5)
+    ]
+    waiting = [Order.objects.create(customer=customer, restaurant=restaurant) for _ in range(2)]
+
+    seen = []
+    resp = api_client.get("/retrieve/orders/?cursor=&limit=3&include_total=false")
+    while True:
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] is None
+        seen.extend(r["id"] for r in data["results"])
+        if len(seen) == 3:
+            # Orders arriving between polls must not shift later pages
+            Order.objects.create(customer=customer, restaurant=restaurant)
+        if data["next_cursor"] is None:
+            break
+        resp = api_client.get(f"/retrieve/orders/?cursor={data['next_cursor']}&limit=3&include_total=false")
+
+    # Not started yet first, then newest start_time first, ties by id
+    expected = sorted(waiting, key=lambda o: -o.id) + sorted(started, key=lambda o: (-o.start_time.timestamp(), -o.id))
+    assert seen == [o.id for o in expected]
+
+
+@pytest.mark.django_db
+def test_retrieve_active_orders_invalid_cursor(api_client, restaurant_with_user):
+    _, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    resp = api_client.get("/retrieve/orders/?cursor=not-a-cursor")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["cursor=&limit=0", "limit=-1", "offset=-5", "limit=ten"])
+def test_retrieve_active_orders_rejects_bad_page_size(api_client, restaurant_with_user, customer, query):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    Order.objects.create(customer=customer, restaurant=restaurant)
+    # limit=0 used to hand out a cursor past the first row, silently skipping it
+    resp = api_client.get(f"/retrieve/orders/?{query}")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_retrieve_active_orders_etag_not_modified(api_client, restaurant_with_user, customer):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    order = Order.objects.create(customer=customer, restaurant=restaurant)
+
+    first = api_client.get("/retrieve/orders/")
+    etag = first["ETag"]
+    with CaptureQueriesContext(connection) as ctx:
+        again = api_client.get("/retrieve/orders/", HTTP_IF_NONE_MATCH=etag)
+    assert again.status_code == 304
+    assert len(ctx.captured_queries) <= 2
+
+    order.status = "in_progress"
+    order.save()
+    changed = api_client.get("/retrieve/orders/", HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_retrieve_active_orders_delta_sync(api_client, restaurant_with_user, customer):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    orders = [Order.objects.create(customer=customer, restaurant=restaurant) for _ in range(3)]
+    Order.objects.filter(restaurant=restaurant).update(updated_at=timezone.now() - timedelta(hours=1))
+
+    token = api_client.get("/retrieve/orders/?statuses=pending").json()["sync_token"]
+    idle = api_client.get(f"/retrieve/orders/?statuses=pending&updated_since={token}").json()
+    assert idle["results"] == []
+
+    orders[1].status = "completed"
+    orders[1].save()
+    delta = api_client.get(f"/retrieve/orders/?statuses=pending&updated_since={token}").json()
+    # Orders leaving the statuses filter are still reported so the board can drop them
+    assert [r["id"] for r in delta["results"]] == [orders[1].id]
+    assert delta["results"][0]["status"] == "completed"
+    assert int(delta["sync_token"]) > int(token)
+
+    resp = api_client.get("/retrieve/orders/?updated_since=yesterday")
+    assert resp.status_code == 400
+
+
 @pytest.mark.django_db
 def test_retrieve_active_orders_none_exist(api_client, restaurant_with_user):
     _, user = restaurant_with_user
@@ -339,6 +468,24 @@ def test_update_order_status_in_progress_success(api_client, restaurant_with_use
     assert js["status"] == "in_progress"
 
 
+@pytest.mark.django_db
+def test_update_order_status_completed_sets_completion_time(api_client, restaurant_with_user, customer):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    o = Order.objects.create(customer=customer, restaurant=restaurant, status="in_progress", total_price=0)
+    before = timezone.now()
+
+    resp = api_client.patch(f"/orders/{restaurant.pk}/{o.id}/completed/", data={}, format="json")
+    assert resp.status_code == 200
+    o.refresh_from_db()
+    assert o.completion_time >= before
+    assert o.first_completed_at == o.completion_time
+
+    # Picking the order up does not move its completion time
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/picked_up/", data={}, format="json")
+    assert Order.objects.get(pk=o.pk).completion_time == o.completion_time
+
+
 # ------------------------------------------------------------------
 # PATCH /orders/<rest_id>/<order_id>/<category>/<new_status>/
 # ------------------------------------------------------------------
@@ -377,6 +524,86 @@ def test_update_order_category_success(api_client, restaurant_with_user, custome
     assert js["food_status"] == "completed"
 
 
+@pytest.mark.django_db
+def test_status_updates_queue_one_notification_without_calling_fcm(
+    api_client, restaurant_with_user, customer, burger_item, fake_fcm
+):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    register_device_token(customer, "device-1")
+    worker = Worker.objects.create(restaurant=restaurant, name="W", pin="0000", role="staff")
+    o = Order.objects.create(customer=customer, restaurant=restaurant)
+    OrderItem.objects.create(order=o, item=burger_item, quantity=1)
+
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/in_progress/", data={"worker_id": worker.id}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/in_progress/", data={}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/food/completed/", data={}, format="json")
+
+    bodies = list(NotificationOutbox.objects.order_by("id").values_list("body", flat=True))
+    assert bodies == [f"Your order #{o.id} is now in_progress", f"Your order #{o.id} is now completed"]
+    assert fake_fcm.requests == []
+
+
+@pytest.mark.django_db
+def test_completing_an_order_updates_customer_affinity_once(
+    api_client, restaurant_with_user, customer, burger_item
+):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    o = Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal("9.99"))
+    OrderItem.objects.create(order=o, item=burger_item, quantity=1)
+
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/food/completed/", data={}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/food/completed/", data={}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/picked_up/", data={}, format="json")
+
+    affinity = CustomerRestaurantAffinity.objects.get(customer=customer, restaurant=restaurant)
+    assert affinity.order_count == 1
+    assert affinity.total_spent == Decimal("9.99")
+
+    other = Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal("5.00"))
+    api_client.patch(f"/orders/{restaurant.pk}/{other.id}/completed/", data={}, format="json")
+    affinity.refresh_from_db()
+    assert (affinity.order_count, affinity.total_spent) == (2, Decimal("14.99"))
+
+
+@pytest.mark.django_db
+def test_completing_an_order_counts_its_items_once(api_client, restaurant_with_user, customer, burger_item):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    o = Order.objects.create(customer=customer, restaurant=restaurant)
+    OrderItem.objects.create(order=o, item=burger_item, quantity=2)
+    OrderItem.objects.create(order=o, item=burger_item, quantity=1)
+
+    # Repeated category updates used to re-count the items on every call
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/food/completed/", data={}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{o.id}/food/completed/", data={}, format="json")
+    burger_item.refresh_from_db()
+    assert burger_item.times_ordered == 3
+
+    other = Order.objects.create(customer=customer, restaurant=restaurant)
+    OrderItem.objects.create(order=other, item=burger_item, quantity=4)
+    api_client.patch(f"/orders/{restaurant.pk}/{other.id}/picked_up/", data={}, format="json")
+    burger_item.refresh_from_db()
+    assert burger_item.times_ordered == 7
+
+
+@pytest.mark.django_db
+def test_reopened_order_is_not_counted_again(api_client, restaurant_with_user, customer, burger_item):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    o = Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal("9.99"))
+    OrderItem.objects.create(order=o, item=burger_item, quantity=1)
+
+    for new_status in ["completed", "pending", "completed", "picked_up"]:
+        resp = api_client.patch(f"/orders/{restaurant.pk}/{o.id}/{new_status}/", data={}, format="json")
+        assert resp.status_code == 200
+
+    burger_item.refresh_from_db()
+    assert burger_item.times_ordered == 1
+    assert CustomerRestaurantAffinity.objects.get(restaurant=restaurant).order_count == 1
+
+
 # ------------------------------------------------------------------
 # GET /order/customer/ and GET /order/<id>/
 # ------------------------------------------------------------------
@@ -474,3 +701,62 @@ def test_estimate_success(api_client, customer, restaurant, burger_item):
     assert isinstance(body.get("beverage_eta_minutes"), int)
     assert "estimated_food_ready_time" in body
     assert "estimated_beverage_ready_time" in body
+
+
+@pytest.mark.django_db
+def test_estimate_reuses_quote_until_queue_changes(api_client, customer, restaurant, burger_item, monkeypatch):
+    from app.utils.eta_quote_cache import eta_quote_cache
+
+    # Keep every request inside the same minute bucket
+    fixed_now = timezone.now().replace(second=10)
+    monkeypatch.setattr(timezone, "now", lambda: fixed_now)
+    api_client.force_authenticate(user=customer.user)
+    data = {"restaurant_id": restaurant.id, "order_items": [{"item_id": burger_item.id, "quantity": 1}]}
+
+    first = api_client.post("/order/estimate/", data=json.dumps(data), content_type="application/json")
+    hits = eta_quote_cache.hits
+    second = api_client.post("/order/estimate/", data=json.dumps(data), content_type="application/json")
+    assert second.json() == first.json()
+    assert eta_quote_cache.hits == hits + 1
+
+    order_payload = {
+        "customer_id": customer.pk,
+        "restaurant_id": restaurant.pk,
+        "order_items": [{"item_id": burger_item.pk, "quantity": 1}],
+    }
+    api_client.post("/order/new/", data=json.dumps(order_payload), content_type="application/json")
+    api_client.post("/order/estimate/", data=json.dumps(data), content_type="application/json")
+    assert eta_quote_cache.hits == hits + 1
+
+
+@pytest.mark.django_db
+def test_create_order_query_count_is_constant(api_client, customer, restaurant, ingredients):
+    api_client.force_authenticate(user=customer.user)
+    items = [
+        Item.objects.create(restaurant=restaurant, name=f"Item {i}", price=Decimal("2.50"), category="food")
+        for i in range(20)
+    ]
+    ing_ids = [ing.pk for ing in ingredients]
+
+    def place(lines):
+        payload = {
+            "customer_id": customer.pk,
+            "restaurant_id": restaurant.pk,
+            "order_items": [
+                {"item_id": item.pk, "quantity": 2, "unwanted_ingredients": ing_ids} for item in lines
+            ],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            resp = api_client.post("/order/new/", data=json.dumps(payload), content_type="application/json")
+        assert resp.status_code == 201
+        return resp.json(), len(ctx.captured_queries)
+
+    # The first order also sizes the scheduler and loads the persisted prep-time model
+    place(items[:1])
+    _, single = place(items[:1])
+    data, twenty = place(items)
+
+    assert twenty == single
+    assert Decimal(data["total_price"]) == Decimal("100.00")
+    assert len(data["order_items"]) == 20
+    assert all(sorted(line["unwanted_ingredients"]) == sorted(ing_ids) for line in data["order_items"])
@@ -4,8 +4,9 @@ import time
 
 import pytest
 from app.models.customer_models import Customer, CustomUser
-from app.models.promotion_models import PromotionNotification
+from app.models.promotion_models import PromotionDelivery, PromotionNotification
 from app.models.restaurant_models import Restaurant
+from app.utils.device_tokens import register_device_token
 
 
 @pytest.mark.django_db
@@ -68,6 +69,28 @@ def test_create_promotion_success(api_client, restaurant_with_user):
     assert result["sent"] is False
 
 
+@pytest.mark.django_db
+def test_create_promotion_for_recent_customers(api_client, restaurant_with_user):
+    _, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(
+        "/promotions/create/",
+        data=json.dumps({"title": "We miss you", "body": "10% off", "ordered_within_days": 30}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 201
+    assert resp.json()["ordered_within_days"] == 30
+
+    resp = api_client.post(
+        "/promotions/create/",
+        data=json.dumps({"title": "We miss you", "body": "10% off", "ordered_within_days": 0}),
+        content_type="application/json",
+    )
+    assert resp.status_code == 400
+    assert "ordered_within_days" in resp.json()
+
+
 @pytest.mark.django_db
 def test_create_promotion_invalid(api_client, restaurant_with_user):
     _, user = restaurant_with_user
@@ -140,35 +163,74 @@ def test_delete_promotion_not_found(api_client, restaurant_with_user):
 
 
 @pytest.mark.django_db
-def test_send_promotion_success(api_client, restaurant_with_user, customer, monkeypatch):
+def test_send_promotion_success(
+    api_client, restaurant_with_user, customer, settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.NOTIFICATION_DISPATCH_MODE = "eager"
     restaurant, user = restaurant_with_user
     # Prepare customers with tokens
-    customer.fcm_token = "token1"
-    customer.save()
+    register_device_token(customer, "token1")
     new_user = CustomUser.objects.create_user(
         username="c2", email="c2@test.com", password="pw"
     )
-    Customer.objects.create(
-        user=new_user, fcm_token="token2"
-    )
+    register_device_token(Customer.objects.create(user=new_user), "token2")
     promo = PromotionNotification.objects.create(
         restaurant=restaurant, title="Flash", body="Hurry up!"
     )
 
     calls = []
     monkeypatch.setattr(
-        "app.views.promotion_views.send_notification_to_device",
+        "app.utils.promotion_fanout.send_fcm_message",
         lambda device_token, title, body, data: calls.append((device_token, title, body, data))
     )
 
     api_client.force_authenticate(user=user)
-    resp = api_client.post(f"/promotions/{promo.id}/send/")
-    assert resp.status_code == 200
-    assert resp.json()["message"] == "Promotion sent!"
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = api_client.post(f"/promotions/{promo.id}/send/")
+    assert resp.status_code == 202
+    assert resp.json()["message"] == "Promotion queued."
+    job_id = resp.json()["job_id"]
     promo.refresh_from_db()
     assert promo.sent is True
     # Two customers with tokens
-    assert len(calls) == 2
+    assert sorted(call[0] for call in calls) == ["token1", "token2"]
+
+    status_resp = api_client.get(f"/promotions/deliveries/{job_id}/")
+    assert status_resp.status_code == 200
+    job = status_resp.json()
+    assert job["status"] == "completed"
+    assert (job["total_recipients"], job["sent_count"], job["failed_count"]) == (2, 2, 0)
+
+
+@pytest.mark.django_db
+def test_send_promotion_returns_before_sending(api_client, restaurant_with_user, settings):
+    settings.NOTIFICATION_DISPATCH_MODE = "manual"
+    restaurant, user = restaurant_with_user
+    promo = PromotionNotification.objects.create(restaurant=restaurant, title="Flash", body="Hurry up!")
+    api_client.force_authenticate(user=user)
+
+    first = api_client.post(f"/promotions/{promo.id}/send/")
+    again = api_client.post(f"/promotions/{promo.id}/send/")
+    assert first.status_code == again.status_code == 202
+    assert first.json()["status"] == "queued"
+    assert again.json()["job_id"] == first.json()["job_id"]
+    assert again.json()["message"] == "Promotion is already being sent."
+    promo.refresh_from_db()
+    assert promo.sent is False
+
+
+@pytest.mark.django_db
+def test_promotion_delivery_status_is_scoped_to_restaurant(api_client, restaurant_with_user):
+    _, user = restaurant_with_user
+    other_user = CustomUser.objects.create_user(username="other", email="other@example.com", password="pw")
+    other_rest = Restaurant.objects.create(user=other_user, name="Other")
+    promo = PromotionNotification.objects.create(restaurant=other_rest, title="X", body="Y")
+    delivery = PromotionDelivery.objects.create(promotion=promo)
+
+    api_client.force_authenticate(user=user)
+    resp = api_client.get(f"/promotions/deliveries/{delivery.id}/")
+    assert resp.status_code == 404
+    assert resp.json()["error"] == "Delivery not found"
 
 
 @pytest.mark.django_db
@@ -1,11 +1,15 @@
 import json
+from datetime import timedelta
 
 import pytest
 from app.models.customer_models import CustomUser
 from app.models.order_models import Order
 from app.models.restaurant_models import Restaurant
 from app.models.review_models import Review
+from app.models.stats_models import ItemDailySales
 from app.models.worker_models import Worker
+from app.utils.order_completion import on_order_completed
+from django.utils import timezone
 
 
 # ------------------------------------------------------------------
@@ -105,3 +109,21 @@ def test_list_reviews_success(api_client, restaurant, customer, order):
     assert any(rv["id"] == r1.id for rv in data)
     # ensure other review not included
     assert all(rv["order"] == order.id for rv in data)
+
+
+@pytest.mark.django_db
+def test_create_review_rates_the_order_items(api_client, restaurant, order_item):
+    order = order_item.order
+    order.worker = Worker.objects.create(restaurant=restaurant, pin="4444", role="bartender", name="R")
+    order.status = "completed"
+    order.save()
+    # Completed yesterday, reviewed today: the rating goes on the day of the sale
+    completed_at = timezone.now() - timedelta(days=1)
+    on_order_completed(order, completed_at)
+    api_client.force_authenticate(user=restaurant.user)
+
+    payload = {"order": order.id, "rating": 3}
+    resp = api_client.post("/mobile/review/create", data=json.dumps(payload), content_type="application/json")
+    assert resp.status_code == 201
+    row = ItemDailySales.objects.get(item=order_item.item)
+    assert (row.date, row.avg_rating) == (timezone.localtime(completed_at).date(), 3)
@@ -1,11 +1,14 @@
 import json
 from datetime import timedelta
+from datetime import timezone as dt_timezone
 from decimal import Decimal
 
 import pytest
-from app.models.order_models import Order
+from app.models.order_models import Order, OrderItem
+from app.models.restaurant_models import Item, Restaurant
+from app.models.stats_models import DailySalesRollup
+from app.utils.sales_rollup import record_daily_sales
 from django.utils import timezone
-from datetime import timezone as dt_timezone
 
 
 # ------------------------------------------------------------------
@@ -102,3 +105,119 @@ def test_daily_stats_invalid_method(api_client, restaurant):
     response = api_client.post("/daily_stats?date=2025-01-01", data=json.dumps({}), content_type="application/json")
     assert response.status_code == 405
     assert 'method "post" not allowed' in response.json().get("detail", "").lower()
+
+
+@pytest.mark.django_db
+def test_daily_stats_reads_rollup_maintained_on_completion(api_client, restaurant_with_user, customer, worker):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    order = Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal("12.00"))
+
+    api_client.patch(f"/orders/{restaurant.pk}/{order.id}/in_progress/", data={"worker_id": worker.id}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{order.id}/completed/", data={}, format="json")
+    api_client.patch(f"/orders/{restaurant.pk}/{order.id}/picked_up/", data={}, format="json")
+
+    order.refresh_from_db()
+    local_start = timezone.localtime(order.start_time)
+    assert DailySalesRollup.objects.get(restaurant=restaurant).total_orders == 1
+
+    response = api_client.get(f"/daily_stats?date={local_start.date().isoformat()}&hourly=true")
+    data = response.json()
+    assert (data["total_orders"], data["total_sales"], data["active_workers"]) == (1, 12.0, 1)
+    assert data["hourly"][local_start.hour] == {"hour": local_start.hour, "orders": 1, "sales": 12.0}
+
+
+# ------------------------------------------------------------------
+# GET /bartender-statistics/
+# ------------------------------------------------------------------
+@pytest.mark.django_db
+def test_bartender_statistics_filters_by_date(api_client, restaurant_with_user, customer, worker):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    start = timezone.now() - timedelta(days=2)
+    Order.objects.create(
+        customer=customer, restaurant=restaurant, worker=worker, total_price=Decimal("9.00"),
+        status="picked_up", start_time=start, completion_time=start + timedelta(minutes=5),
+    )
+
+    response = api_client.get("/bartender-statistics/")
+    assert response.status_code == 200
+    [stats] = response.json()["bartender_statistics"]
+    assert stats["total_orders"] == 1
+    assert stats["p50_time_seconds"] == stats["p90_time_seconds"] == 300
+
+    today = timezone.localdate().isoformat()
+    stats = api_client.get(f"/bartender-statistics/?since={today}").json()["bartender_statistics"][0]
+    assert stats["total_orders"] == 0
+
+    assert api_client.get("/bartender-statistics/?until=yesterday").status_code == 400
+
+
+# ------------------------------------------------------------------
+# GET /restaurant-statistics/
+# ------------------------------------------------------------------
+@pytest.mark.django_db
+def test_restaurant_statistics_week_is_gap_filled(api_client, restaurant_with_user, customer):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+    order = Order.objects.create(
+        customer=customer, restaurant=restaurant, total_price=Decimal("11.50"),
+        status="completed", start_time=timezone.now() - timedelta(days=2),
+    )
+    record_daily_sales(order)
+
+    data = api_client.get("/restaurant-statistics/?range=week").json()
+    assert len(data) == 8
+    assert [entry["total_sales"] for entry in data].count("0.00") == 7
+    sold_day = timezone.localtime(order.start_time).date().isoformat()
+    assert {"period": f"{sold_day}T00:00:00Z", "total_sales": "11.50"} in data
+
+
+@pytest.mark.django_db
+def test_restaurant_statistics_custom_range(api_client, restaurant_with_user):
+    restaurant, user = restaurant_with_user
+    api_client.force_authenticate(user=user)
+
+    data = api_client.get("/restaurant-statistics/?start=2026-01-01&end=2026-03-31&interval=month").json()
+    assert [entry["period"] for entry in data] == ["2026-01-01T00:00:00Z", "2026-02-01T00:00:00Z", "2026-03-01T00:00:00Z"]
+
+    assert api_client.get("/restaurant-statistics/?range=decade").status_code == 400
+    assert api_client.get("/restaurant-statistics/?start=2026-01-01&interval=minute").status_code == 400
+    assert api_client.get("/restaurant-statistics/?start=2026-02-01&end=2026-01-01").status_code == 400
+
+
+# ------------------------------------------------------------------
+# GET /api/statistics/ and /api/statistics/items/<id>/
+# ------------------------------------------------------------------
+@pytest.mark.django_db
+def test_item_statistics_come_from_completed_order_lines(api_client, restaurant_with_user, customer, burger_item):
+    restaurant, user = restaurant_with_user
+    burger_item.restaurant = restaurant
+    burger_item.save()
+    api_client.force_authenticate(user=user)
+    order = Order.objects.create(customer=customer, restaurant=restaurant, total_price=Decimal("19.98"))
+    OrderItem.objects.create(order=order, item=burger_item, quantity=2, unit_price=burger_item.price)
+    api_client.patch(f"/orders/{restaurant.pk}/{order.id}/completed/", data={}, format="json")
+    # A later menu price change does not rewrite past revenue
+    Item.objects.filter(id=burger_item.id).update(price=Decimal("20.00"))
+
+    [stats] = api_client.get("/api/statistics/?sort=revenue&limit=5").json()["items"]
+    assert (stats["name"], stats["units_sold"], stats["orders"], stats["sales"]) == ("Burger", 2, 1, 19.98)
+
+    trend = api_client.get(f"/api/statistics/items/{burger_item.id}/").json()
+    assert trend["item"] == "Burger"
+    assert trend["days"] == [
+        {"date": timezone.localdate().isoformat(), "units_sold": 2, "orders": 1, "sales": 19.98, "avg_rating": None}
+    ]
+
+    assert api_client.get("/api/statistics/?sort=rating").status_code == 400
+    assert api_client.get("/api/statistics/?limit=ten").status_code == 400
+
+
+@pytest.mark.django_db
+def test_item_sales_trend_is_scoped_to_restaurant(api_client, restaurant_with_user, custom_user):
+    _, user = restaurant_with_user
+    other = Restaurant.objects.create(user=custom_user, name="Elsewhere", address="1 Side St", phone="555-000-0000")
+    item = Item.objects.create(restaurant=other, name="Secret", price=5, category="Food")
+    api_client.force_authenticate(user=user)
+    assert api_client.get(f"/api/statistics/items/{item.id}/").status_code == 404
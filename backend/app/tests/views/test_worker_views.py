@@ -3,6 +3,10 @@ import json
 import pytest
 from app.models import CustomUser, Restaurant
 from app.models.worker_models import Worker
+from app.scheduler_instance import (
+    get_restaurant_scheduler,
+    refresh_restaurant_bartenders,
+)
 
 
 # ------------------------------------------------------------------
@@ -283,3 +287,21 @@ def test_delete_worker_other_restaurant(manager_client):
     response = manager_client.delete(f"/delete-worker/{other_worker.id}/")
     assert response.status_code == 403
     assert response.json()["error"] == "Unauthorized"
+
+
+@pytest.mark.django_db
+def test_bartender_changes_resize_scheduler(auth_client, restaurant):
+    """
+    Adding or removing bartenders resizes the restaurant's scheduler.
+    """
+    assert get_restaurant_scheduler(restaurant.id).num_bartenders == 1
+    ids = []
+    for pin in ("7001", "7002"):
+        data = {"pin": pin, "role": "bartender", "name": "Bar", "restaurant_id": restaurant.id}
+        response = auth_client.post("/create-worker/", data=json.dumps(data), content_type="application/json")
+        ids.append(response.json()["worker_id"])
+    assert get_restaurant_scheduler(restaurant.id).num_bartenders == 2
+
+    Worker.objects.filter(id=ids[0]).delete()
+    assert refresh_restaurant_bartenders(restaurant.id)
+    assert get_restaurant_scheduler(restaurant.id).num_bartenders == 1
@@ -4,9 +4,20 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .mobileViews.mobileViews import login_customer, register_customer
-from .mobileViews.stripeViews import create_payment_intent, delete_payment_method, list_saved_payment_methods, pay_with_saved_card
-from .views.auth_views import login_restaurant, login_user, register_user, validate_business
-from .views.menu_views import manage_menu_item, menu_items_api, get_item_statistics
+from .mobileViews.stripeViews import (
+    create_payment_intent,
+    delete_payment_method,
+    list_saved_payment_methods,
+    pay_with_saved_card,
+)
+from .views.auth_views import (
+    login_restaurant,
+    login_user,
+    register_user,
+    validate_business,
+)
+from .views.events_views import order_events
+from .views.menu_views import manage_menu_item, menu_items_api
 from .views.orders_views import (
     create_order,
     estimate_order_eta,
@@ -16,11 +27,24 @@ from .views.orders_views import (
     update_order_category_status,
     update_order_status,
 )
+from .views.promotion_views import (
+    create_promotion,
+    delete_promotion,
+    list_promotions,
+    promotion_delivery_status,
+    send_promotion,
+    update_promotion,
+)
 from .views.restaurant_views import get_menu_items, get_restaurant, get_restaurants
 from .views.review_views import create_review, list_reviews
-from .views.stats_views import daily_stats, get_bartender_statistics, get_item_statistics, get_restaurant_statistics
+from .views.stats_views import (
+    daily_stats,
+    get_bartender_statistics,
+    get_item_sales_trend,
+    get_item_statistics,
+    get_restaurant_statistics,
+)
 from .views.worker_views import create_worker, delete_worker, get_workers, update_worker
-from .views.promotion_views import list_promotions, create_promotion, update_promotion, delete_promotion, send_promotion
 
 
 urlpatterns = [
@@ -47,6 +71,7 @@ urlpatterns = [
     path("order/payment/saved_card/<str:payment_method_id>/", delete_payment_method, name="pay_with_saved_card"),
     path("order/<int:order_id>/", get_order, name="get_order"),
     path("order/estimate/", estimate_order_eta, name="estimate_order_eta"),
+    path("order/events/", order_events, name="order_events"),
 
     # api
     path("api/menu-items/", menu_items_api, name="menu_items_api"),
@@ -63,6 +88,7 @@ urlpatterns = [
     path("delete-worker/<int:worker_id>/", delete_worker, name="delete_worker"),
     path("daily_stats", daily_stats, name="daily_stats"),
     path('api/statistics/', get_item_statistics, name="get_item_statistics"),
+    path("api/statistics/items/<int:item_id>/", get_item_sales_trend, name="get_item_sales_trend"),
     path('bartender-statistics/', get_bartender_statistics, name="get_bartender_statistics"),
     path('restaurant-statistics/', get_restaurant_statistics, name="get_restaurant_statistics"),
     path("promotions/", list_promotions, name="list_promotions"),
@@ -70,4 +96,5 @@ urlpatterns = [
     path("promotions/<int:promotion_id>/update/", update_promotion, name="update_promotion"),
     path("promotions/<int:promotion_id>/delete/", delete_promotion, name="delete_promotion"),
     path("promotions/<int:promotion_id>/send/", send_promotion, name="send_promotion"),
+    path("promotions/deliveries/<int:job_id>/", promotion_delivery_status, name="promotion_delivery_status"),
 ]
@@ -1,12 +1,152 @@
 # app/utils/bartender_scheduler.py
 
-from datetime import timedelta
+import heapq
+import random
+from datetime import datetime, timedelta
+
+
+_rng = random.Random()
+
+
+class _Block:
+    """
+    Treap node holding one merged busy block [start, end).
+
+    Every node also caches aggregates for its subtree so slot searches can
+    skip whole subtrees:
+      - lo / hi: earliest start and latest end in the subtree
+      - max_gap: largest free gap between two consecutive blocks of the subtree
+    """
+
+    __slots__ = ("start", "end", "priority", "left", "right", "lo", "hi", "max_gap")
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.priority = _rng.random()
+        self.left = None
+        self.right = None
+        self.lo = start
+        self.hi = end
+        self.max_gap = None
+
+    def update(self):
+        left, right = self.left, self.right
+        self.lo = left.lo if left else self.start
+        self.hi = right.hi if right else self.end
+
+        gaps = []
+        if left:
+            gaps.append(self.start - left.hi)
+            if left.max_gap is not None:
+                gaps.append(left.max_gap)
+        if right:
+            gaps.append(right.lo - self.end)
+            if right.max_gap is not None:
+                gaps.append(right.max_gap)
+        self.max_gap = max(gaps) if gaps else None
+
+
+def _merge(left, right):
+    # Every block in `left` starts before every block in `right`
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _split(node, key):
+    # Returns (blocks starting before key, blocks starting at or after key)
+    if node is None:
+        return None, None
+    if node.start < key:
+        lower, upper = _split(node.right, key)
+        node.right = lower
+        node.update()
+        return node, upper
+    lower, upper = _split(node.left, key)
+    node.left = upper
+    node.update()
+    return lower, node
+
+
+def _last(node):
+    while node.right:
+        node = node.right
+    return node
+
+
+def _floor(node, dt):
+    # Last block with start <= dt
+    found = None
+    while node:
+        if node.start <= dt:
+            found = node
+            node = node.right
+        else:
+            node = node.left
+    return found
+
+
+def _ceiling(node, dt):
+    # First block with start > dt
+    found = None
+    while node:
+        if node.start > dt:
+            found = node
+            node = node.left
+        else:
+            node = node.right
+    return found
+
+
+def _first_fitting_gap(node, required):
+    # End of the first block whose following gap (inside this subtree) >= required
+    while node is not None:
+        if node.max_gap is None or node.max_gap < required:
+            return None
+        left = node.left
+        if left and left.max_gap is not None and left.max_gap >= required:
+            node = left
+            continue
+        if left and node.start - left.hi >= required:
+            return left.hi
+        if node.right and node.right.lo - node.end >= required:
+            return node.end
+        node = node.right
+    return None
 
 
 class BartenderScheduler:
+    """
+    Busy timeline for a single bartender.
+
+    Overlapping or touching bookings are merged into disjoint busy blocks kept
+    in a treap ordered by start time, so both add_order and find_free_slot run
+    in O(log n) instead of re-sorting / scanning the whole list.
+    """
+
     def __init__(self):
-        # Busy intervals stored as tuples of (start_dt, end_dt)
-        self.busy_intervals = []
+        self._root = None
+        # Raw bookings as a min-heap of (end_dt, start_dt) so expired ones can be pruned cheaply
+        self._bookings = []
+        # Set once bookings were pruned; later "first" gaps are no longer the very first gap
+        self._pruned = False
+
+    @property
+    def busy_intervals(self):
+        """Raw (start_dt, end_dt) bookings, sorted by start time."""
+        return sorted((start, end) for end, start in self._bookings)
+
+    def __len__(self):
+        return len(self._bookings)
 
     def add_order(self, start_dt, duration_minutes):
         """
@@ -14,31 +154,92 @@ class BartenderScheduler:
         :param duration_minutes: integer minutes for order duration
         """
         end_dt = start_dt + timedelta(minutes=duration_minutes)
-        self.busy_intervals.append((start_dt, end_dt))
-        self.busy_intervals.sort(key=lambda interval: interval[0])
+        heapq.heappush(self._bookings, (end_dt, start_dt))
+
+        # Pull out every block overlapping or touching [start_dt, end_dt] and fuse them
+        before, rest = _split(self._root, start_dt)
+        if before is not None:
+            prev = _last(before)
+            if prev.end >= start_dt:
+                before, _ = _split(before, prev.start)
+                start_dt = prev.start
+                end_dt = max(end_dt, prev.end)
+
+        overlapping, after = _split(rest, end_dt + timedelta.resolution)
+        if overlapping is not None:
+            end_dt = max(end_dt, overlapping.hi)
+
+        self._root = _merge(_merge(before, _Block(start_dt, end_dt)), after)
+
+    def prune(self, now_dt):
+        """
+        Drop bookings that ended before now_dt. Queries are expected to move
+        forward in time, so pruned history is never needed again.
+        """
+        if not self._bookings or self._bookings[0][0] >= now_dt:
+            return
+
+        while self._bookings and self._bookings[0][0] < now_dt:
+            heapq.heappop(self._bookings)
+        self._pruned = True
+
+        # Blocks are disjoint, so the expired ones form a prefix of the treap
+        current = _floor(self._root, now_dt)
+        if current is not None and current.end >= now_dt:
+            _, self._root = _split(self._root, current.start)
+        else:
+            _, self._root = _split(self._root, now_dt)
+
+    def snapshot(self):
+        """JSON-serialisable copy of this timeline."""
+        return {
+            "bookings": [[start.isoformat(), end.isoformat()] for start, end in self.busy_intervals],
+            "pruned": self._pruned,
+        }
+
+    @staticmethod
+    def parse_bookings(data):
+        """Returns the (start_dt, duration_minutes) bookings stored in a snapshot."""
+        bookings = []
+        for start, end in data["bookings"]:
+            start_dt = datetime.fromisoformat(start)
+            duration = (datetime.fromisoformat(end) - start_dt).total_seconds() / 60
+            bookings.append((start_dt, duration))
+        return bookings
+
+    def tail(self):
+        """Returns the end of the last busy block, or None when idle."""
+        return self._root.hi if self._root else None
 
     def find_free_slot(self, now_dt, required_duration_minutes):
         """
         Returns the earliest datetime >= now_dt where a slot of required_duration_minutes is free.
         Allows an exact‑fit gap (gap == required) only after the first busy interval.
         """
-        slot_start = now_dt
-        first_gap = True
+        self.prune(now_dt)
+        if self._root is None:
+            return now_dt
 
-        for busy_start, busy_end in self.busy_intervals:
-            # Is there a gap before this busy interval?
-            if slot_start < busy_start:
-                gap = (busy_start - slot_start).total_seconds() / 60
-                # First gap: require strictly greater; subsequent gaps: allow >=
-                if (first_gap and gap > required_duration_minutes) or (
-                    not first_gap and gap >= required_duration_minutes
-                ):
-                    return slot_start
+        required = timedelta(minutes=required_duration_minutes)
+
+        # Step out of the busy block we are standing in, if any
+        slot_start = now_dt
+        current = _floor(self._root, now_dt)
+        if current is not None and current.end > now_dt:
+            slot_start = current.end
 
-            # Skip past any overlapping or earlier busy window
-            if slot_start < busy_end:
-                slot_start = busy_end
+        following = _ceiling(self._root, slot_start)
+        if following is None:
+            return slot_start
 
-            first_gap = False
+        # The gap before the very first booking must be strictly larger than required
+        gap = following.start - slot_start
+        first_gap = not self._pruned and current is None
+        if (first_gap and gap > required) or (not first_gap and gap >= required):
+            return slot_start
 
-        return slot_start
+        # Earliest later gap that fits, otherwise after the last busy block
+        before, rest = _split(self._root, following.start)
+        found = _first_fitting_gap(rest, required)
+        self._root = _merge(before, rest)
+        return found if found is not None else self._root.hi
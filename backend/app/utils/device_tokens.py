@@ -0,0 +1,75 @@
+# app/utils/device_tokens.py
+
+from app.models import Customer, DeviceToken
+from django.db.models import F
+from django.utils import timezone
+
+
+def register_device_token(customer, token):
+    """
+    Records that `token` belongs to `customer` and is in use. A token moving
+    to another account (re-login on the same phone) follows it, and a
+    previously deactivated token is revived.
+    """
+    device, _ = DeviceToken.objects.update_or_create(
+        token=token,
+        defaults={
+            "customer": customer,
+            "active": True,
+            "failure_count": 0,
+            "last_error": "",
+            "last_seen_at": timezone.now(),
+        },
+    )
+    # Customer.fcm_token mirrors the most recently registered device
+    if customer.fcm_token != token:
+        customer.fcm_token = token
+        Customer.objects.filter(pk=customer.pk).update(fcm_token=token)
+    return device
+
+
+def deactivate_device_tokens(tokens, reason=""):
+    """Stops sending to tokens FCM reported as unregistered or invalid."""
+    tokens = list(tokens)
+    if not tokens:
+        return 0
+    deactivated = DeviceToken.objects.filter(token__in=tokens, active=True).update(
+        active=False,
+        failure_count=F("failure_count") + 1,
+        last_error=reason[:1000],
+        last_failure_at=timezone.now(),
+    )
+    Customer.objects.filter(fcm_token__in=tokens).update(fcm_token=None)
+    return deactivated
+
+
+def record_send_failures(tokens, reason=""):
+    """Counts failed sends that say nothing about the token itself (timeouts, 5xx)."""
+    tokens = list(tokens)
+    if tokens:
+        DeviceToken.objects.filter(token__in=tokens).update(
+            failure_count=F("failure_count") + 1,
+            last_error=reason[:1000],
+            last_failure_at=timezone.now(),
+        )
+
+
+def record_send_successes(tokens):
+    tokens = list(tokens)
+    if tokens:
+        DeviceToken.objects.filter(token__in=tokens, failure_count__gt=0).update(failure_count=0)
+
+
+def record_send_outcomes(delivered=(), errors=()):
+    """
+    Applies the results of a batch of sends in at most three UPDATEs.
+
+    :param delivered: tokens FCM accepted
+    :param errors: (token, exception) pairs for rejected sends
+    """
+    dead, failed = {}, {}
+    for token, exc in errors:
+        (dead if getattr(exc, "permanent", False) else failed)[token] = str(exc)
+    deactivate_device_tokens(dead, next(reversed(dead.values()), ""))
+    record_send_failures(failed, next(reversed(failed.values()), ""))
+    record_send_successes(delivered)
@@ -16,3 +16,61 @@ def calculate_beverage_eta_multibartender(num_bev, now_dt, scheduler, per_bev=1)
     finish_dt = slot_start + timedelta(minutes=duration)
     eta = (finish_dt - now_dt).total_seconds() / 60
     return round(eta), finish_dt, idx
+
+
+def batch_round_to_nearest_five(minutes_list):
+    return [math.ceil(minutes / 5) * 5 for minutes in minutes_list]
+
+
+def batch_food_ready_times(food_counts, now_dt, base_time=15, per_item=2):
+    """
+    Food ready times for a whole queue in one pass.
+
+    :param food_counts: number of food items per order
+    :return: list of datetimes, None for orders without food
+    """
+    return batch_prep_ready_times(
+        [base_time + per_item * count if count > 0 else 0 for count in food_counts], now_dt
+    )
+
+
+def batch_prep_ready_times(food_minutes, now_dt):
+    """
+    Food ready times for a queue whose preparation minutes are already known
+    (e.g. from a PrepTimeModel), rounded up to five minutes like the formula.
+
+    :param food_minutes: preparation minutes per order, 0 for orders without food
+    :return: list of datetimes, None for orders without food
+    """
+    etas = batch_round_to_nearest_five(food_minutes)
+    return [
+        now_dt + timedelta(minutes=eta) if minutes > 0 else None
+        for minutes, eta in zip(food_minutes, etas)
+    ]
+
+
+def batch_beverage_ready_times(bev_counts, now_dt, scheduler, per_bev=1):
+    """
+    Books a whole queue of beverage orders into the scheduler, in order.
+
+    Ready times are floored to the minute and each slot is booked so that it
+    ends exactly at that ready time, the same as booking order by order.
+
+    :param bev_counts: number of beverages per order
+    :return: list of (ready_dt, bartender_idx, slot_start), None for orders without beverages
+    """
+    find_slot = scheduler.find_best_free_slot
+    book = scheduler.add_order_to_bartender
+
+    results = []
+    for count in bev_counts:
+        if count <= 0:
+            results.append(None)
+            continue
+        duration = count * per_bev
+        slot_start, idx = find_slot(now_dt, duration)
+        ready_dt = (slot_start + timedelta(minutes=duration)).replace(second=0, microsecond=0)
+        slot_start = ready_dt - timedelta(minutes=duration)
+        book(idx, slot_start, duration)
+        results.append((ready_dt, idx, slot_start))
+    return results
@@ -0,0 +1,84 @@
+# app/utils/eta_quote_cache.py
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+
+
+class EtaQuoteCache:
+    """
+    Short-lived cache for read-only ETA quotes (the cart preview).
+
+    Keys carry a per-restaurant generation number, so invalidating a
+    restaurant is O(1): its old entries simply stop matching and age out.
+    """
+
+    def __init__(self, ttl_seconds=30, max_entries=5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(self, restaurant_id, food_minutes, bev_minutes, minute_bucket, scheduler_version):
+        return (
+            restaurant_id,
+            self._generations[restaurant_id],
+            food_minutes,
+            bev_minutes,
+            minute_bucket,
+            scheduler_version,
+        )
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, quote):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, quote)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, restaurant_id):
+        """Forget every quote for a restaurant whose queue just changed."""
+        with self._lock:
+            self._generations[restaurant_id] += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+eta_quote_cache = EtaQuoteCache(
+    ttl_seconds=getattr(settings, "ETA_QUOTE_CACHE_TTL", 30),
+    max_entries=getattr(settings, "ETA_QUOTE_CACHE_MAX_ENTRIES", 5000),
+)
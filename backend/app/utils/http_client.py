@@ -0,0 +1,137 @@
+# app/utils/http_client.py
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import EmptyPoolError
+
+
+class _PoolTimeoutMixin:
+    # requests never passes urllib3's pool_timeout, so blocking pools would wait forever
+    pool_timeout = None
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)
+
+
+class BoundedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose per-host pool size is a hard limit: with pool_block a
+    request waits up to pool_timeout seconds for a free connection instead of
+    opening (and then discarding) an extra one, and fails with a
+    ConnectionError if none frees up.
+    """
+
+    def __init__(self, pool_timeout=5, **kwargs):
+        self.pool_timeout = pool_timeout
+        super().__init__(pool_block=True, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(pool_class.__name__, (_PoolTimeoutMixin, pool_class), {"pool_timeout": self.pool_timeout})
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        try:
+            return super().send(request, **kwargs)
+        except EmptyPoolError as exc:
+            raise requests.ConnectionError(exc, request=request) from exc
+
+
+class OutboundHttp:
+    """
+    Shared keep-alive connection pool for calls to external services (FCM,
+    Google OAuth, Google Places), so bursts of requests reuse TLS connections
+    instead of opening one per call.
+
+    urllib3 keeps one pool per host of at most pool_maxsize connections;
+    bursts beyond that wait up to pool_timeout seconds for a connection to be
+    returned. pool_hosts bounds how many hosts are kept. Requests without an
+    explicit timeout get (connect_timeout, read_timeout). The session is
+    rebuilt after a fork so worker processes never share sockets.
+    """
+
+    def __init__(self, connect_timeout=3, read_timeout=10, pool_hosts=10, pool_maxsize=10, pool_timeout=5):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_hosts = pool_hosts
+        self.pool_maxsize = pool_maxsize
+        self.pool_timeout = pool_timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                self._session = self._build_session()
+                self._pid = os.getpid()
+            return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = BoundedHTTPAdapter(
+            pool_timeout=self.pool_timeout, pool_connections=self.pool_hosts, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+    def stats(self):
+        """
+        Connection reuse per host: requests sent, connections opened, and how
+        many requests went over an already open connection.
+        """
+        with self._lock:
+            session = self._session
+        hosts = {}
+        if session is None:
+            return hosts
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                entry = hosts.setdefault(host, {"requests": 0, "connections": 0, "reused": 0})
+                entry["requests"] += pool.num_requests
+                entry["connections"] += pool.num_connections
+                entry["reused"] += pool.num_requests - pool.num_connections
+        return hosts
+
+    def host_stats(self, url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return self.stats().get(f"{parts.scheme}://{parts.hostname}:{port}")
+
+
+outbound_http = OutboundHttp(
+    connect_timeout=getattr(settings, "OUTBOUND_HTTP_CONNECT_TIMEOUT", 3),
+    read_timeout=getattr(settings, "OUTBOUND_HTTP_READ_TIMEOUT", 10),
+    pool_hosts=getattr(settings, "OUTBOUND_HTTP_POOL_HOSTS", 10),
+    pool_maxsize=getattr(settings, "OUTBOUND_HTTP_POOL_MAXSIZE", 10),
+    pool_timeout=getattr(settings, "OUTBOUND_HTTP_POOL_TIMEOUT", 5),
+)
@@ -0,0 +1,219 @@
+# app/utils/item_sales.py
+
+from decimal import Decimal
+
+from app.models import Item, ItemDailySales, Order, OrderItem
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+ITEM_SORTS = {"units": "units_sold", "revenue": "revenue", "orders": "orders"}
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+# What each order line earned, at the price it was sold for
+LINE_REVENUE = ExpressionWrapper(
+    F("quantity") * Coalesce("unit_price", "item__price"),
+    output_field=MONEY,
+)
+
+
+def sales_day(order):
+    """
+    The day an order's lines count towards: its start_time, like the daily
+    rollup, else when it first completed. Neither changes once the order has
+    completed, so a later review is rated on the same row as the sale.
+    """
+    moment = order.start_time or order.first_completed_at
+    return timezone.localtime(moment).date() if moment is not None else None
+
+
+def _completed_lines(restaurant_id=None):
+    lines = OrderItem.objects.filter(order__status__in=Order.COMPLETED_STATUSES)
+    if restaurant_id is not None:
+        lines = lines.filter(order__restaurant_id=restaurant_id)
+    return lines.annotate(day=TruncDate(Coalesce("order__start_time", "order__first_completed_at"))).filter(
+        day__isnull=False
+    )
+
+
+def _item_rows(lines):
+    """Daily item rows for the given order lines, by (item_id, date), in two grouped queries."""
+    rows = {}
+    for row in lines.values("item_id", "order__restaurant_id", "day").annotate(
+        units=Sum("quantity"), orders=Count("order", distinct=True), revenue=Sum(LINE_REVENUE)
+    ):
+        rows[(row["item_id"], row["day"])] = ItemDailySales(
+            item_id=row["item_id"],
+            restaurant_id=row["order__restaurant_id"],
+            date=row["day"],
+            units=row["units"],
+            orders=row["orders"],
+            revenue=row["revenue"],
+        )
+    for row in lines.filter(order__review__isnull=False).values("item_id", "day").annotate(
+        rating_sum=Sum("order__review__rating"), rating_count=Count("id")
+    ):
+        daily = rows[(row["item_id"], row["day"])]
+        daily.rating_sum, daily.rating_count = row["rating_sum"], row["rating_count"]
+    return rows
+
+
+def _increment(order, item_id, day, **amounts):
+    updated = ItemDailySales.objects.filter(item_id=item_id, date=day).update(
+        **{field: F(field) + amount for field, amount in amounts.items()}
+    )
+    if updated:
+        return
+    # The item's first sale recorded for the day: start the row from the
+    # day's other completed orders, so a row created part way through a day
+    # (right after a deploy, say) is not missing earlier sales
+    earlier = _completed_lines(order.restaurant_id).filter(item_id=item_id, day=day).exclude(order_id=order.id)
+    row = _item_rows(earlier).get(
+        (item_id, day), ItemDailySales(item_id=item_id, restaurant_id=order.restaurant_id, date=day)
+    )
+    for field, amount in amounts.items():
+        setattr(row, field, getattr(row, field) + amount)
+    try:
+        with transaction.atomic():
+            row.save()
+    except IntegrityError:
+        # Another request created the row first
+        _increment(order, item_id, day, **amounts)
+
+
+def record_item_sales(order):
+    """Adds a completed order's lines to each item's row for the order's day."""
+    day = sales_day(order)
+    if day is None:
+        # Only orders completed through on_order_completed have a sales day
+        return
+    lines = order.order_items.values("item_id").annotate(
+        units=Sum("quantity"), revenue=Sum(LINE_REVENUE)
+    ).order_by("item_id")
+    for line in lines:
+        _increment(order, line["item_id"], day, units=line["units"], orders=1, revenue=line["revenue"])
+
+
+def increment_times_ordered(order):
+    """
+    Adds the order's quantities to its items' times_ordered counters in a
+    single UPDATE. The increments are computed in the database, so
+    concurrent completions and menu edits cannot overwrite each other.
+    """
+    quantities = OrderItem.objects.filter(order_id=order.id, item_id=OuterRef("pk")).values("item_id").annotate(
+        total=Sum("quantity")
+    ).values("total")
+    return Item.objects.filter(orderitem__order_id=order.id).distinct().update(
+        times_ordered=F("times_ordered") + Subquery(quantities)
+    )
+
+
+def record_item_rating(review):
+    """Adds a review's rating to the rows of every item in the reviewed order."""
+    order = review.order
+    day = sales_day(order)
+    if day is None:
+        # The order never completed; there are no sales to rate
+        return
+    lines = order.order_items.values("item_id").annotate(lines=Count("id")).order_by("item_id")
+    for line in lines:
+        # No row means the order never completed; there are no sales to rate
+        ItemDailySales.objects.filter(item_id=line["item_id"], date=day).update(
+            rating_sum=F("rating_sum") + review.rating * line["lines"],
+            rating_count=F("rating_count") + line["lines"],
+        )
+
+
+def item_statistics(restaurant_id, since=None, until=None, sort="units", limit=None):
+    """
+    Menu items with units sold, orders, revenue and average rating over a
+    date range, best sellers first, in one grouped query over the daily item
+    rows. Items without sales in the range are listed with zeros.
+
+    :param sort: "units", "revenue" or "orders"
+    :param limit: only the top N items
+    """
+    in_range = Q()
+    if since is not None:
+        in_range &= Q(daily_sales__date__gte=since)
+    if until is not None:
+        in_range &= Q(daily_sales__date__lte=until)
+
+    items = (
+        Item.objects.filter(restaurant_id=restaurant_id)
+        .annotate(
+            units_sold=Coalesce(Sum("daily_sales__units", filter=in_range), 0),
+            orders=Coalesce(Sum("daily_sales__orders", filter=in_range), 0),
+            revenue=Coalesce(Sum("daily_sales__revenue", filter=in_range), Value(Decimal("0.00")), output_field=MONEY),
+            rating_sum=Sum("daily_sales__rating_sum", filter=in_range),
+            rating_count=Sum("daily_sales__rating_count", filter=in_range),
+        )
+        .order_by(f"-{ITEM_SORTS[sort]}", "-times_ordered", "name")
+    )
+    if limit is not None:
+        items = items[:limit]
+
+    return [
+        {
+            "id": item.id,
+            "name": item.name,
+            "price": item.price,
+            "times_ordered": item.times_ordered,
+            "units_sold": item.units_sold,
+            "orders": item.orders,
+            "sales": item.revenue,
+            "avg_rating": item.rating_sum / item.rating_count if item.rating_count else None,
+        }
+        for item in items
+    ]
+
+
+def item_trend(item_id, since=None, until=None):
+    """Day-by-day sales of one item, read off the (item, date) unique index."""
+    rows = ItemDailySales.objects.filter(item_id=item_id)
+    if since is not None:
+        rows = rows.filter(date__gte=since)
+    if until is not None:
+        rows = rows.filter(date__lte=until)
+    return [
+        {
+            "date": row.date,
+            "units_sold": row.units,
+            "orders": row.orders,
+            "sales": row.revenue,
+            "avg_rating": row.avg_rating,
+        }
+        for row in rows.order_by("date")
+    ]
+
+
+def rebuild_item_sales(restaurant_id=None):
+    """
+    Recomputes the daily item rows from the order lines of completed orders
+    with two grouped queries, for backfills and repairs.
+
+    :return: number of rows written
+    """
+    lines = _completed_lines(restaurant_id)
+    existing = ItemDailySales.objects.all()
+    if restaurant_id is not None:
+        existing = existing.filter(restaurant_id=restaurant_id)
+
+    rows = _item_rows(lines)
+    with transaction.atomic():
+        existing.delete()
+        ItemDailySales.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
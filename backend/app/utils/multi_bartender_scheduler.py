@@ -1,9 +1,111 @@
+import heapq
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+
+# One pending order as it was booked into a restaurant's scheduler, with its
+# food and beverage preparation minutes
+PlannedOrder = namedtuple(
+    "PlannedOrder",
+    ["order_id", "food_minutes", "bev_minutes", "food_ready", "beverage_ready", "bartender_idx", "slot_start"],
+)
+
+
 class MultiBartenderScheduler:
-    def __init__(self, num_bartenders=1):
+    # Pools at least this large track bartender availability in heaps by default
+    HEAP_MIN_BARTENDERS = 10
+
+    def __init__(self, num_bartenders=1, use_heap=None):
+        from app.utils.bartender_scheduler import BartenderScheduler
+        self.schedulers = [BartenderScheduler() for _ in range(num_bartenders)]
+        # Without an explicit choice the mode follows the pool size, also across resizes
+        self._auto_heap = use_heap is None
+        self.use_heap = self._heap_mode_for(num_bartenders) if use_heap is None else use_heap
+        # Pending queue booked into this scheduler, maintained by order_eta_utils
+        self.planned_orders = []
+        self.planned_at = None
+        # Bumped on every booking change so cached quotes can tell they are stale
+        self.version = 0
+        self._reset_heaps()
+
+    def _heap_mode_for(self, num_bartenders):
+        return num_bartenders >= self.HEAP_MIN_BARTENDERS
+
+    @property
+    def num_bartenders(self):
+        return len(self.schedulers)
+
+    def _reset_heaps(self):
+        """
+        Heap mode treats every bartender as a queue that is busy from before
+        the latest query time until its tail, which is exactly what the greedy
+        booking loop produces. Bartenders that are free "now" sit in an idle heap
+        keyed by index, busy ones in a heap keyed by (tail, index). Entries are
+        versioned so stale ones are skipped lazily.
+        """
+        count = len(self.schedulers)
+        self._tails = [None] * count
+        self._versions = [0] * count
+        self._idle = [(idx, 0) for idx in range(count)]
+        self._busy = []
+        self._last_now = None
+        self._heap_valid = True
+
+    def reset(self, now_dt=None):
+        """
+        Drop every booking for every bartender.
+
+        :param now_dt: optional time the next bookings are planned from
+        """
+        self.schedulers = [type(s)() for s in self.schedulers]
+        self.planned_orders = []
+        self.planned_at = now_dt
+        self.version += 1
+        self._reset_heaps()
+        self._last_now = now_dt
+
+    def resize(self, num_bartenders):
+        """
+        Change the number of bartenders while keeping as much of the planned
+        queue as possible.
+
+        Planned orders keep their slots up to the first one the new pool would
+        book differently: on shrinking, the first order booked on a removed
+        bartender; on growing, the first order that had to wait for a slot
+        (a new idle bartender could start it right away). That prefix is
+        re-booked as planned, so the next recalculation only plans the rest.
+        """
+        num_bartenders = max(1, num_bartenders)
+        if num_bartenders == self.num_bartenders:
+            return
+
+        growing = num_bartenders > self.num_bartenders
+        cut = 0
+        for plan in self.planned_orders:
+            if plan.bev_minutes > 0 and (
+                plan.slot_start > self.planned_at if growing else plan.bartender_idx >= num_bartenders
+            ):
+                break
+            cut += 1
+        kept = self.planned_orders[:cut]
+
         from app.utils.bartender_scheduler import BartenderScheduler
         self.schedulers = [BartenderScheduler() for _ in range(num_bartenders)]
+        if self._auto_heap:
+            self.use_heap = self._heap_mode_for(num_bartenders)
+        # Heaps are rebuilt for the new pool (and mode) while re-booking the kept prefix
+        self.reset(self.planned_at)
+        for plan in kept:
+            if plan.bev_minutes > 0:
+                self.add_order_to_bartender(plan.bartender_idx, plan.slot_start, plan.bev_minutes)
+        self.planned_orders = kept
 
     def find_best_free_slot(self, now_dt, duration_minutes):
+        if self.use_heap and self._heap_valid and (
+            self._last_now is None or now_dt >= self._last_now
+        ):
+            return self._heap_free_slot(now_dt)
+
         best_start = None
         best_idx = None
         for idx, sched in enumerate(self.schedulers):
@@ -12,5 +114,101 @@ class MultiBartenderScheduler:
                 best_start, best_idx = candidate, idx
         return best_start, best_idx
 
+    def _heap_free_slot(self, now_dt):
+        self._last_now = now_dt
+        versions = self._versions
+
+        # Bartenders whose queue drained by now are free right away
+        while self._busy and self._busy[0][0] <= now_dt:
+            _, idx, version = heapq.heappop(self._busy)
+            if version == versions[idx]:
+                heapq.heappush(self._idle, (idx, version))
+
+        while self._idle and self._idle[0][1] != versions[self._idle[0][0]]:
+            heapq.heappop(self._idle)
+        if self._idle:
+            return now_dt, self._idle[0][0]
+
+        while self._busy[0][2] != versions[self._busy[0][1]]:
+            heapq.heappop(self._busy)
+        tail, idx, _ = self._busy[0]
+        return tail, idx
+
     def add_order_to_bartender(self, idx, start_dt, duration_minutes):
-        self.schedulers[idx].add_order(start_dt, duration_minutes)
+        sched = self.schedulers[idx]
+        self.version += 1
+        if not (self.use_heap and self._heap_valid):
+            sched.add_order(start_dt, duration_minutes)
+            return
+
+        tail = self._tails[idx]
+        if self._last_now is None or start_dt > max(tail or self._last_now, self._last_now):
+            # Booking leaves an idle gap ahead of the queue; fall back to scanning
+            self._heap_valid = False
+            sched.add_order(start_dt, duration_minutes)
+            return
+
+        sched.prune(self._last_now)
+        sched.add_order(start_dt, duration_minutes)
+
+        end_dt = start_dt + timedelta(minutes=duration_minutes)
+        self._tails[idx] = end_dt if tail is None else max(tail, end_dt)
+        self._versions[idx] += 1
+        heapq.heappush(self._busy, (self._tails[idx], idx, self._versions[idx]))
+
+    def snapshot(self):
+        """
+        JSON-serialisable copy of the bookings and the planned queue, used to
+        share one timeline between worker processes.
+        """
+        return {
+            "num_bartenders": self.num_bartenders,
+            # None keeps the mode automatic for the restored scheduler
+            "use_heap": None if self._auto_heap else self.use_heap,
+            "version": self.version,
+            "planned_at": self.planned_at.isoformat() if self.planned_at else None,
+            "planned_orders": [
+                [value.isoformat() if isinstance(value, datetime) else value for value in plan]
+                for plan in self.planned_orders
+            ],
+            "bartenders": [sched.snapshot() for sched in self.schedulers],
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        from app.utils.bartender_scheduler import BartenderScheduler
+
+        scheduler = cls(num_bartenders=data["num_bartenders"], use_heap=data["use_heap"])
+        planned_at = data["planned_at"]
+        scheduler.reset(datetime.fromisoformat(planned_at) if planned_at else None)
+
+        for idx, bartender in enumerate(data["bartenders"]):
+            for start_dt, duration in BartenderScheduler.parse_bookings(bartender):
+                scheduler.add_order_to_bartender(idx, start_dt, duration)
+            scheduler.schedulers[idx]._pruned = bartender["pruned"]
+
+        date_fields = {"food_ready", "beverage_ready", "slot_start"}
+        scheduler.planned_orders = [
+            PlannedOrder(*(
+                datetime.fromisoformat(value) if field in date_fields and value else value
+                for field, value in zip(PlannedOrder._fields, plan)
+            ))
+            for plan in data["planned_orders"]
+        ]
+        scheduler.version = data.get("version", 0)
+        return scheduler
+
+    def assign_orders(self, now_dt, durations):
+        """
+        Books a whole list of beverage orders in queue order.
+
+        :param now_dt: datetime the queue is scheduled from
+        :param durations: minutes needed for each order
+        :return: list of (slot_start, bartender_idx), one per duration
+        """
+        assignments = []
+        for duration in durations:
+            slot_start, idx = self.find_best_free_slot(now_dt, duration)
+            self.add_order_to_bartender(idx, slot_start, duration)
+            assignments.append((slot_start, idx))
+        return assignments
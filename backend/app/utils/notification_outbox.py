@@ -0,0 +1,192 @@
+# app/utils/notification_outbox.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app.mobileViews.utils import FcmSendError, send_fcm_message
+from app.models.notification_models import NotificationOutbox
+from app.utils.device_tokens import record_send_outcomes
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# A claimed message that is still "sending" after this long is assumed lost
+# (worker died mid-send) and becomes due again
+SENDING_LEASE = timedelta(minutes=2)
+
+
+def enqueue_notification(device_token, title, body, data=None, dedup_key=None):
+    """
+    Stores a push notification in the outbox and wakes the dispatcher once the
+    surrounding transaction commits, so the caller never waits on FCM.
+
+    :param dedup_key: notifications sharing a key are only sent once
+    :return: (outbox entry, created)
+    """
+    fields = {
+        "device_token": device_token,
+        "title": title,
+        "body": body,
+        "data": data or {},
+    }
+    if dedup_key is None:
+        entry, created = NotificationOutbox.objects.create(**fields), True
+    else:
+        entry, created = NotificationOutbox.objects.get_or_create(dedup_key=dedup_key, defaults=fields)
+    if created:
+        transaction.on_commit(notification_dispatcher.wake)
+    return entry, created
+
+
+def enqueue_order_update(order):
+    """
+    Queues the "order is now <status>" notice for each of the customer's
+    active devices.
+
+    :return: list of (outbox entry, created)
+    """
+    devices = order.customer.devices.filter(active=True).values_list("id", "token")
+    return [
+        enqueue_notification(
+            device_token=token,
+            title="Order Update",
+            body=f"Your order #{order.id} is now {order.status}",
+            data={"type": "ORDER_UPDATE", "order_id": str(order.id)},
+            dedup_key=f"order:{order.id}:{order.status}:{device_id}",
+        )
+        for device_id, token in devices
+    ]
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts."""
+    delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_RETRY_MAX_SECONDS))
+
+
+def claim_due(now, limit):
+    """
+    Marks up to `limit` due messages as "sending" and returns them. Rows locked
+    by another dispatcher are skipped, so several processes can drain the same
+    outbox.
+    """
+    with transaction.atomic():
+        due = NotificationOutbox.objects.filter(
+            status__in=["pending", "sending"], next_attempt_at__lte=now
+        ).order_by("next_attempt_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        entries = list(due[:limit])
+        if entries:
+            NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+                status="sending", attempts=F("attempts") + 1, next_attempt_at=now + SENDING_LEASE
+            )
+    for entry in entries:
+        entry.attempts += 1
+    return entries
+
+
+def deliver(entry, now):
+    """Sends one claimed message and records the outcome; returns the new status."""
+    try:
+        send_fcm_message(entry.device_token, entry.title, entry.body, entry.data)
+    except Exception as exc:
+        record_send_outcomes(errors=[(entry.device_token, exc)])
+        permanent = isinstance(exc, FcmSendError) and exc.permanent
+        if permanent or entry.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            outcome = {"status": "failed"}
+        else:
+            outcome = {"status": "pending", "next_attempt_at": now + retry_delay(entry.attempts)}
+        NotificationOutbox.objects.filter(pk=entry.pk).update(last_error=str(exc)[:1000], **outcome)
+        return outcome["status"]
+
+    NotificationOutbox.objects.filter(pk=entry.pk).update(status="sent", sent_at=timezone.now(), last_error="")
+    record_send_outcomes(delivered=[entry.device_token])
+    return "sent"
+
+
+class NotificationDispatcher:
+    """
+    Drains the notification outbox on a small thread pool.
+
+    Views only insert outbox rows; wake() is hooked to transaction commit and
+    hands the sending to the pool. Failed sends are retried with exponential
+    backoff by a timer, and anything left behind by a restart is picked up by
+    the next wake() or by `manage.py dispatch_notifications`.
+    """
+
+    def __init__(self, max_workers=4, batch_size=50):
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor = None
+        self._retry_timer = None
+        self._retry_at = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="notification-dispatch"
+                )
+            return self._executor
+
+    def wake(self):
+        mode = settings.NOTIFICATION_DISPATCH_MODE
+        if mode == "eager":
+            self.dispatch_due()
+        elif mode == "thread":
+            self._pool().submit(self._run)
+
+    def _run(self):
+        try:
+            self.dispatch_due()
+            self._schedule_retry()
+        except Exception:
+            logger.exception("Notification dispatch failed")
+        finally:
+            # Pool threads hold their own connections
+            connections.close_all()
+
+    def dispatch_due(self, now=None):
+        """
+        Sends every message due at `now`.
+
+        :return: dict counting the messages sent, retrying and failed
+        """
+        counts = {"sent": 0, "pending": 0, "failed": 0}
+        while True:
+            current = now or timezone.now()
+            entries = claim_due(current, self.batch_size)
+            if not entries:
+                return counts
+            for entry in entries:
+                counts[deliver(entry, current)] += 1
+
+    def _schedule_retry(self):
+        next_at = NotificationOutbox.objects.filter(status="pending").aggregate(
+            next_at=Min("next_attempt_at")
+        )["next_at"]
+        if next_at is None:
+            return
+        with self._lock:
+            if self._retry_timer is not None and self._retry_timer.is_alive() and self._retry_at <= next_at:
+                return
+            if self._retry_timer is not None:
+                self._retry_timer.cancel()
+            delay = max((next_at - timezone.now()).total_seconds(), 0)
+            self._retry_timer = threading.Timer(delay, self.wake)
+            self._retry_timer.daemon = True
+            self._retry_at = next_at
+            self._retry_timer.start()
+
+
+notification_dispatcher = NotificationDispatcher(
+    max_workers=getattr(settings, "NOTIFICATION_DISPATCH_WORKERS", 4)
+)
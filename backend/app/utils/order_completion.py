@@ -0,0 +1,94 @@
+# app/utils/order_completion.py
+
+from app.models import CustomerRestaurantAffinity, Order
+from app.utils.item_sales import increment_times_ordered, record_item_sales
+from app.utils.sales_rollup import record_daily_sales
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+def is_completion(previous_status, new_status):
+    """True when a status change is the one that completes the order."""
+    return previous_status not in Order.COMPLETED_STATUSES and new_status in Order.COMPLETED_STATUSES
+
+
+def record_customer_affinity(order, completed_at):
+    """Adds a completed order to its customer's affinity row for the restaurant."""
+    updated = CustomerRestaurantAffinity.objects.filter(
+        customer_id=order.customer_id, restaurant_id=order.restaurant_id
+    ).update(
+        order_count=F("order_count") + 1,
+        total_spent=F("total_spent") + order.total_price,
+        last_order_at=Greatest("last_order_at", completed_at),
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            CustomerRestaurantAffinity.objects.create(
+                customer_id=order.customer_id,
+                restaurant_id=order.restaurant_id,
+                order_count=1,
+                total_spent=order.total_price,
+                first_order_at=completed_at,
+                last_order_at=completed_at,
+            )
+    except IntegrityError:
+        # Another request created the row first
+        record_customer_affinity(order, completed_at)
+
+
+def on_order_completed(order, completed_at=None):
+    """
+    Runs when an order reaches a completed status, inside the transaction
+    that completes it. Every per-order rollup is maintained here, once per
+    order: the first call stamps first_completed_at, and an order sent back
+    and completed again is not counted a second time.
+
+    :return: whether the order was counted
+    """
+    completed_at = completed_at or order.completion_time or timezone.now()
+    claimed = Order.objects.filter(pk=order.pk, first_completed_at__isnull=True).update(
+        first_completed_at=completed_at
+    )
+    if not claimed:
+        return False
+    order.first_completed_at = completed_at
+
+    record_customer_affinity(order, completed_at)
+    record_daily_sales(order)
+    record_item_sales(order)
+    increment_times_ordered(order)
+    return True
+
+
+def rebuild_customer_affinity(restaurant_id=None):
+    """
+    Recomputes affinity rows from completed orders in one grouped query, for
+    backfills and repairs.
+
+    :return: number of affinity rows written
+    """
+    orders = Order.objects.filter(status__in=Order.COMPLETED_STATUSES)
+    affinities = CustomerRestaurantAffinity.objects.all()
+    if restaurant_id is not None:
+        orders = orders.filter(restaurant_id=restaurant_id)
+        affinities = affinities.filter(restaurant_id=restaurant_id)
+
+    # When on_order_completed counted the order, else the best guess for orders
+    # completed some other way (the admin, fixtures)
+    completed_at = Coalesce("first_completed_at", "completion_time", "updated_at")
+    rows = orders.values("customer_id", "restaurant_id").annotate(
+        order_count=Count("id"),
+        total_spent=Sum("total_price"),
+        first_order_at=Min(completed_at),
+        last_order_at=Max(completed_at),
+    )
+    with transaction.atomic():
+        affinities.delete()
+        created = CustomerRestaurantAffinity.objects.bulk_create(
+            [CustomerRestaurantAffinity(**row) for row in rows], batch_size=1000
+        )
+    return len(created)
@@ -1,75 +1,174 @@
 # app/utils/order_eta_utils.py
 
-from datetime import timedelta
-
-from app.models.order_models import Order
-from app.scheduler_instance import get_restaurant_scheduler
-from app.utils.eta_calculator import (
-    calculate_beverage_eta_multibartender,
-    calculate_food_eta,
-    round_to_nearest_five,
-)
+from collections import defaultdict
+
+from app.models.order_models import Order, OrderItem
+from app.scheduler_instance import get_restaurant_scheduler, save_restaurant_scheduler
+from app.utils.eta_calculator import batch_beverage_ready_times, batch_prep_ready_times
+from app.utils.eta_quote_cache import eta_quote_cache
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler, PlannedOrder
+from app.utils.order_events import publish_order_events
+from app.utils.prep_time_model import prep_time_models
 from django.utils import timezone
 
 
-def recalculate_pending_etas(restaurant_id, num_bartenders=1):
+ETA_FIELDS = ["estimated_food_ready_time", "estimated_beverage_ready_time"]
+
+
+class EtaConsistencyError(Exception):
+    """Raised in verify mode when the incremental result differs from a full rebuild."""
+
+
+def _load_pending_queue(restaurant_id, model):
+    """
+    Returns [(order, food_minutes, bev_minutes)] for the pending queue using
+    two queries: one for the orders and one for all of their items. Minutes
+    come from the restaurant's PrepTimeModel and are 0 when there is nothing
+    of that kind to prepare.
+    """
+    orders = list(
+        Order.objects
+        .filter(restaurant_id=restaurant_id, status="pending")
+        .order_by("start_time", "id")
+        .only("id", "start_time", "restaurant", "customer", *ETA_FIELDS)
+    )
+
+    food_lines = defaultdict(list)
+    bev_lines = defaultdict(list)
+    item_rows = OrderItem.objects.filter(order__in=[o.id for o in orders]).values_list(
+        "order_id", "item_id", "quantity", "item__category"
+    )
+    for order_id, item_id, quantity, category in item_rows:
+        if category.lower() == "beverage":
+            bev_lines[order_id].append((item_id, quantity))
+        else:
+            food_lines[order_id].append((item_id, quantity))
+
+    return [
+        (
+            o,
+            model.food_minutes(food_lines[o.id]) if food_lines[o.id] else 0,
+            model.beverage_minutes(bev_lines[o.id]),
+        )
+        for o in orders
+    ]
+
+
+def _unchanged_prefix(planned, queue):
+    """Number of leading queue entries that still match what was planned."""
+    length = 0
+    for plan, (order, food_minutes, bev_minutes) in zip(planned, queue):
+        current = (
+            order.id,
+            food_minutes,
+            bev_minutes,
+            order.estimated_food_ready_time,
+            order.estimated_beverage_ready_time,
+        )
+        if plan[:5] != current:
+            break
+        length += 1
+    return length
+
+
+def _plan_orders(queue, now, scheduler):
+    """
+    Computes ETAs for the given (order, food_minutes, bev_minutes) entries in
+    queue order, booking beverages into the scheduler as it goes.
+    """
+    food_minutes = [minutes for _, minutes, _ in queue]
+    bev_minutes = [minutes for _, _, minutes in queue]
+
+    food_ready_times = batch_prep_ready_times(food_minutes, now)
+    beverage_bookings = batch_beverage_ready_times(bev_minutes, now, scheduler)
+
+    planned = []
+    for (order, food, bev), food_ready, booking in zip(
+        queue, food_ready_times, beverage_bookings
+    ):
+        beverage_ready, bart_idx, slot_start = booking or (None, None, None)
+        planned.append(PlannedOrder(
+            order.id, food, bev, food_ready, beverage_ready, bart_idx, slot_start
+        ))
+    return planned
+
+
+def recalculate_pending_etas(restaurant_id, num_bartenders=None, changed_order_id=None, verify=False, now=None):
     """
     Recalculate and persist, for each pending order:
       - estimated_food_ready_time  (or None)
       - estimated_beverage_ready_time  (or None)
+
+    The restaurant's scheduler remembers the queue it booked last time. Within
+    the same minute only the orders from the first difference onwards (or from
+    changed_order_id, if given) are recomputed, and only rows whose ETAs
+    actually changed are written, with a single bulk_update.
+
+    With verify=True the result is compared against a full rebuild and an
+    EtaConsistencyError is raised on any difference.
+
+    num_bartenders defaults to the restaurant's bartender Worker count.
+    Preparation minutes come from the restaurant's learned PrepTimeModel.
+    now (default: the current time) is the moment to plan from, for replays.
+
+    Returns the list of orders whose ETAs were updated.
     """
     # Use a single “now” floored to the minute
-    now = timezone.now().replace(second=0, microsecond=0)
+    now = (now or timezone.now()).replace(second=0, microsecond=0)
 
-    # Fresh scheduler for this restaurant
     scheduler = get_restaurant_scheduler(restaurant_id, num_bartenders)
-    scheduler.schedulers = [type(s)() for s in scheduler.schedulers]
+    version_before = scheduler.version
+    queue = _load_pending_queue(restaurant_id, prep_time_models.get(restaurant_id))
 
-    pending = (
-        Order.objects
-        .filter(restaurant_id=restaurant_id, status="pending")
-        .order_by("start_time")
-    )
+    planned = scheduler.planned_orders if scheduler.planned_at == now else []
+    start = _unchanged_prefix(planned, queue)
+    if changed_order_id is not None:
+        for idx, (order, _, _) in enumerate(queue[:start]):
+            if order.id == changed_order_id:
+                start = idx
+                break
 
-    for order in pending:
-        # Count food vs. beverage items
-        num_food = sum(
-            oi.quantity
-            for oi in order.order_items.all()
-            if oi.item.category.lower() != "beverage"
-        )
-        num_bev = sum(
-            oi.quantity
-            for oi in order.order_items.all()
-            if oi.item.category.lower() == "beverage"
-        )
+    if start < len(planned) or scheduler.planned_at != now:
+        # Re-book the untouched prefix as it was planned, without searching again
+        kept = planned[:start]
+        scheduler.reset(now)
+        for plan in kept:
+            if plan.bev_minutes > 0:
+                scheduler.add_order_to_bartender(plan.bartender_idx, plan.slot_start, plan.bev_minutes)
+        scheduler.planned_orders = kept
 
-        # — FOOD ETA —
-        if num_food > 0:
-            # Round to nearest 5 minutes and compute ready timestamp
-            food_mins = round_to_nearest_five(calculate_food_eta(num_food))
-            food_dt = now + timedelta(minutes=food_mins)
-            order.estimated_food_ready_time = food_dt
-        else:
-            order.estimated_food_ready_time = None
+    suffix = _plan_orders(queue[start:], now, scheduler)
+    scheduler.planned_orders = scheduler.planned_orders + suffix
 
-        # — BEVERAGE ETA —
-        if num_bev > 0:
-            # Compute exact finish, then floor to minute
-            _, bev_finish_dt, bart_idx = calculate_beverage_eta_multibartender(
-                num_bev, now, scheduler
-            )
-            bev_finish_dt = bev_finish_dt.replace(second=0, microsecond=0)
-            order.estimated_beverage_ready_time = bev_finish_dt
+    updated = []
+    changed_at = timezone.now()
+    for (order, _, _), plan in zip(queue[start:], suffix):
+        persisted = (order.estimated_food_ready_time, order.estimated_beverage_ready_time)
+        if persisted != (plan.food_ready, plan.beverage_ready):
+            order.estimated_food_ready_time = plan.food_ready
+            order.estimated_beverage_ready_time = plan.beverage_ready
+            # bulk_update skips auto_now, but order boards sync on updated_at
+            order.updated_at = changed_at
+            updated.append(order)
 
-            # Mark that bartender slot taken
-            slot_start = bev_finish_dt - timedelta(minutes=num_bev)
-            scheduler.add_order_to_bartender(bart_idx, slot_start, num_bev)
-        else:
-            order.estimated_beverage_ready_time = None
+    # Persist only the absolute ready-time fields
+    if updated:
+        Order.objects.bulk_update(updated, ETA_FIELDS + ["updated_at"])
+        publish_order_events(updated, "order.eta", fields=ETA_FIELDS)
+    save_restaurant_scheduler(restaurant_id, scheduler)
+    if updated or scheduler.version != version_before:
+        eta_quote_cache.invalidate(restaurant_id)
+
+    if verify:
+        rebuilt = _plan_orders(queue, now, MultiBartenderScheduler(scheduler.num_bartenders))
+        mismatched = [
+            plan.order_id
+            for plan, expected in zip(scheduler.planned_orders, rebuilt)
+            if plan[:5] != expected[:5]
+        ]
+        if mismatched or len(rebuilt) != len(scheduler.planned_orders):
+            raise EtaConsistencyError(
+                f"Incremental ETAs differ from a full rebuild for orders {mismatched}"
+            )
 
-        # Persist only the absolute ready-time fields
-        order.save(update_fields=[
-            "estimated_food_ready_time",
-            "estimated_beverage_ready_time",
-        ])
+    return updated
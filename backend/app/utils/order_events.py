@@ -0,0 +1,129 @@
+# app/utils/order_events.py
+
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+
+def restaurant_channel(restaurant_id):
+    return f"restaurant:{restaurant_id}"
+
+
+def customer_channel(customer_id):
+    return f"customer:{customer_id}"
+
+
+class Subscription:
+    """One listener on a channel; events are taken with get()."""
+
+    def __init__(self, channel, max_pending):
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def _deliver(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def get(self, timeout=None):
+        """Next event; raises queue.Empty if none arrives within timeout seconds."""
+        return self._queue.get(timeout=timeout)
+
+
+class OrderEventBroker:
+    """
+    In-process publish/subscribe for order events.
+
+    publish() is called from regular view code, possibly from worker threads;
+    subscribers are SSE streams blocked on their own thread-safe queue in the
+    thread serving the stream. Slow subscribers drop events beyond max_pending
+    instead of growing without bound.
+
+    Every process has its own broker, so a deployment with several worker
+    processes needs sticky routing or a shared broker behind the same interface.
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel, self.max_pending)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            listeners = self._subscribers.get(subscription.channel)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            listeners = list(self._subscribers.get(channel, ()))
+            self.published += 1
+        for subscription in listeners:
+            subscription._deliver(event)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(listeners) for listeners in self._subscribers.values())
+
+
+order_event_broker = OrderEventBroker(max_pending=getattr(settings, "ORDER_EVENTS_MAX_PENDING", 100))
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def order_event(order, event_type):
+    """Compact payload describing an order change."""
+    return {
+        "type": event_type,
+        "order_id": order.id,
+        "status": order.status,
+        "food_status": order.food_status,
+        "beverage_status": order.beverage_status,
+        "estimated_food_ready_time": _isoformat(order.estimated_food_ready_time),
+        "estimated_beverage_ready_time": _isoformat(order.estimated_beverage_ready_time),
+    }
+
+
+def publish_order_events(orders, event_type, fields=None):
+    """
+    Publishes an event for each order to its restaurant and customer channels
+    once the current transaction commits, so listeners never see changes that
+    get rolled back.
+
+    :param fields: optional subset of payload keys to send (e.g. only ETAs)
+    """
+    events = []
+    for order in orders:
+        payload = order_event(order, event_type) if fields is None else {
+            "type": event_type,
+            "order_id": order.id,
+            **{field: _isoformat(getattr(order, field)) for field in fields},
+        }
+        events.append((order.restaurant_id, order.customer_id, payload))
+    if not events:
+        return
+
+    def send():
+        for restaurant_id, customer_id, payload in events:
+            order_event_broker.publish(restaurant_channel(restaurant_id), payload)
+            order_event_broker.publish(customer_channel(customer_id), payload)
+
+    transaction.on_commit(send)
@@ -0,0 +1,62 @@
+# app/utils/order_sync.py
+
+import hashlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+
+# Sync tokens trail the clock by this much, so rows whose transaction committed
+# slightly after a poll read them are still picked up by the next delta
+SYNC_TOKEN_OVERLAP = timedelta(seconds=2)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidSyncToken(ValueError):
+    """Raised when an updated_since token cannot be parsed."""
+
+
+def _to_token(dt):
+    # Microseconds since the epoch: exact, URL safe and comparable
+    return str((dt - _EPOCH) // timedelta(microseconds=1))
+
+
+def board_version(orders):
+    """
+    (last_update, order_count) for a restaurant's orders, from one aggregate
+    query on the (restaurant, updated_at) index.
+    """
+    state = orders.aggregate(last_update=Max("updated_at"), count=Count("id"))
+    return state["last_update"], state["count"]
+
+
+def sync_token(last_update):
+    """
+    Token for the next updated_since request. Orders changed within the last
+    SYNC_TOKEN_OVERLAP are sent again by the next delta; once nothing changed
+    for that long, deltas come back empty.
+    """
+    horizon = timezone.now() - SYNC_TOKEN_OVERLAP
+    return _to_token(min(last_update, horizon) if last_update else horizon)
+
+
+def board_etag(last_update, order_count, params):
+    """
+    ETag for one rendering of the order board. ETA minutes in the payload are
+    relative to now, so the current minute is part of the tag.
+    """
+    minute = timezone.now().replace(second=0, microsecond=0).isoformat()
+    raw = "|".join([_to_token(last_update) if last_update else "", str(order_count), minute, params])
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def changed_since(orders, token):
+    """Orders updated after the token."""
+    try:
+        since = _EPOCH + timedelta(microseconds=int(token))
+    except (ValueError, OverflowError) as exc:
+        raise InvalidSyncToken(f"Invalid updated_since token '{token}'") from exc
+    return orders.filter(updated_at__gt=since)
@@ -0,0 +1,58 @@
+# app/utils/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+# Newest first; orders that have not started yet (NULL start_time) come first
+ORDER_BOARD_ORDERING = (F("start_time").desc(nulls_first=True), "-id")
+
+
+def encode_cursor(order):
+    """Opaque cursor pointing just after `order` in ORDER_BOARD_ORDERING."""
+    start_time = order.start_time.isoformat() if order.start_time else None
+    raw = json.dumps([start_time, order.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Returns the (start_time, id) a cursor points after."""
+    try:
+        start_time, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(start_time) if start_time else None), int(order_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidCursor(f"Invalid cursor '{cursor}'") from exc
+
+
+def after_cursor(queryset, cursor):
+    """
+    Filters an ORDER_BOARD_ORDERING queryset down to the rows after the cursor,
+    a range scan on (start_time, id) rather than an OFFSET.
+    """
+    start_time, order_id = decode_cursor(cursor)
+    if start_time is None:
+        return queryset.filter(Q(start_time__isnull=True, id__lt=order_id) | Q(start_time__isnull=False))
+    return queryset.filter(Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=order_id))
+
+
+def cursor_page(queryset, cursor, limit):
+    """
+    One page of an ORDER_BOARD_ORDERING queryset.
+
+    :param cursor: cursor returned with the previous page, or None for the first page
+    :return: (rows, next_cursor), next_cursor is None on the last page
+    """
+    if cursor:
+        queryset = after_cursor(queryset, cursor)
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -0,0 +1,249 @@
+# app/utils/prep_time_model.py
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import (
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+
+# Orders an item needs before its own estimate outweighs the restaurant-wide one
+ITEM_PRIOR_ORDERS = 10
+
+
+class PrepTimeModel:
+    """
+    Preparation minutes for one restaurant.
+
+    Food takes food_base + per-unit minutes for every food item; beverages take
+    per-unit minutes each. item_minutes is the learned per-unit lookup table,
+    items missing from it use the restaurant-wide per-unit minutes. With no
+    history this is exactly the fixed 15 + 2 x items / 1 per beverage formula.
+    """
+
+    def __init__(self, food_base=15, food_per_item=2, bev_per_item=1, item_minutes=None, samples=0):
+        self.food_base = food_base
+        self.food_per_item = food_per_item
+        self.bev_per_item = bev_per_item
+        self.item_minutes = item_minutes or {}
+        self.samples = samples
+
+    def food_minutes(self, lines):
+        """:param lines: (item_id, quantity) for the food items of an order"""
+        per_item = self.item_minutes
+        default = self.food_per_item
+        return self.food_base + sum(per_item.get(item_id, default) * qty for item_id, qty in lines)
+
+    def beverage_minutes(self, lines):
+        """
+        :param lines: (item_id, quantity) for the beverages of an order
+        :return: whole minutes, so bartender bookings stay minute aligned
+        """
+        per_item = self.item_minutes
+        default = self.bev_per_item
+        return math.ceil(sum(per_item.get(item_id, default) * qty for item_id, qty in lines) - 1e-9)
+
+
+def _order_units(order_ref, beverage):
+    """Subquery: units of food (or beverage) items in the order referenced by order_ref."""
+    from app.models.order_models import OrderItem
+
+    items = OrderItem.objects.filter(order=OuterRef(order_ref))
+    category = Q(item__category__iexact="beverage")
+    items = items.filter(category) if beverage else items.exclude(category)
+    # A plain SUM() function, so the outer query can still aggregate over it
+    units = items.order_by().annotate(total=Func(F("quantity"), function="SUM")).values("total")
+    return Coalesce(Subquery(units, output_field=IntegerField()), 0)
+
+
+def _minutes(duration):
+    return duration.total_seconds() / 60 if duration is not None else None
+
+
+def train_prep_time_model(restaurant_id, min_samples=None):
+    """
+    Learns a PrepTimeModel from the restaurant's completed orders
+    (completion_time - start_time) with two aggregate queries:
+
+      1. least-squares sums over orders for the food base / per-item fit and
+         the beverage-only per-unit average
+      2. per-item averages, shrunk towards the restaurant-wide per-unit
+         minutes according to how many orders contained the item
+    """
+    from app.models.order_models import Order, OrderItem
+
+    if min_samples is None:
+        min_samples = getattr(settings, "PREP_TIME_MIN_SAMPLES", 20)
+    model = PrepTimeModel()
+    duration = ExpressionWrapper(F("completion_time") - F("start_time"), output_field=DurationField())
+
+    orders = (
+        Order.objects.filter(
+            restaurant_id=restaurant_id,
+            status__in=Order.COMPLETED_STATUSES,
+            start_time__isnull=False,
+            completion_time__gt=F("start_time"),
+        )
+        .annotate(food_units=_order_units("pk", False), bev_units=_order_units("pk", True), duration=duration)
+    )
+    food = Q(food_units__gt=0)
+    bev_only = Q(food_units=0, bev_units__gt=0)
+    weighted = ExpressionWrapper(F("food_units") * F("duration"), output_field=DurationField())
+    sums = orders.aggregate(
+        n=Count("id", filter=food),
+        sx=Sum("food_units", filter=food),
+        sxx=Sum(F("food_units") * F("food_units"), filter=food),
+        sy=Sum("duration", filter=food),
+        sxy=Sum(weighted, filter=food),
+        bev_n=Count("id", filter=bev_only),
+        bev_sx=Sum("bev_units", filter=bev_only),
+        bev_sy=Sum("duration", filter=bev_only),
+    )
+
+    if sums["n"] >= min_samples:
+        n, sx, sxx = sums["n"], sums["sx"], sums["sxx"]
+        sy, sxy = _minutes(sums["sy"]), _minutes(sums["sxy"])
+        denominator = n * sxx - sx * sx
+        slope = (n * sxy - sx * sy) / denominator if denominator else None
+        if slope is not None and slope >= 0 and sy - slope * sx >= 0:
+            model.food_per_item = slope
+            model.food_base = (sy - slope * sx) / n
+        else:
+            # Every order had the same size (or the fit is nonsensical); keep the base
+            model.food_per_item = max(0.0, (sy / n - model.food_base) * n / sx)
+    if sums["bev_n"] >= min_samples:
+        model.bev_per_item = _minutes(sums["bev_sy"]) / sums["bev_sx"]
+    model.samples = sums["n"] + sums["bev_n"]
+    if not model.samples:
+        return model
+
+    # Per item: average order duration and order size (of the item's own kind)
+    beverage = Q(item__category__iexact="beverage")
+    rows = (
+        OrderItem.objects.filter(order__in=orders.values("pk"))
+        .annotate(
+            duration=ExpressionWrapper(
+                F("order__completion_time") - F("order__start_time"), output_field=DurationField()
+            ),
+            food_units=_order_units("order_id", False),
+            bev_units=_order_units("order_id", True),
+        )
+        .values("item_id")
+        .annotate(
+            orders=Count("order_id", distinct=True),
+            is_beverage=Count("id", filter=beverage),
+            avg_duration=Avg("duration"),
+            avg_food_units=Avg("food_units"),
+            avg_bev_units=Avg("bev_units"),
+        )
+    )
+    for row in rows:
+        avg_duration = _minutes(row["avg_duration"])
+        if row["is_beverage"]:
+            if not row["avg_bev_units"] or row["avg_food_units"]:
+                continue  # Only beverage-only orders say anything about a drink
+            default, estimate = model.bev_per_item, avg_duration / row["avg_bev_units"]
+        else:
+            default = model.food_per_item
+            estimate = max(0.0, (avg_duration - model.food_base) / row["avg_food_units"])
+        orders_seen = row["orders"]
+        model.item_minutes[row["item_id"]] = (
+            (ITEM_PRIOR_ORDERS * default + orders_seen * estimate) / (ITEM_PRIOR_ORDERS + orders_seen)
+        )
+    return model
+
+
+def save_prep_time_model(restaurant_id, model):
+    from app.models.scheduler_models import PrepTimeEstimate
+
+    PrepTimeEstimate.objects.update_or_create(
+        restaurant_id=restaurant_id,
+        defaults={
+            "food_base": model.food_base,
+            "food_per_item": model.food_per_item,
+            "bev_per_item": model.bev_per_item,
+            "item_minutes": {str(item_id): minutes for item_id, minutes in model.item_minutes.items()},
+            "samples": model.samples,
+        },
+    )
+
+
+def load_prep_time_model(restaurant_id):
+    """The persisted model for a restaurant, or the default one if it was never trained."""
+    from app.models.scheduler_models import PrepTimeEstimate
+
+    estimate = PrepTimeEstimate.objects.filter(restaurant_id=restaurant_id).first()
+    if estimate is None:
+        return PrepTimeModel()
+    return PrepTimeModel(
+        food_base=estimate.food_base,
+        food_per_item=estimate.food_per_item,
+        bev_per_item=estimate.bev_per_item,
+        item_minutes={int(item_id): minutes for item_id, minutes in estimate.item_minutes.items()},
+        samples=estimate.samples,
+    )
+
+
+class PrepTimeModels:
+    """
+    Per-restaurant PrepTimeModel cache for the request path.
+
+    Training is offline: `manage.py train_prep_time_models` (run periodically)
+    fits the models and persists them. get() never trains; it returns the
+    cached model and reloads the persisted one (a single primary-key lookup)
+    once the cached copy is older than ttl_seconds. Restaurants that were
+    never trained get the default fixed-formula model.
+    """
+
+    def __init__(self, ttl_seconds=900):
+        self.ttl_seconds = ttl_seconds
+        self._models = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def get(self, restaurant_id):
+        entry = self._models.get(restaurant_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return self.refresh(restaurant_id)
+
+    def refresh(self, restaurant_id):
+        """Reloads the persisted model for a restaurant."""
+        model = load_prep_time_model(restaurant_id)
+        with self._lock:
+            self._models[restaurant_id] = (time.monotonic() + self.ttl_seconds, model)
+            self.refreshes += 1
+        return model
+
+    def retrain(self, restaurant_id):
+        """Trains and persists a restaurant's model; for the training command, not requests."""
+        model = train_prep_time_model(restaurant_id)
+        save_prep_time_model(restaurant_id, model)
+        self.set(restaurant_id, model)
+        return model
+
+    def set(self, restaurant_id, model):
+        with self._lock:
+            self._models[restaurant_id] = (time.monotonic() + self.ttl_seconds, model)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.refreshes = 0
+
+
+prep_time_models = PrepTimeModels(ttl_seconds=getattr(settings, "PREP_TIME_MODEL_TTL", 900))
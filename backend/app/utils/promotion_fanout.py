@@ -0,0 +1,200 @@
+# app/utils/promotion_fanout.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from app.mobileViews.utils import send_fcm_message
+from app.models import DeviceToken, PromotionDelivery
+from app.utils.device_tokens import record_send_outcomes
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# A running delivery that has not saved progress for this long is assumed
+# abandoned (process restarted) and may be resumed
+STALE_DELIVERY = timedelta(minutes=10)
+
+
+class RateLimiter:
+    """Spaces calls evenly so at most `rate` start per second across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _runnable(now):
+    return Q(status="queued") | Q(status="running", updated_at__lt=now - STALE_DELIVERY)
+
+
+def promotion_recipients(promotion, now=None):
+    """
+    Active devices a promotion goes to, in id order so deliveries can resume.
+
+    With ordered_within_days set, only devices of customers whose last order
+    at the promotion's restaurant falls in that window (an index range scan
+    on CustomerRestaurantAffinity); otherwise every active device.
+    """
+    devices = DeviceToken.objects.filter(active=True)
+    if promotion.ordered_within_days:
+        cutoff = (now or timezone.now()) - timedelta(days=promotion.ordered_within_days)
+        devices = devices.filter(
+            customer__restaurant_affinities__restaurant_id=promotion.restaurant_id,
+            customer__restaurant_affinities__last_order_at__gte=cutoff,
+        )
+    return devices.order_by("id")
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class PromotionFanout:
+    """
+    Sends promotions to their audience off the request path.
+
+    start() records a PromotionDelivery and hands it to a background thread
+    once the transaction commits. The runner streams recipients from the
+    database in chunks, sends each chunk through a pool of `concurrency`
+    threads limited to `rate` messages per second, and saves the counters
+    after every chunk so clients can poll the progress.
+    """
+
+    def __init__(self, chunk_size=500, concurrency=8, rate=200):
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.rate = rate
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="promotion-fanout")
+            return self._executor
+
+    def start(self, promotion):
+        """
+        Queues a delivery of the promotion, or returns the one already queued
+        or running.
+
+        :return: (delivery, created)
+        """
+        active = promotion.deliveries.filter(status__in=["queued", "running"]).first()
+        if active is not None:
+            return active, False
+        delivery = PromotionDelivery.objects.create(promotion=promotion)
+        transaction.on_commit(lambda: self._dispatch(delivery.id))
+        return delivery, True
+
+    def _dispatch(self, delivery_id):
+        mode = settings.NOTIFICATION_DISPATCH_MODE
+        if mode == "eager":
+            self.run(delivery_id)
+        elif mode == "thread":
+            self._pool().submit(self._run_in_background, delivery_id)
+
+    def _run_in_background(self, delivery_id):
+        try:
+            self.run(delivery_id)
+        except Exception:
+            logger.exception("Promotion delivery %s failed", delivery_id)
+        finally:
+            connections.close_all()
+
+    def _claim(self, delivery_id):
+        now = timezone.now()
+        claimed = PromotionDelivery.objects.filter(_runnable(now), id=delivery_id).update(
+            status="running", started_at=now, updated_at=now
+        )
+        return claimed == 1
+
+    def run(self, delivery_id):
+        """Sends (or resumes) one delivery; returns False if another worker owns it."""
+        if not self._claim(delivery_id):
+            return False
+        delivery = PromotionDelivery.objects.select_related("promotion").get(id=delivery_id)
+        promotion = delivery.promotion
+        # The audience window is fixed when the promotion is sent, so resumed runs match
+        recipients = promotion_recipients(promotion, now=delivery.created_at)
+        if delivery.total_recipients == 0:
+            delivery.total_recipients = recipients.count()
+            delivery.save(update_fields=["total_recipients", "updated_at"])
+
+        limiter = RateLimiter(self.rate)
+        data = {"type": "PROMOTION", "promotion_id": str(promotion.id)}
+
+        def send(token):
+            limiter.wait()
+            try:
+                send_fcm_message(token, promotion.title, promotion.body, data)
+                return None
+            except Exception as exc:
+                return exc
+
+        rows = recipients.filter(id__gt=delivery.last_device_id).values_list("id", "token")
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as senders:
+                for chunk in _chunks(rows.iterator(chunk_size=self.chunk_size), self.chunk_size):
+                    tokens = [token for _, token in chunk]
+                    results = list(senders.map(send, tokens))
+                    errors = [(token, exc) for token, exc in zip(tokens, results) if exc is not None]
+                    # Dead tokens are deactivated so later sends skip them
+                    record_send_outcomes(
+                        delivered=[token for token, exc in zip(tokens, results) if exc is None], errors=errors
+                    )
+                    progress = {
+                        "sent_count": F("sent_count") + len(chunk) - len(errors),
+                        "failed_count": F("failed_count") + len(errors),
+                        "last_device_id": chunk[-1][0],
+                        "updated_at": timezone.now(),
+                    }
+                    if errors:
+                        progress["last_error"] = str(errors[-1][1])[:1000]
+                    PromotionDelivery.objects.filter(id=delivery_id).update(**progress)
+        except Exception as exc:
+            PromotionDelivery.objects.filter(id=delivery_id).update(
+                status="failed", last_error=str(exc)[:1000], finished_at=timezone.now()
+            )
+            raise
+
+        PromotionDelivery.objects.filter(id=delivery_id).update(status="completed", finished_at=timezone.now())
+        promotion.sent = True
+        promotion.save(update_fields=["sent"])
+        return True
+
+    def run_pending(self):
+        """Runs queued deliveries and resumes abandoned ones; returns how many ran."""
+        pending = PromotionDelivery.objects.filter(_runnable(timezone.now())).order_by("id")
+        return sum(self.run(delivery_id) for delivery_id in pending.values_list("id", flat=True))
+
+
+promotion_fanout = PromotionFanout(
+    chunk_size=getattr(settings, "PROMOTION_CHUNK_SIZE", 500),
+    concurrency=getattr(settings, "PROMOTION_SEND_CONCURRENCY", 8),
+    rate=getattr(settings, "PROMOTION_SEND_RATE", 200),
+)
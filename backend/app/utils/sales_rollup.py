@@ -0,0 +1,259 @@
+# app/utils/sales_rollup.py
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from app.models import DailySalesRollup, Order
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+
+def _add_order(rollup, order):
+    hour = timezone.localtime(order.start_time).hour
+    price = Decimal(str(order.total_price))
+    rollup.total_orders += 1
+    rollup.total_sales += price
+    if order.worker_id is not None and order.worker_id not in rollup.worker_ids:
+        rollup.worker_ids.append(order.worker_id)
+    rollup.hourly_orders[hour] += 1
+    rollup.hourly_sales[hour] = str(Decimal(rollup.hourly_sales[hour]) + price)
+
+
+def record_daily_sales(order):
+    """
+    Adds a completed order to its restaurant's rollup for the day it started.
+    The row is locked while it is updated, so concurrent completions of the
+    same day serialise on it rather than losing counts.
+
+    The first completion of a day creates the row from the orders that
+    already completed that day, so a row started part way through a day
+    (right after a deploy, say) is not missing the morning's sales.
+    """
+    if order.start_time is None:
+        # daily_stats has never counted orders that were not started
+        return
+    day = timezone.localtime(order.start_time).date()
+
+    with transaction.atomic():
+        rollup = DailySalesRollup.objects.select_for_update().filter(
+            restaurant_id=order.restaurant_id, date=day
+        ).first()
+        if rollup is None:
+            earlier = _day_orders(order.restaurant_id, day).exclude(pk=order.pk)
+            rollup = _rollups(earlier).get(
+                (order.restaurant_id, day), DailySalesRollup(restaurant_id=order.restaurant_id, date=day)
+            )
+            _add_order(rollup, order)
+            try:
+                with transaction.atomic():
+                    rollup.save()
+                return
+            except IntegrityError:
+                # Another completion created the row first
+                rollup = DailySalesRollup.objects.select_for_update().get(restaurant_id=order.restaurant_id, date=day)
+        _add_order(rollup, order)
+        rollup.save()
+
+
+def _completed_orders(restaurant_id=None):
+    orders = Order.objects.filter(status__in=Order.COMPLETED_STATUSES, start_time__isnull=False)
+    if restaurant_id is not None:
+        orders = orders.filter(restaurant_id=restaurant_id)
+    return orders
+
+
+def _day_orders(restaurant_id, day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return _completed_orders(restaurant_id).filter(start_time__gte=start, start_time__lt=start + timedelta(days=1))
+
+
+def _summary(total_orders, total_sales, active_workers, hourly_orders=None, hourly_sales=None):
+    total_sales = Decimal(total_sales or 0)
+    summary = {
+        "total_orders": total_orders,
+        "total_sales": round(total_sales, 2),
+        "avg_order_value": round(total_sales / total_orders, 2) if total_orders else 0,
+        "active_workers": active_workers,
+    }
+    if hourly_orders is not None:
+        summary["hourly"] = [
+            {"hour": hour, "orders": count, "sales": round(Decimal(sales), 2)}
+            for hour, (count, sales) in enumerate(zip(hourly_orders, hourly_sales))
+        ]
+    return summary
+
+
+def live_daily_sales(restaurant_id, day, hourly=False):
+    """Same figures as the rollup, aggregated from the day's orders."""
+    orders = _day_orders(restaurant_id, day)
+    totals = orders.aggregate(
+        total_orders=Count("id"),
+        total_sales=Sum("total_price"),
+        active_workers=Count("worker", distinct=True),
+    )
+    hourly_orders = hourly_sales = None
+    if hourly:
+        hourly_orders, hourly_sales = [0] * 24, ["0"] * 24
+        for row in orders.annotate(hour=ExtractHour("start_time")).values("hour").annotate(
+            orders=Count("id"), sales=Sum("total_price")
+        ):
+            hourly_orders[row["hour"]] = row["orders"]
+            hourly_sales[row["hour"]] = row["sales"]
+    return _summary(
+        totals["total_orders"], totals["total_sales"], totals["active_workers"], hourly_orders, hourly_sales
+    )
+
+
+def daily_sales(restaurant_id, day, hourly=False):
+    """
+    Dashboard figures for one restaurant day: the rollup row when there is
+    one, else a live aggregate (days not backfilled yet, or without orders).
+    """
+    rollup = DailySalesRollup.objects.filter(restaurant_id=restaurant_id, date=day).first()
+    if rollup is None:
+        return live_daily_sales(restaurant_id, day, hourly)
+    return _summary(
+        rollup.total_orders,
+        rollup.total_sales,
+        rollup.active_workers,
+        rollup.hourly_orders if hourly else None,
+        rollup.hourly_sales if hourly else None,
+    )
+
+
+def _rollups(orders):
+    """Rollup rows for the given completed orders, by (restaurant_id, date), in two grouped queries."""
+    orders = orders.annotate(day=TruncDate("start_time"))
+    rows = {}
+    hourly = orders.annotate(hour=ExtractHour("start_time")).values("restaurant_id", "day", "hour").annotate(
+        orders=Count("id"), sales=Sum("total_price")
+    )
+    for row in hourly:
+        key = (row["restaurant_id"], row["day"])
+        rollup = rows.get(key)
+        if rollup is None:
+            rollup = rows[key] = DailySalesRollup(restaurant_id=key[0], date=key[1])
+        rollup.total_orders += row["orders"]
+        rollup.total_sales += row["sales"]
+        rollup.hourly_orders[row["hour"]] = row["orders"]
+        rollup.hourly_sales[row["hour"]] = str(row["sales"])
+
+    workers = defaultdict(list)
+    for restaurant, day, worker_id in (
+        orders.exclude(worker=None).values_list("restaurant_id", "day", "worker_id").distinct()
+    ):
+        workers[(restaurant, day)].append(worker_id)
+    for key, rollup in rows.items():
+        rollup.worker_ids = sorted(workers[key])
+
+    return rows
+
+
+def rebuild_daily_sales(restaurant_id=None, since=None, until=None):
+    """
+    Recomputes rollup rows from completed orders with two grouped queries,
+    replacing the rows in the range.
+
+    :param since: first day to rebuild (inclusive), or None for all history
+    :param until: last day to rebuild (inclusive), or None for all history
+    :return: number of rollup rows written
+    """
+    orders = _completed_orders(restaurant_id)
+    rollups = DailySalesRollup.objects.all()
+    if restaurant_id is not None:
+        rollups = rollups.filter(restaurant_id=restaurant_id)
+    if since is not None:
+        orders = orders.filter(start_time__date__gte=since)
+        rollups = rollups.filter(date__gte=since)
+    if until is not None:
+        orders = orders.filter(start_time__date__lte=until)
+        rollups = rollups.filter(date__lte=until)
+
+    rows = _rollups(orders)
+    with transaction.atomic():
+        rollups.delete()
+        DailySalesRollup.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+SERIES_INTERVALS = ("hour", "day", "week", "month")
+
+
+def _period_start(moment, interval):
+    if interval == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime.combine(moment.date(), time.min)
+    if interval == "day":
+        return day
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _next_period(period, interval):
+    if interval == "hour":
+        return period + timedelta(hours=1)
+    if interval == "day":
+        return period + timedelta(days=1)
+    if interval == "week":
+        return period + timedelta(weeks=1)
+    return period.replace(year=period.year + period.month // 12, month=period.month % 12 + 1)
+
+
+def sales_series(restaurant_id, start, end, interval):
+    """
+    Sales per hour, day, week or month from `start` up to `end`, with a zero
+    entry for every period without sales.
+
+    Reads the hourly buckets of the daily rollup rows in the range (at most
+    one row per day, whatever the order volume) and rolls them up to the
+    requested granularity. Days without a row yet, such as those before the
+    rollup was introduced, are aggregated from their orders in one more
+    query. Periods are aligned to local time, so the first period covers all
+    of the hour/day/week/month that `start` falls in.
+
+    :return: list of {"period": aware datetime, "total_sales": "12.50"}
+    """
+    if interval not in SERIES_INTERVALS:
+        raise ValueError(f"Unknown interval: {interval}")
+    first = _period_start(timezone.localtime(start).replace(tzinfo=None), interval)
+    last = timezone.localtime(end).replace(tzinfo=None)
+
+    totals = defaultdict(Decimal)
+    rows = DailySalesRollup.objects.filter(
+        restaurant_id=restaurant_id, date__gte=first.date(), date__lte=last.date()
+    ).values_list("date", "hourly_sales")
+    rolled_up = set()
+    for day, hourly_sales in rows:
+        rolled_up.add(day)
+        for hour, sales in enumerate(hourly_sales):
+            moment = datetime.combine(day, time(hour))
+            totals[_period_start(moment, interval)] += Decimal(sales)
+
+    # Days without a row (not backfilled yet) come from the orders, like daily_sales
+    start_of_first = timezone.make_aware(datetime.combine(first.date(), time.min))
+    end_of_last = timezone.make_aware(datetime.combine(last.date(), time.min)) + timedelta(days=1)
+    live = (
+        _completed_orders(restaurant_id)
+        .filter(start_time__gte=start_of_first, start_time__lt=end_of_last)
+        .exclude(start_time__date__in=rolled_up)
+        .annotate(day=TruncDate("start_time"), hour=ExtractHour("start_time"))
+        .values("day", "hour")
+        .annotate(sales=Sum("total_price"))
+    )
+    for row in live:
+        moment = datetime.combine(row["day"], time(row["hour"]))
+        totals[_period_start(moment, interval)] += row["sales"]
+
+    series = []
+    period = first
+    while period < last:
+        series.append({
+            "period": timezone.make_aware(period),
+            "total_sales": str(totals[period].quantize(Decimal("0.01"))),
+        })
+        period = _next_period(period, interval)
+    return series
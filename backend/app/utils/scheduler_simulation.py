@@ -0,0 +1,232 @@
+# app/utils/scheduler_simulation.py
+
+import heapq
+import math
+import random
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from app.utils.eta_calculator import batch_beverage_ready_times, batch_food_ready_times
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler
+from django.db import transaction
+
+
+# completion is the time the order was actually ready (None until known)
+SimulatedOrder = namedtuple("SimulatedOrder", ["arrival", "num_food", "num_bev", "completion"])
+
+
+def _random_order(rng, arrival, max_food, max_bev):
+    num_food = rng.randint(0, max_food)
+    num_bev = rng.randint(0 if num_food else 1, max_bev)
+    return SimulatedOrder(arrival, num_food, num_bev, None)
+
+
+def poisson_arrivals(rate_per_minute, minutes, start, seed=0, max_food=3, max_bev=4):
+    """
+    Orders arriving as a Poisson process with the given average rate.
+    """
+    rng = random.Random(seed)
+    arrivals = []
+    elapsed = rng.expovariate(rate_per_minute)
+    while elapsed < minutes:
+        arrivals.append(_random_order(rng, start + timedelta(minutes=elapsed), max_food, max_bev))
+        elapsed += rng.expovariate(rate_per_minute)
+    return arrivals
+
+
+def happy_hour_arrivals(base_rate, peak_rate, minutes, peak_start, peak_minutes, start, seed=0,
+                        max_food=3, max_bev=4):
+    """
+    Poisson arrivals at base_rate, jumping to peak_rate between
+    peak_start and peak_start + peak_minutes (all in minutes from start).
+    """
+    rng = random.Random(seed)
+    arrivals = []
+    elapsed = 0.0
+    while True:
+        in_peak = peak_start <= elapsed < peak_start + peak_minutes
+        elapsed += rng.expovariate(peak_rate if in_peak else base_rate)
+        if elapsed >= minutes:
+            return arrivals
+        arrivals.append(_random_order(rng, start + timedelta(minutes=elapsed), max_food, max_bev))
+
+
+def recorded_arrivals(restaurant_id):
+    """
+    Completed orders of a restaurant replayed in the order they started,
+    with their real completion_time. Uses one query for orders and one for items.
+    """
+    from app.models.order_models import Order, OrderItem
+
+    orders = list(
+        Order.objects.filter(
+            restaurant_id=restaurant_id,
+            status__in=["completed", "picked_up"],
+            start_time__isnull=False,
+            completion_time__isnull=False,
+        )
+        .order_by("start_time", "id")
+        .values_list("id", "start_time", "completion_time")
+    )
+
+    counts = defaultdict(lambda: [0, 0])
+    rows = OrderItem.objects.filter(order__in=[order_id for order_id, _, _ in orders]).values_list(
+        "order_id", "quantity", "item__category"
+    )
+    for order_id, quantity, category in rows:
+        counts[order_id][1 if category.lower() == "beverage" else 0] += quantity
+
+    return [
+        SimulatedOrder(start_time, counts[order_id][0], counts[order_id][1], completion_time)
+        for order_id, start_time, completion_time in orders
+    ]
+
+
+def simulate_service(arrivals, num_bartenders, service_noise=0.2, seed=0, per_bev=1,
+                     base_time=15, per_item=2):
+    """
+    Fills in a plausible "actual" completion time for synthetic orders:
+    bartenders work first come first served and every task takes its nominal
+    time scaled by log-normal noise.
+    """
+    rng = random.Random(seed)
+    free_at = [(arrivals[0].arrival if arrivals else None, idx) for idx in range(num_bartenders)]
+    heapq.heapify(free_at)
+
+    completed = []
+    for order in sorted(arrivals, key=lambda o: o.arrival):
+        if order.completion is not None:
+            completed.append(order)
+            continue
+        ready = order.arrival
+        if order.num_food:
+            food_minutes = (base_time + per_item * order.num_food) * rng.lognormvariate(0, service_noise)
+            ready = order.arrival + timedelta(minutes=food_minutes)
+        if order.num_bev:
+            available, idx = heapq.heappop(free_at)
+            start = max(available, order.arrival)
+            finish = start + timedelta(minutes=order.num_bev * per_bev * rng.lognormvariate(0, service_noise))
+            heapq.heappush(free_at, (finish, idx))
+            ready = max(ready, finish)
+        completed.append(order._replace(completion=ready))
+    return completed
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _ready_time(food_ready, beverage_booking):
+    times = [t for t in (food_ready, beverage_booking[0] if beverage_booking else None) if t]
+    return max(times) if times else None
+
+
+def _report(latencies, queue_lengths, errors, num_bartenders, mode):
+    return {
+        "mode": mode,
+        "orders": len(latencies),
+        "bartenders": num_bartenders,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+        "queue_length": {
+            "mean": sum(queue_lengths) / len(queue_lengths) if queue_lengths else 0,
+            "max": max(queue_lengths, default=0),
+        },
+        "eta_error_minutes": {
+            "mean": sum(errors) / len(errors) if errors else None,
+            "p50_abs": percentile([abs(e) for e in errors], 50),
+            "p95_abs": percentile([abs(e) for e in errors], 95),
+        },
+    }
+
+
+def simulate(arrivals, num_bartenders=1):
+    """
+    Replays an arrival stream against an in-memory MultiBartenderScheduler,
+    planning the whole pending queue on every arrival the same way
+    recalculate_pending_etas does. Orders leave the queue at their completion.
+
+    ETA error is (estimated ready time - actual completion) in minutes;
+    positive means the estimate was pessimistic.
+    """
+    latencies, queue_lengths, errors = [], [], []
+    pending = []
+
+    for order in sorted(arrivals, key=lambda o: o.arrival):
+        now = order.arrival
+        pending = [o for o in pending if o.completion is None or o.completion > now]
+        pending.append(order)
+        queue_lengths.append(len(pending))
+
+        planned_at = now.replace(second=0, microsecond=0)
+        started = time.perf_counter()
+        scheduler = MultiBartenderScheduler(num_bartenders)
+        scheduler.reset(planned_at)
+        food = batch_food_ready_times([o.num_food for o in pending], planned_at)
+        beverages = batch_beverage_ready_times([o.num_bev for o in pending], planned_at, scheduler)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        estimate = _ready_time(food[-1], beverages[-1])
+        if estimate is not None and order.completion is not None:
+            errors.append((estimate - order.completion).total_seconds() / 60)
+
+    return _report(latencies, queue_lengths, errors, num_bartenders, "memory")
+
+
+def simulate_against_database(arrivals, num_bartenders=1):
+    """
+    Same replay, but through the real recalculate_pending_etas against the
+    configured database (e.g. DB_ENGINE=sqlite). Everything is written inside
+    a transaction that is rolled back at the end, and each recalculation
+    plans from the order's arrival time.
+    """
+    from app.models import Customer, CustomUser, Item, Order, OrderItem, Restaurant
+    from app.utils.order_eta_utils import recalculate_pending_etas
+
+    latencies, queue_lengths, errors = [], [], []
+
+    with transaction.atomic():
+        user = CustomUser.objects.create_user(username=f"simulation-{time.time_ns()}")
+        restaurant = Restaurant.objects.create(user=user, name="Simulation", address="", phone="")
+        customer = Customer.objects.create(user=user)
+        food = Item.objects.create(restaurant=restaurant, name="Food", price=1, category="food")
+        drink = Item.objects.create(restaurant=restaurant, name="Drink", price=1, category="beverage")
+
+        pending = []
+        for order in sorted(arrivals, key=lambda o: o.arrival):
+            done = [o for o, _ in pending if o.completion is not None and o.completion <= order.arrival]
+            if done:
+                Order.objects.filter(id__in=[row.id for o, row in pending if o in done]).update(status="completed")
+                pending = [(o, row) for o, row in pending if o not in done]
+
+            row = Order.objects.create(customer=customer, restaurant=restaurant)
+            lines = []
+            if order.num_food:
+                lines.append(OrderItem(order=row, item=food, quantity=order.num_food))
+            if order.num_bev:
+                lines.append(OrderItem(order=row, item=drink, quantity=order.num_bev))
+            OrderItem.objects.bulk_create(lines)
+            pending.append((order, row))
+            queue_lengths.append(len(pending))
+
+            started = time.perf_counter()
+            recalculate_pending_etas(restaurant.id, num_bartenders, changed_order_id=row.id, now=order.arrival)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            row.refresh_from_db(fields=["estimated_food_ready_time", "estimated_beverage_ready_time"])
+            ready = [t for t in (row.estimated_food_ready_time, row.estimated_beverage_ready_time) if t]
+            if ready and order.completion is not None:
+                errors.append((max(ready) - order.completion).total_seconds() / 60)
+
+        transaction.set_rollback(True)
+
+    return _report(latencies, queue_lengths, errors, num_bartenders, "database")
@@ -0,0 +1,154 @@
+# app/utils/scheduler_state.py
+
+import json
+import os
+import tempfile
+
+from app.utils.multi_bartender_scheduler import MultiBartenderScheduler
+from django.db import transaction
+
+
+class InMemorySchedulerState:
+    """
+    Keeps each restaurant's scheduler in a dict of the current process.
+    Fast, but every worker process has its own view and restarts lose it.
+    """
+
+    def __init__(self):
+        self._schedulers = {}
+
+    def load(self, restaurant_id):
+        return self._schedulers.get(restaurant_id)
+
+    def save(self, restaurant_id, scheduler):
+        self._schedulers[restaurant_id] = scheduler
+
+    def clear(self):
+        self._schedulers.clear()
+
+
+class SharedSchedulerState:
+    """
+    Base for backends that store scheduler snapshots outside the process.
+
+    Each process keeps the last scheduler it restored together with the
+    version it came from, so a request only pays for a cheap version check
+    unless another worker has changed the timeline in the meantime.
+    """
+
+    def __init__(self):
+        self._local = {}
+
+    def load(self, restaurant_id):
+        version = self.read_version(restaurant_id)
+        if version is None:
+            return None
+
+        cached = self._local.get(restaurant_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        stored = self.read_snapshot(restaurant_id)
+        if stored is None:
+            return None
+        version, snapshot = stored
+        scheduler = MultiBartenderScheduler.from_snapshot(snapshot)
+        self._local[restaurant_id] = (version, scheduler)
+        return scheduler
+
+    def save(self, restaurant_id, scheduler):
+        version = self.write_snapshot(restaurant_id, scheduler.snapshot())
+        self._local[restaurant_id] = (version, scheduler)
+
+    def clear(self):
+        self._local.clear()
+
+    def read_version(self, restaurant_id):
+        raise NotImplementedError
+
+    def read_snapshot(self, restaurant_id):
+        raise NotImplementedError
+
+    def write_snapshot(self, restaurant_id, snapshot):
+        raise NotImplementedError
+
+
+class FileSchedulerState(SharedSchedulerState):
+    """
+    One JSON snapshot per restaurant in a shared directory. Point it at a
+    tmpfs such as /dev/shm to share state between workers through memory.
+    Files are replaced atomically and the file's inode/mtime/size act as
+    version: every write is a new inode, so two writes within one timestamp
+    tick of a coarse filesystem are still told apart.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, restaurant_id):
+        return os.path.join(self.directory, f"restaurant_{restaurant_id}.json")
+
+    @staticmethod
+    def _version(stat):
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def read_version(self, restaurant_id):
+        try:
+            stat = os.stat(self._path(restaurant_id))
+        except FileNotFoundError:
+            return None
+        return self._version(stat)
+
+    def read_snapshot(self, restaurant_id):
+        path = self._path(restaurant_id)
+        try:
+            with open(path) as f:
+                version = os.fstat(f.fileno())
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        return self._version(version), snapshot
+
+    def write_snapshot(self, restaurant_id, snapshot):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._path(restaurant_id))
+        return self.read_version(restaurant_id)
+
+
+class DatabaseSchedulerState(SharedSchedulerState):
+    """Stores snapshots in the SchedulerState table with a version counter."""
+
+    def read_version(self, restaurant_id):
+        from app.models.scheduler_models import SchedulerState
+
+        return (
+            SchedulerState.objects.filter(restaurant_id=restaurant_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+
+    def read_snapshot(self, restaurant_id):
+        from app.models.scheduler_models import SchedulerState
+
+        row = (
+            SchedulerState.objects.filter(restaurant_id=restaurant_id)
+            .values_list("version", "state")
+            .first()
+        )
+        return row
+
+    def write_snapshot(self, restaurant_id, snapshot):
+        from app.models.scheduler_models import SchedulerState
+
+        with transaction.atomic():
+            row, _ = SchedulerState.objects.select_for_update().get_or_create(
+                restaurant_id=restaurant_id
+            )
+            row.version += 1
+            row.state = snapshot
+            row.save(update_fields=["version", "state", "updated_at"])
+        return row.version
@@ -0,0 +1,110 @@
+# app/utils/worker_stats.py
+
+from collections import defaultdict
+
+from app.models import Order, Worker
+from django.db import connection
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Q,
+    Sum,
+)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's continuous percentile, e.g. PercentileCont(0.9, "duration")."""
+
+    function = "percentile_cont"
+    name = "PercentileCont"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, fraction, expression, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def _percentile_cont(values, fraction):
+    """percentile_cont over sorted values: interpolates between the two nearest ranks."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _timed_orders(since, until, prefix=""):
+    conditions = {"status__in": Order.COMPLETED_STATUSES, "start_time__isnull": False, "completion_time__isnull": False}
+    if since is not None:
+        conditions["start_time__date__gte"] = since
+    if until is not None:
+        conditions["start_time__date__lte"] = until
+    return Q(**{prefix + lookup: value for lookup, value in conditions.items()})
+
+
+def _seconds(duration):
+    return duration.total_seconds() if duration is not None else None
+
+
+def bartender_statistics(restaurant_id, since=None, until=None):
+    """
+    Per-worker order counts, sales and prep-time distribution in a single
+    grouped query: workers are left-joined to their completed, timed orders
+    and every figure is a filtered aggregate, so workers without orders in the
+    range still get a row. Databases other than PostgreSQL need a second
+    query for the percentiles.
+
+    :param since: first start_time day to include (inclusive), or None
+    :param until: last start_time day to include (inclusive), or None
+    """
+    timed = _timed_orders(since, until, prefix="orders__")
+    duration = ExpressionWrapper(F("orders__completion_time") - F("orders__start_time"), output_field=DurationField())
+    aggregates = {
+        "total_orders": Count("orders", filter=timed),
+        "total_sales": Sum("orders__total_price", filter=timed),
+        "avg_duration": Avg(duration, filter=timed),
+        "min_duration": Min(duration, filter=timed),
+        "max_duration": Max(duration, filter=timed),
+    }
+    in_database = connection.vendor == "postgresql"
+    if in_database:
+        aggregates["p50_duration"] = PercentileCont(0.5, duration, filter=timed, output_field=DurationField())
+        aggregates["p90_duration"] = PercentileCont(0.9, duration, filter=timed, output_field=DurationField())
+    workers = list(Worker.objects.filter(restaurant_id=restaurant_id).annotate(**aggregates).order_by("id"))
+
+    if not in_database:
+        # percentile_cont is PostgreSQL-only; elsewhere (DB_ENGINE=sqlite) the
+        # percentiles come from the durations, at the cost of a second query
+        durations = defaultdict(list)
+        rows = (
+            Order.objects.filter(_timed_orders(since, until), worker__restaurant_id=restaurant_id)
+            .annotate(duration=ExpressionWrapper(F("completion_time") - F("start_time"), output_field=DurationField()))
+            .order_by("duration")
+            .values_list("worker_id", "duration")
+        )
+        for worker_id, taken in rows:
+            durations[worker_id].append(taken)
+        for worker in workers:
+            worker.p50_duration = _percentile_cont(durations[worker.id], 0.5)
+            worker.p90_duration = _percentile_cont(durations[worker.id], 0.9)
+
+    return [
+        {
+            "worker_name": worker.name,
+            "role": worker.role,
+            "total_orders": worker.total_orders,
+            "average_time_seconds": _seconds(worker.avg_duration),
+            "fastest_time_seconds": _seconds(worker.min_duration),
+            "slowest_time_seconds": _seconds(worker.max_duration),
+            "p50_time_seconds": _seconds(worker.p50_duration),
+            "p90_time_seconds": _seconds(worker.p90_duration),
+            "total_sales": float(worker.total_sales or 0),
+        }
+        for worker in workers
+    ]
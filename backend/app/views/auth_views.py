@@ -1,9 +1,9 @@
 import json
+import logging
 import re
 import unicodedata
-import logging
 
-import requests
+from app.utils.http_client import outbound_http
 from app.utils.image_upload import save_image_from_base64
 from django.conf import settings
 from django.contrib.auth import authenticate
@@ -17,6 +17,7 @@ from ..models.worker_models import Worker
 from ..serializers.restaurant_serializer import RestaurantSerializer
 from ..serializers.worker_serializer import WorkerSerializer
 
+
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
     return {
@@ -198,7 +199,7 @@ def validate_business(request):
             "fields": "place_id,name,formatted_address,business_status,types",
             "key": settings.GOOGLE_PLACES_API_KEY,
         }
-        r = requests.get(
+        r = outbound_http.get(
             "https://maps.googleapis.com/maps/api/place/findplacefromtext/json",
             params=params,
             timeout=6,
@@ -0,0 +1,81 @@
+import json
+import queue
+
+from app.utils.order_events import (
+    customer_channel,
+    order_event_broker,
+    restaurant_channel,
+)
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def _authenticate(request):
+    """
+    JWT from the Authorization header, or from ?token= because browsers'
+    EventSource cannot send headers.
+    """
+    auth = JWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is not None:
+            return result[0]
+        token = request.GET.get("token")
+        if token:
+            return auth.get_user(auth.get_validated_token(token))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return None
+
+
+def _channel_for(user):
+    # Restaurant accounts follow their whole board, customers their own orders
+    if hasattr(user, "restaurant"):
+        return restaurant_channel(user.restaurant.id)
+    if hasattr(user, "customer"):
+        return customer_channel(user.customer.id)
+    return None
+
+
+def _event_stream(channel, keepalive):
+    subscription = order_event_broker.subscribe(channel)
+    try:
+        # The stream outlives the request's database work; don't hold a connection while idle
+        connection.close()
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = subscription.get(timeout=keepalive)
+            except queue.Empty:
+                # Also how a closed client is noticed: the server fails to write and closes us
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        order_event_broker.unsubscribe(subscription)
+
+
+def order_events(request):
+    """
+    Server-Sent Events stream of order changes (order.created, order.status,
+    order.eta) for the authenticated restaurant or customer. A plain
+    generator, so it streams under the WSGI server the app runs on; each open
+    stream occupies one server thread.
+    """
+    user = _authenticate(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided."}, status=401)
+
+    channel = _channel_for(user)
+    if channel is None:
+        return JsonResponse({"error": "Only restaurant or customer accounts can follow orders."}, status=403)
+
+    keepalive = getattr(settings, "ORDER_EVENTS_KEEPALIVE", 15)
+    response = StreamingHttpResponse(_event_stream(channel, keepalive), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,13 +1,25 @@
 from datetime import timedelta
 
-from app.mobileViews.utils import send_fcm_httpv1, send_notification_to_device
 from app.scheduler_instance import get_restaurant_scheduler
 from app.utils.eta_calculator import (
     calculate_beverage_eta_multibartender,
-    calculate_food_eta,
     round_to_nearest_five,
 )
+from app.utils.eta_quote_cache import eta_quote_cache
+from app.utils.notification_outbox import enqueue_order_update
+from app.utils.order_completion import is_completion, on_order_completed
 from app.utils.order_eta_utils import recalculate_pending_etas
+from app.utils.order_events import publish_order_events
+from app.utils.order_sync import (
+    InvalidSyncToken,
+    board_etag,
+    board_version,
+    changed_since,
+    sync_token,
+)
+from app.utils.pagination import ORDER_BOARD_ORDERING, InvalidCursor, cursor_page
+from app.utils.prep_time_model import prep_time_models
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -26,15 +38,14 @@ def create_order(request):
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    # 1) Persist the order & items, then set total_price
-    order = serializer.save()
-    order.total_price = order.get_total()
-    order.save(update_fields=["total_price"])
-
-    # Recalculate ETAs
-    recalculate_pending_etas(order.restaurant.id)
-    order.refresh_from_db()
+    # 1) Persist the order, its items and total_price, and plan its ETAs atomically
+    with transaction.atomic():
+        order = serializer.save()
+        publish_order_events([order], "order.created")
+        recalculate_pending_etas(order.restaurant_id, changed_order_id=order.id)
 
+    # Reload with everything the response needs in a fixed number of queries
+    order = Order.objects.with_details().get(id=order.id)
     serializer = OrderSerializer(order)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -50,33 +61,87 @@ def retrieve_active_orders(request):
 
     restaurant = request.user.restaurant
     statuses = request.GET.get("statuses")
-    limit = int(request.GET.get("limit", 20))
-    offset_raw = request.GET.get("offset")
-    offset = int(offset_raw) if offset_raw is not None else None
+    try:
+        limit = int(request.GET.get("limit", 20))
+        offset_raw = request.GET.get("offset")
+        offset = int(offset_raw) if offset_raw is not None else None
+    except ValueError:
+        return Response({"error": "limit and offset must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1 or (offset is not None and offset < 0):
+        return Response(
+            {"error": "limit must be at least 1 and offset cannot be negative."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    # ?cursor= (empty for the first page) switches to keyset pagination on (start_time, id)
+    cursor = request.GET.get("cursor")
+    include_total = request.GET.get("include_total", "true").lower() not in ("false", "0", "no")
+    # ?updated_since=<sync_token from an earlier response> returns only orders changed since then
+    updated_since = request.GET.get("updated_since")
+
+    board = Order.objects.filter(restaurant=restaurant)
+
+    # Idle polls stop here: one aggregate query and a 304
+    last_update, order_count = board_version(board)
+    etag = board_etag(last_update, order_count, request.GET.urlencode())
+    token = sync_token(last_update)
+    if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    if updated_since is not None:
+        # Every changed order regardless of the statuses filter, so clients can drop
+        # orders that moved out of it
+        try:
+            changed = changed_since(board, updated_since)
+        except InvalidSyncToken as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OrderSerializer(changed.order_by(*ORDER_BOARD_ORDERING).with_details(), many=True)
+        return Response({
+            "results": serializer.data,
+            "sync_token": token,
+        }, status=status.HTTP_200_OK, headers={"ETag": etag})
 
-    orders = Order.objects.filter(restaurant=restaurant)
+    orders = board
 
     if statuses:
         status_list = [s.strip() for s in statuses.split(",") if s.strip()]
         if status_list:
             orders = orders.filter(status__in=status_list)
 
-    orders = orders.order_by("-start_time")
-    total = orders.count()
+    orders = orders.order_by(*ORDER_BOARD_ORDERING)
+    total = orders.count() if include_total else None
+    orders = orders.with_details()
+
+    if cursor is not None:
+        try:
+            paginated_orders, next_cursor = cursor_page(orders, cursor, limit)
+        except InvalidCursor as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OrderSerializer(paginated_orders, many=True)
+        return Response({
+            "results": serializer.data,
+            "total": total,
+            "next_cursor": next_cursor,
+            "sync_token": token,
+        }, status=status.HTTP_200_OK, headers={"ETag": etag})
 
     if offset is not None:
-        paginated_orders = orders[offset:offset + limit]
-        next_offset = offset + limit if offset + limit < total else None
+        paginated_orders = list(orders[offset:offset + limit + 1])
+        has_more = len(paginated_orders) > limit
+        paginated_orders = paginated_orders[:limit]
+        next_offset = offset + limit if has_more else None
     else:
-        paginated_orders = orders[:limit]
-        next_offset = limit if limit < total else None
+        paginated_orders = list(orders[:limit + 1])
+        has_more = len(paginated_orders) > limit
+        paginated_orders = paginated_orders[:limit]
+        next_offset = limit if has_more else None
 
     serializer = OrderSerializer(paginated_orders, many=True)
     return Response({
         "results": serializer.data,
         "total": total,
         "next_offset": next_offset,
-    }, status=status.HTTP_200_OK)
+        "sync_token": token,
+    }, status=status.HTTP_200_OK, headers={"ETag": etag})
 
 
 @api_view(["PATCH"])
@@ -132,26 +197,20 @@ def update_order_status(request, restaurant_id, order_id, new_status):
         order.food_status = "in_progress"
         order.beverage_status = "in_progress"
 
-    order.status = normalized_status
-    order.save()
-
-    if order.customer.fcm_token:
-        send_fcm_httpv1(
-            device_token=order.customer.fcm_token,
-            title="Order Update",
-            body=f"Your order #{order.id} is now {order.status}",
-            data={"type": "ORDER_UPDATE", "order_id": str(order.id)}
-        )
-
-        send_notification_to_device(
-            device_token=order.customer.fcm_token,
-            title="Order Update",
-            body=f"Your order #{order.id} is now {order.status}",
-            data={"type": "ORDER_UPDATE", "order_id": str(order.id)}
-        )
-
-    recalculate_pending_etas(order.restaurant.id)
-    order.refresh_from_db()
+    # The status change and its push notification commit together
+    with transaction.atomic():
+        completing = is_completion(order.status, normalized_status)
+        order.status = normalized_status
+        if completing:
+            order.completion_time = timezone.now()
+        order.save()
+        if completing:
+            on_order_completed(order)
+        publish_order_events([order], "order.status")
+        enqueue_order_update(order)
+
+    recalculate_pending_etas(order.restaurant.id, changed_order_id=order.id)
+    order = Order.objects.with_details().get(id=order.id)
     serializer = OrderSerializer(order)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -200,21 +259,6 @@ def update_order_category_status(request, restaurant_id, order_id, category, new
     food_val = status_priority[order.food_status] if has_food else None
     bev_val = status_priority[order.beverage_status] if has_bev else None
 
-    if order.customer.fcm_token:
-        send_fcm_httpv1(
-            device_token=order.customer.fcm_token,
-            title="Order Update",
-            body=f"Your order #{order.id} is now {order.status}",
-            data={"type": "ORDER_UPDATE", "order_id": str(order.id)}
-        )
-
-        send_notification_to_device(
-            device_token=order.customer.fcm_token,
-            title="Order Update",
-            body=f"Your order #{order.id} is now {order.status}",
-            data={"type": "ORDER_UPDATE", "order_id": str(order.id)}
-        )
-
     if food_val is not None and bev_val is not None:
         min_val = min(food_val, bev_val)
     elif food_val is not None:
@@ -224,16 +268,20 @@ def update_order_category_status(request, restaurant_id, order_id, category, new
     else:
         min_val = status_priority["pending"]
 
-    order.status = reverse_lookup[min_val]
-    order.save()
+    with transaction.atomic():
+        completing = is_completion(order.status, reverse_lookup[min_val])
+        order.status = reverse_lookup[min_val]
+        order.save()
 
-    if order.status == "completed":
-        order.completion_time = timezone.now()
-        order.save(update_fields=["completion_time"])
+        if order.status == "completed":
+            order.completion_time = timezone.now()
+            order.save(update_fields=["completion_time"])
 
-        for order_item in order.order_items.all():
-            order_item.item.times_ordered += order_item.quantity
-            order_item.item.save()
+        if completing:
+            on_order_completed(order)
+
+        publish_order_events([order], "order.status")
+        enqueue_order_update(order)
 
     #     order.refresh_from_db()
     #     serializer = OrderSerializer(order)
@@ -262,7 +310,7 @@ def get_customer_orders(request):
 
     orders = (
         Order.objects.filter(customer=customer)
-        .prefetch_related("order_items__item", "customer__user")
+        .with_details()
         .order_by("-start_time")
     )
 
@@ -274,7 +322,7 @@ def get_customer_orders(request):
 @permission_classes([IsAuthenticated])
 def get_order(request, order_id):
     try:
-        order = Order.objects.get(id=order_id)
+        order = Order.objects.with_details().get(id=order_id)
     except:
         return Response(
             {"error": "Order not found"},
@@ -296,9 +344,9 @@ def estimate_order_eta(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # 1) Count food vs. beverage
-    num_food = 0
-    num_bev = 0
+    # 1) Split the cart into food vs. beverage lines
+    food_lines = []
+    bev_lines = []
     items = Item.objects.in_bulk([oi["item_id"] for oi in order_items])
     for oi in order_items:
         item = items.get(oi["item_id"])
@@ -309,30 +357,44 @@ def estimate_order_eta(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         if item.category and item.category.lower() == "beverage":
-            num_bev += qty
+            bev_lines.append((item.id, qty))
         else:
-            num_food += qty
+            food_lines.append((item.id, qty))
+
+    # Learned preparation minutes for this restaurant
+    model = prep_time_models.get(restaurant_id)
+    food_minutes = model.food_minutes(food_lines)
+    bev_minutes = model.beverage_minutes(bev_lines)
 
     # Prepare scheduler (does not mutate its state for this estimate)
-    scheduler = get_restaurant_scheduler(restaurant_id, num_bartenders=1)
+    scheduler = get_restaurant_scheduler(restaurant_id)
 
     now = timezone.now()
 
-    # 2) Food ETA: simple formula
-    raw_food = calculate_food_eta(num_food)
-    food_eta = round_to_nearest_five(raw_food)
+    # Identical carts within the same minute and queue state get the same quote
+    cache_key = eta_quote_cache.make_key(
+        restaurant_id, food_minutes, bev_minutes, now.replace(second=0, microsecond=0), scheduler.version
+    )
+    quote = eta_quote_cache.get(cache_key)
+    if quote is not None:
+        return Response(quote, status=status.HTTP_200_OK)
+
+    # 2) Food ETA: learned preparation time
+    food_eta = round_to_nearest_five(food_minutes)
     food_ready = now + timedelta(minutes=food_eta)
 
     # 3) Beverage ETA: scheduler‐based
     raw_bev, bev_finish_dt, bartender_idx = calculate_beverage_eta_multibartender(
-        num_bev, now, scheduler
+        bev_minutes, now, scheduler
     )
     bev_eta = round_to_nearest_five(raw_bev)
     bev_ready = now + timedelta(minutes=bev_eta)
 
-    return Response({
+    quote = {
         "food_eta_minutes": food_eta,
         "beverage_eta_minutes": bev_eta,
         "estimated_food_ready_time": food_ready.isoformat(),
         "estimated_beverage_ready_time": bev_ready.isoformat(),
-    }, status=status.HTTP_200_OK)
+    }
+    eta_quote_cache.set(cache_key, quote)
+    return Response(quote, status=status.HTTP_200_OK)
@@ -1,6 +1,9 @@
-from app.mobileViews.utils import send_notification_to_device
-from app.models import Customer, PromotionNotification
-from app.serializers.promotion_serializer import PromotionNotificationSerializer
+from app.models import PromotionDelivery, PromotionNotification
+from app.serializers.promotion_serializer import (
+    PromotionDeliverySerializer,
+    PromotionNotificationSerializer,
+)
+from app.utils.promotion_fanout import promotion_fanout
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -62,17 +65,23 @@ def send_promotion(request, promotion_id):
     except PromotionNotification.DoesNotExist:
         return Response({"error": "Promotion not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    customers = Customer.objects.exclude(fcm_token__isnull=True).exclude(fcm_token="")
+    # Recipients are sent to in the background; poll the delivery for progress
+    delivery, created = promotion_fanout.start(promotion)
+    return Response(
+        {
+            "message": "Promotion queued." if created else "Promotion is already being sent.",
+            "job_id": delivery.id,
+            "status": delivery.status,
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
 
-    for customer in customers:
-        send_notification_to_device(
-            device_token=customer.fcm_token,
-            title=promotion.title,
-            body=promotion.body,
-            data={"type": "PROMOTION"}
-        )
 
-    promotion.sent = True
-    promotion.save()
-
-    return Response({"message": "Promotion sent!"})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def promotion_delivery_status(request, job_id):
+    try:
+        delivery = PromotionDelivery.objects.get(id=job_id, promotion__restaurant=request.user.restaurant)
+    except PromotionDelivery.DoesNotExist:
+        return Response({"error": "Delivery not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(PromotionDeliverySerializer(delivery).data)
@@ -1,3 +1,4 @@
+from app.utils.item_sales import record_item_rating
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -24,6 +25,7 @@ def create_review(request):
         order = review.order
         order.reviewed = True
         order.save()
+        record_item_rating(review)
 
         return Response(ReviewSerializer(review).data, status=status.HTTP_201_CREATED)
 
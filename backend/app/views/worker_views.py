@@ -5,6 +5,14 @@ from rest_framework.response import Response
 
 from ..models.restaurant_models import Restaurant
 from ..models.worker_models import Worker
+from ..scheduler_instance import refresh_restaurant_bartenders
+from ..utils.order_eta_utils import recalculate_pending_etas
+
+
+def _sync_bartenders(restaurant_id):
+    # Resize the restaurant's scheduler and re-plan pending orders if the bartender count changed
+    if refresh_restaurant_bartenders(restaurant_id):
+        recalculate_pending_etas(restaurant_id)
 
 
 @api_view(["POST"])
@@ -34,6 +42,8 @@ def create_worker(request):
         pin=pin,
         role=role
     )
+    if role == "bartender":
+        _sync_bartenders(restaurant.id)
 
     return Response({
         "message": f"{role.title()} created successfully",
@@ -76,10 +86,13 @@ def update_worker(request, worker_id):
     if new_role not in ["manager", "bartender"]:
         return Response({"error": "Invalid role"}, status=400)
 
+    role_changed = new_role != worker.role
     worker.name = data.get("name", worker.name)
     worker.pin = new_pin
     worker.role = new_role
     worker.save()
+    if role_changed:
+        _sync_bartenders(restaurant.id)
 
     return Response({
         "message": "Worker updated successfully",
@@ -111,4 +124,6 @@ def delete_worker(request, worker_id):
             return Response({"error": "At least one manager is required"}, status=400)
 
     worker.delete()
+    if worker.role == "bartender":
+        _sync_bartenders(worker.restaurant_id)
     return Response({"message": "Worker deleted successfully"}, status=200)
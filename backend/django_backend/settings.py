@@ -20,6 +20,56 @@ STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "fallback-stripe-key")
 FIREBASE_CREDENTIALS_JSON = os.getenv("FIREBASE_CREDENTIALS_JSON", "fallback")
 
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
+
+# Where bartender schedulers are kept: "memory", "file" or "database"
+SCHEDULER_STATE_BACKEND = os.getenv("SCHEDULER_STATE_BACKEND", "memory")
+SCHEDULER_STATE_DIR = os.getenv("SCHEDULER_STATE_DIR", "/dev/shm/streamline-scheduler")
+
+# Cart ETA previews are cached per restaurant for this many seconds
+ETA_QUOTE_CACHE_TTL = int(os.getenv("ETA_QUOTE_CACHE_TTL", "30"))
+ETA_QUOTE_CACHE_MAX_ENTRIES = 5000
+
+# Learned preparation times (trained by `manage.py train_prep_time_models`, run
+# periodically): seconds before a worker re-reads a restaurant's persisted model, and
+# completed orders needed before the fixed 15 + 2 x items formula is replaced
+PREP_TIME_MODEL_TTL = int(os.getenv("PREP_TIME_MODEL_TTL", "900"))
+PREP_TIME_MIN_SAMPLES = 20
+
+# Server-Sent Events for order changes: seconds between keep-alive comments, and
+# events buffered per slow listener before new ones are dropped
+ORDER_EVENTS_KEEPALIVE = 15
+ORDER_EVENTS_MAX_PENDING = 100
+
+# Push notifications go through the NotificationOutbox table and are sent by a
+# background pool: "thread" sends after commit, "eager" sends inline on commit
+# (tests, local debugging), "manual" leaves them to `manage.py dispatch_notifications`
+FCM_BASE_URL = os.getenv("FCM_BASE_URL", "https://fcm.googleapis.com")
+NOTIFICATION_DISPATCH_MODE = os.getenv("NOTIFICATION_DISPATCH_MODE", "thread")
+NOTIFICATION_DISPATCH_WORKERS = 4
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 5
+NOTIFICATION_RETRY_MAX_SECONDS = 300
+
+# Promotion sends: customers loaded per chunk, concurrent FCM requests and
+# messages per second for one delivery
+PROMOTION_CHUNK_SIZE = 500
+PROMOTION_SEND_CONCURRENCY = 8
+PROMOTION_SEND_RATE = 200
+
+# The FCM OAuth token is refreshed in the background this many seconds before it
+# expires, and inline once less than FCM_TOKEN_REFRESH_MARGIN is left
+FCM_TOKEN_REFRESH_AHEAD = 600
+FCM_TOKEN_REFRESH_MARGIN = 300
+
+# Shared keep-alive pool for outbound HTTP (FCM, Google OAuth, Places): default
+# (connect, read) timeouts in seconds, hosts kept, connections per host (a hard cap)
+# and seconds a request waits for a free connection before failing
+OUTBOUND_HTTP_CONNECT_TIMEOUT = 3
+OUTBOUND_HTTP_READ_TIMEOUT = 10
+OUTBOUND_HTTP_POOL_HOSTS = 10
+OUTBOUND_HTTP_POOL_MAXSIZE = 10
+OUTBOUND_HTTP_POOL_TIMEOUT = 5
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -102,6 +152,13 @@ DATABASES = {
     }
 }
 
+# Offline tooling (e.g. simulate_scheduler) can run against a local SQLite file
+if os.getenv("DB_ENGINE") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 